@@ -14,6 +14,8 @@ extras = {
     "azure": ["azure-storage-blob>=12.19.0", "azure-identity>=1.15.0"],
     "aws": ["boto3>=1.34.0", "botocore>=1.34.0"],
     "gcp": ["google-cloud-storage>=2.12.0", "google-cloud-secret-manager>=2.18.0"],
+    "remote-read": ["python-snappy>=0.7.1", "crc32c>=2.4"],
+    "feature-store": ["pyarrow>=14.0.0"],
     "dev": open("requirements-dev.txt").read().splitlines()[1:],  # skip '-r req.txt'
 }
 
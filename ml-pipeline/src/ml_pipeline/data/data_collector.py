@@ -1,13 +1,72 @@
 import os
 import datetime as dt
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Sequence, Tuple, Union
 
+import numpy as np
 import requests
 import pandas as pd
 import structlog
 
+from ml_pipeline.data.matrix_decoder import MatrixDecoder, MatrixResult
+from ml_pipeline.data import remote_read as rr
+
 logger = structlog.get_logger(__name__)
 
+# Minimal metric set for anomaly detection
+DEFAULT_QUERIES = {
+    "cpu": 'rate(node_cpu_seconds_total{mode!="idle"}[5m])',
+    "memory": '1 - (node_memory_MemAvailable_bytes / node_memory_MemTotal_bytes)',
+    "disk": 'rate(node_disk_io_time_seconds_total[5m])',
+    "network_rx": 'rate(node_network_receive_bytes_total[5m])',
+    "network_tx": 'rate(node_network_transmit_bytes_total[5m])',
+    "pod_cpu": 'rate(container_cpu_usage_seconds_total[5m])',
+    "pod_memory": 'container_memory_working_set_bytes',
+}
+
+# Per-container metrics under the names the detector API scores them by
+# (its DEFAULT_METRIC_QUERIES, without the namespace filter)
+WORKLOAD_QUERIES = {
+    "cpu_usage": 'rate(container_cpu_usage_seconds_total[5m])',
+    "memory_usage": 'container_memory_usage_bytes',
+    "network_rx": 'rate(container_network_receive_bytes_total[5m])',
+    "network_tx": 'rate(container_network_transmit_bytes_total[5m])',
+    "disk_read": 'rate(container_fs_reads_bytes_total[5m])',
+    "disk_write": 'rate(container_fs_writes_bytes_total[5m])',
+}
+
+# Raw series behind WORKLOAD_QUERIES for remote read: metric -> (selector, counter).
+# Remote read returns stored samples, so counters become rates locally.
+WORKLOAD_SELECTORS = {
+    "cpu_usage": ("container_cpu_usage_seconds_total", True),
+    "memory_usage": ("container_memory_usage_bytes", False),
+    "network_rx": ("container_network_receive_bytes_total", True),
+    "network_tx": ("container_network_transmit_bytes_total", True),
+    "disk_read": ("container_fs_reads_bytes_total", True),
+    "disk_write": ("container_fs_writes_bytes_total", True),
+}
+
+
+def counter_rate(result: MatrixResult) -> MatrixResult:
+    """
+    Per-second increase between consecutive samples of each counter series.
+
+    A decrease is a counter reset and counts as an increase from zero, as
+    in PromQL. Each series loses its first sample.
+    """
+    ts, values, offsets = result.timestamps, result.values, result.offsets
+    counts = np.diff(offsets)
+    delta = np.zeros_like(values)
+    delta[1:] = values[1:] - values[:-1]
+    delta = np.where(delta < 0, values, delta)
+    elapsed = np.ones_like(ts)
+    elapsed[1:] = ts[1:] - ts[:-1]
+    keep = np.ones(len(values), dtype=bool)
+    keep[offsets[:-1][counts > 0]] = False
+    new_offsets = np.concatenate(([0], np.cumsum(np.maximum(counts - 1, 0))))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rate = delta / elapsed
+    return MatrixResult(ts[keep], rate[keep], new_offsets, result.labels)
+
 class PrometheusCollector:
     """
     Thin wrapper around Prometheus HTTP API.
@@ -18,9 +77,11 @@ class PrometheusCollector:
         self,
         base_url: str = None,
         timeout: int = 30,
+        chunk_size: int = 64 * 1024,
     ):
         self.base_url = (base_url or os.getenv("PROMETHEUS_URL", "http://prometheus:9090")).rstrip("/")
         self.timeout = timeout
+        self.chunk_size = chunk_size
         self.session = requests.Session()
 
     def query_range(
@@ -31,6 +92,16 @@ class PrometheusCollector:
         step: str = "1m",
     ) -> pd.DataFrame:
         """Return pandas DataFrame with columns: timestamp, value, metric labels."""
+        return self.query_range_arrays(query, start, end, step).to_frame()
+
+    def query_range_arrays(
+        self,
+        query: str,
+        start: dt.datetime = None,
+        end: dt.datetime = None,
+        step: str = "1m",
+    ) -> MatrixResult:
+        """Stream a range query straight into contiguous numpy arrays."""
         start = start or dt.datetime.utcnow() - dt.timedelta(hours=6)
         end = end or dt.datetime.utcnow()
 
@@ -41,35 +112,88 @@ class PrometheusCollector:
             "step": step,
         }
         logger.info("Querying Prometheus", query=query, start=start, end=end, step=step)
-        resp = self.session.get(
+        with self.session.get(
             f"{self.base_url}/api/v1/query_range",
             params=params,
             timeout=self.timeout,
-        )
-        resp.raise_for_status()
-        raw = resp.json()["data"]["result"]
-
-        frames = []
-        for series in raw:
-            df = (
-                pd.DataFrame(series["values"], columns=["timestamp", "value"])
-                .astype({"timestamp": int, "value": float})
-                .assign(**series["metric"])
-            )
-            frames.append(df)
-        if not frames:
-            return pd.DataFrame(columns=["timestamp", "value"])
-        return pd.concat(frames, ignore_index=True)
-
-    def default_metrics(self) -> Dict[str, pd.DataFrame]:
-        """Pull the minimal metric set we need for anomaly detection."""
-        queries = {
-            "cpu": 'rate(node_cpu_seconds_total{mode!="idle"}[5m])',
-            "memory": '1 - (node_memory_MemAvailable_bytes / node_memory_MemTotal_bytes)',
-            "disk": 'rate(node_disk_io_time_seconds_total[5m])',
-            "network_rx": 'rate(node_network_receive_bytes_total[5m])',
-            "network_tx": 'rate(node_network_transmit_bytes_total[5m])',
-            "pod_cpu": 'rate(container_cpu_usage_seconds_total[5m])',
-            "pod_memory": 'container_memory_working_set_bytes',
+            stream=True,
+        ) as resp:
+            resp.raise_for_status()
+            decoder = MatrixDecoder()
+            for chunk in resp.iter_content(chunk_size=self.chunk_size):
+                decoder.feed(chunk)
+        return decoder.close()
+
+    def remote_read(
+        self,
+        selectors: Union[str, Sequence[str]],
+        start: dt.datetime = None,
+        end: dt.datetime = None,
+        verify_checksums: bool = True,
+    ) -> List[MatrixResult]:
+        """
+        Pull raw samples through the remote-read API, one MatrixResult per selector.
+
+        Selectors are plain series selectors (`metric{label="v"}`), not PromQL.
+        Streamed XOR chunks are requested and decoded frame by frame; servers
+        that only support SAMPLES responses are handled too.
+        """
+        selectors = [selectors] if isinstance(selectors, str) else list(selectors)
+        start = start or dt.datetime.utcnow() - dt.timedelta(hours=6)
+        end = end or dt.datetime.utcnow()
+        start_ms, end_ms = int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+
+        queries = [(start_ms, end_ms, rr.parse_selector(sel)) for sel in selectors]
+        bounds = [(start_ms, end_ms)] * len(queries)
+        body = rr.snappy_compress(rr.encode_read_request(queries))
+
+        logger.info("Remote-reading Prometheus", selectors=selectors, start=start, end=end)
+        with self.session.post(
+            f"{self.base_url}/api/v1/read",
+            data=body,
+            headers={
+                "Content-Encoding": "snappy",
+                "Content-Type": "application/x-protobuf",
+                "X-Prometheus-Remote-Read-Version": "0.1.0",
+            },
+            timeout=self.timeout,
+            stream=True,
+        ) as resp:
+            resp.raise_for_status()
+            content_type = resp.headers.get("Content-Type", "")
+            if content_type.startswith("application/x-streamed-protobuf"):
+                frames = rr.iter_frames(resp.iter_content(chunk_size=self.chunk_size), verify_checksums)
+                results = rr.decode_chunked_response(frames, bounds)
+            else:
+                results = rr.decode_samples_response(resp.content, bounds)
+        logger.info("Remote read complete", samples=sum(len(r.values) for r in results))
+        return results
+
+    def remote_read_metrics(
+        self,
+        selectors: Dict[str, Tuple[str, bool]],
+        start: dt.datetime = None,
+        end: dt.datetime = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Pull named metrics in one remote-read request (see WORKLOAD_SELECTORS).
+
+        Counters are converted with `counter_rate`. Same frame layout as
+        `query_range`, without server-side PromQL evaluation, which makes
+        pulling weeks of history far cheaper.
+        """
+        names = list(selectors)
+        results = self.remote_read([selectors[name][0] for name in names], start, end)
+        return {
+            name: (counter_rate(result) if selectors[name][1] else result).to_frame()
+            for name, result in zip(names, results)
         }
-        return {name: self.query_range(q) for name, q in queries.items()}
\ No newline at end of file
+
+    def default_metrics(
+        self,
+        start: dt.datetime = None,
+        end: dt.datetime = None,
+        queries: Dict[str, str] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """Pull the minimal metric set we need for anomaly detection (or `queries`)."""
+        return {name: self.query_range(q, start, end) for name, q in (queries or DEFAULT_QUERIES).items()}
\ No newline at end of file
@@ -1,6 +1,16 @@
+import hashlib
+import json
+
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, List, Sequence, Tuple, Union
+
+from ml_pipeline.data import grouped_features, spectral, summary_features
+from ml_pipeline.data.matrix_decoder import MatrixResult
+from ml_pipeline.data.quantile_sketch import DDSketch
+
+# Labels identifying one workload, as the API's namespace scan groups series
+WORKLOAD_LABELS = ("namespace", "pod", "container")
 
 class FeatureEngineer:
     """
@@ -41,8 +51,83 @@ class FeatureEngineer:
             df[f"fft_{i}"] = v
         return df
 
-    def transform(self, raw: Dict[str, pd.DataFrame]) -> pd.DataFrame:
-        """Return single feature matrix."""
+    def __init__(
+        self,
+        step: str = "1m",
+        window: str = "5m",
+        lags: List[int] = None,
+        agg: str = "mean",
+        spectral_window: str = None,
+        spectral_hop: int = 1,
+        summary_rows: int = 60,
+        group_by: Sequence[str] = WORKLOAD_LABELS,
+    ):
+        """
+        spectral_window switches the grid/series FFT columns from one
+        whole-series spectrum to the spectrum of each row's trailing window
+        (recomputed every `spectral_hop` rows) and adds `fft_energy`.
+        summary_rows is the trailing window (in grid rows) of mode="summary",
+        and group_by the labels of the workloads it summarises.
+        """
+        self.step = step
+        self.window = window
+        self.lags = lags or [1, 2, 5, 10]
+        self.agg = agg
+        self.spectral_window = spectral_window
+        self.spectral_hop = spectral_hop
+        self.summary_rows = summary_rows
+        self.group_by = tuple(group_by)
+
+    def row_local(self, mode: str = "merge") -> bool:
+        """
+        Whether each row of `transform(raw, mode)` depends only on its trailing
+        samples, so rows computed in separate runs (with enough warm-up
+        history) agree. Whole-series FFT columns make grid/series output
+        run-dependent unless `spectral_window` is set, and so does a
+        `spectral_hop` above 1, since window ends are counted from the first
+        computed row; merge mode always is.
+        """
+        if mode == "summary":
+            return True
+        return mode in ("grid", "series") and self.spectral_window is not None and self.spectral_hop == 1
+
+    def fingerprint(self, mode: str = "merge") -> str:
+        """Short stable hash of every setting that shapes `transform(raw, mode)` output."""
+        config = {
+            "mode": mode,
+            "step": self.step,
+            "window": self.window,
+            "lags": list(self.lags),
+            "agg": self.agg,
+            "spectral_window": self.spectral_window,
+            "spectral_hop": self.spectral_hop,
+            "summary_rows": self.summary_rows,
+            "group_by": list(self.group_by),
+        }
+        return hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()[:12]
+
+    def _spectral_rows(self, step: float) -> int:
+        return max(2, int(pd.Timedelta(self.spectral_window).total_seconds() // step))
+
+    def transform(self, raw: Dict[str, pd.DataFrame], mode: str = "merge") -> pd.DataFrame:
+        """
+        Return single feature matrix.
+        mode="grid" aligns metrics on one time grid; mode="series" computes
+        features per series and stacks metrics with a `metric` column;
+        mode="summary" gives the detector API's per-metric summary columns,
+        one row per workload and grid step.
+        """
+        if mode == "grid":
+            return self.transform_grid(raw)
+        if mode == "summary":
+            return self.transform_summary(raw)
+        if mode == "series":
+            frames = [
+                self.transform_series(df).assign(metric=metric)
+                for metric, df in raw.items()
+                if len(df)
+            ]
+            return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
         engineered = []
         for metric, df in raw.items():
             if df.empty:
@@ -61,4 +146,274 @@ class FeatureEngineer:
         feat = engineered[0]
         for df in engineered[1:]:
             feat = feat.merge(df, on="timestamp", how="outer", suffixes=("", "_dup"))
-        return feat.sort_values("timestamp").reset_index(drop=True)
\ No newline at end of file
+        return feat.sort_values("timestamp").reset_index(drop=True)
+
+    def transform_series(
+        self,
+        data: Union[pd.DataFrame, MatrixResult],
+        label_cols: Sequence[str] = None,
+    ) -> pd.DataFrame:
+        """
+        Rolling stats, lags and FFT energy computed per series.
+
+        Rows are grouped by label fingerprint and sorted by (series, timestamp);
+        windows and lags never cross series boundaries. All series are
+        processed in the same vectorized passes. A MatrixResult is already
+        contiguous per series and is used as is.
+        """
+        if isinstance(data, MatrixResult):
+            df = data.to_frame()
+            starts = data.offsets[:-1][np.diff(data.offsets) > 0]
+        else:
+            df, starts = grouped_features.sort_by_series(data, label_cols)
+        if df.empty:
+            return df
+
+        step = pd.Timedelta(self.step).total_seconds()
+        window = max(1, int(pd.Timedelta(self.window).total_seconds() // step))
+        lag_rows = [max(1, int(lag * 60 // step)) for lag in self.lags]
+
+        values = df["value"].to_numpy()
+        matrix = grouped_features.series_features(values, starts, window, lag_rows)
+        columns = ["value_mean", "value_std", "value_min", "value_max"]
+        columns += [f"lag_{lag}m" for lag in self.lags] + ["fft_1", "fft_2", "fft_3"]
+        if self.spectral_window:
+            local = spectral.window_features(values, self._spectral_rows(step), self.spectral_hop, starts)
+            matrix = np.hstack((matrix[:, :-3], local))
+            columns.append("fft_energy")
+        return pd.concat([df, pd.DataFrame(matrix, columns=columns)], axis=1)
+
+    def sketch_series(
+        self,
+        df: pd.DataFrame,
+        label_cols: Sequence[str] = None,
+        relative_accuracy: float = 0.01,
+    ) -> pd.DataFrame:
+        """One row per series: its label columns and a mergeable `sketch` of its values."""
+        df, starts = grouped_features.sort_by_series(df, label_cols)
+        if df.empty:
+            return pd.DataFrame(columns=["sketch"])
+        if label_cols is None:
+            label_cols = [c for c in df.columns if c not in ("timestamp", "value")]
+        values = df["value"].to_numpy(dtype=np.float64)
+        bounds = np.append(starts, len(values))
+        out = df.iloc[starts][list(label_cols)].reset_index(drop=True)
+        out["sketch"] = [
+            DDSketch(relative_accuracy).add_many(values[lo:hi]) for lo, hi in zip(bounds[:-1], bounds[1:])
+        ]
+        return out
+
+    @staticmethod
+    def rollup_quantiles(
+        sketches: pd.DataFrame,
+        by: Sequence[str],
+        qs: Sequence[float] = (0.5, 0.95, 0.99),
+    ) -> pd.DataFrame:
+        """Merge per-series sketches by `by` labels and return quantile columns (p50, p95, ...)."""
+        rows = []
+        for key, group in sketches.groupby(list(by), sort=True, dropna=False, observed=True):
+            key = key if isinstance(key, tuple) else (key,)
+            merged = DDSketch.merged(list(group["sketch"]))
+            rows.append((*key, *merged.quantiles(qs)))
+        columns = list(by) + [f"p{q * 100:g}" for q in qs]
+        return pd.DataFrame(rows, columns=columns)
+
+    def _grid_span(self, frames: Dict[str, pd.DataFrame]) -> Tuple[float, float, int]:
+        """Start, step (seconds) and length of the `step` grid covering every frame."""
+        step = pd.Timedelta(self.step).total_seconds()
+        start = np.floor(min(df["timestamp"].min() for df in frames.values()) / step) * step
+        end = np.floor(max(df["timestamp"].max() for df in frames.values()) / step) * step
+        return start, step, int(round((end - start) / step)) + 1
+
+    def _grid_values(self, frames: Dict[str, pd.DataFrame]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Bin every metric onto one shared `step` grid.
+
+        Samples sharing a bin (duplicate timestamps, several series) are
+        combined with `agg` ("mean" or "sum"); empty bins are forward-filled.
+
+        Returns:
+            Tuple: (grid timestamps, metric -> gridded values)
+        """
+        start, step, n = self._grid_span(frames)
+
+        gridded = {}
+        for metric, df in frames.items():
+            bins = ((df["timestamp"].to_numpy(dtype=np.float64) - start) // step).astype(np.int64)
+            values = df["value"].to_numpy(dtype=np.float64)
+            ok = ~np.isnan(values)
+            sums = np.bincount(bins[ok], weights=values[ok], minlength=n)
+            counts = np.bincount(bins[ok], minlength=n)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                v = sums / counts if self.agg == "mean" else np.where(counts > 0, sums, np.nan)
+            gridded[metric] = _fill(v)
+        return start + np.arange(n) * step, gridded
+
+    def transform_grid(self, raw: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """
+        Bin every metric onto one shared `step` grid and build all features
+        in a single preallocated array (no merges).
+
+        Samples sharing a bin (duplicate timestamps, several series) are
+        combined with `agg` ("mean" or "sum"); empty bins are forward-filled.
+        Columns: timestamp, then per metric `{m}_raw`, `{m}_raw_mean/std/min/max`,
+        `{m}_lag_{k}m` and `{m}_fft_{1..3}` (over the gridded series, or per
+        trailing window plus `{m}_fft_energy` when `spectral_window` is set).
+        """
+        frames = {m: df for m, df in raw.items() if not df.empty}
+        if not frames:
+            return pd.DataFrame()
+
+        step = pd.Timedelta(self.step).total_seconds()
+        window = max(1, int(pd.Timedelta(self.window).total_seconds() // step))
+        lag_rows = [max(1, int(lag * 60 // step)) for lag in self.lags]
+        timestamps, gridded = self._grid_values(frames)
+        n = len(timestamps)
+
+        n_fft = len(spectral.SPECTRAL_FEATURES) if self.spectral_window else 3
+        per_metric = 5 + len(lag_rows) + n_fft
+        out = np.empty((n, 1 + per_metric * len(frames)), dtype=np.float64)
+        out[:, 0] = timestamps
+        columns = ["timestamp"]
+
+        for j, (metric, v) in enumerate(gridded.items()):
+            block = out[:, 1 + j * per_metric:1 + (j + 1) * per_metric]
+            block[:, 0] = v
+            block[:, 1:5] = _rolling(v, window)
+            idx = np.arange(n)
+            for k, rows in enumerate(lag_rows):
+                block[:, 5 + k] = v[np.maximum(idx - rows, 0)]
+            if self.spectral_window:
+                block[:, 5 + len(lag_rows):] = spectral.window_features(v, self._spectral_rows(step), self.spectral_hop)
+            else:
+                block[:, 5 + len(lag_rows):] = _fft_top3(v)
+
+            columns += [f"{metric}_raw"] + [f"{metric}_raw_{s}" for s in ("mean", "std", "min", "max")]
+            columns += [f"{metric}_lag_{lag}m" for lag in self.lags]
+            columns += [f"{metric}_{name}" for name in spectral.SPECTRAL_FEATURES[:n_fft]]
+
+        feat = pd.DataFrame(out, columns=columns)
+        feat["timestamp"] = feat["timestamp"].astype(np.int64)
+        return feat
+
+    def transform_summary(self, raw: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """
+        The detector API's features, one row per workload and full window.
+
+        Series are grouped into workloads by their `group_by` labels (missing
+        labels count as ""). Each series is binned on the `step` grid with
+        `agg`, and the series of one workload (e.g. one per network
+        interface) are summed, as the API's namespace scan does. Gaps are
+        forward-filled, but never before a workload's first or after its last
+        sample. Every grid row with `summary_rows` trailing samples of the
+        workload gets that window's `{m}_{feature}` columns
+        (`summary_features.SUMMARY_FEATURES`), the layout the API encodes a
+        request for that workload into. A metric without a full window at a
+        row is NaN.
+        Columns: the `group_by` labels, timestamp, then the summary columns
+        of each metric in turn; rows sorted by workload and time.
+        """
+        frames = {m: df for m, df in raw.items() if not df.empty}
+        if not frames:
+            return pd.DataFrame()
+
+        start, step, n = self._grid_span(frames)
+        keys = list(self.group_by) + ["timestamp"]
+        parts = []
+        for metric, df in frames.items():
+            workloads, grid = self._workload_grid(df, start, step, n)
+            rows, cols = np.nonzero(~np.isnan(grid))  # row-major: contiguous per workload
+            starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]]) if len(rows) else rows
+            ends, matrix = grouped_features.trailing_summary(grid[rows, cols], starts, self.summary_rows)
+
+            part = workloads.iloc[rows[ends]].reset_index(drop=True)
+            part["timestamp"] = (start + cols[ends] * step).astype(np.int64)
+            columns = [f"{metric}_{name}" for name in summary_features.SUMMARY_FEATURES]
+            parts.append(pd.concat([part, pd.DataFrame(matrix, columns=columns)], axis=1).set_index(keys))
+
+        return pd.concat(parts, axis=1, join="outer").sort_index().reset_index()
+
+    def _workload_grid(self, df: pd.DataFrame, start: float, step: float, n: int) -> Tuple[pd.DataFrame, np.ndarray]:
+        """
+        One metric's samples binned per workload on a shared `step` grid.
+
+        Returns:
+            Tuple: (workload labels, (n_workloads, n) values; NaN outside each
+            workload's first..last sample, forward-filled inside)
+        """
+        label_cols = [c for c in df.columns if c not in ("timestamp", "value")]
+        df, starts = grouped_features.sort_by_series(df, label_cols)
+        n_series = len(starts)
+        series = np.repeat(np.arange(n_series), np.diff(np.append(starts, len(df))))
+
+        # per-series bins, combined with `agg`
+        bins = ((df["timestamp"].to_numpy(dtype=np.float64) - start) // step).astype(np.int64)
+        values = df["value"].to_numpy(dtype=np.float64)
+        ok = ~np.isnan(values)
+        cells = series[ok] * n + bins[ok]
+        sums = np.bincount(cells, weights=values[ok], minlength=n_series * n).reshape(n_series, n)
+        counts = np.bincount(cells, minlength=n_series * n).reshape(n_series, n)
+        if self.agg == "mean":
+            sums = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+
+        # sum the series of each workload
+        labels = pd.DataFrame({
+            label: df[label].iloc[starts].fillna("").astype(str).to_numpy() if label in df.columns else ""
+            for label in self.group_by
+        }, index=range(n_series))
+        workload = labels.groupby(list(self.group_by), sort=True).ngroup().to_numpy()
+        n_workloads = workload.max() + 1 if n_series else 0
+        grid = np.zeros((n_workloads, n))
+        present = np.zeros((n_workloads, n), dtype=np.int64)
+        np.add.at(grid, workload, sums)
+        np.add.at(present, workload, counts)
+
+        # forward-fill gaps inside each workload's span, NaN outside it
+        has = present > 0
+        idx = np.where(has, np.arange(n), -1)
+        np.maximum.accumulate(idx, axis=1, out=idx)
+        last = n - 1 - np.argmax(has[:, ::-1], axis=1)
+        grid = np.take_along_axis(grid, np.maximum(idx, 0), axis=1)
+        grid[(idx < 0) | (np.arange(n) > last[:, None])] = np.nan
+        first_rows = np.unique(workload, return_index=True)[1]
+        return labels.iloc[first_rows].reset_index(drop=True), grid
+
+
+def _fill(v: np.ndarray) -> np.ndarray:
+    """Forward-fill NaNs, then back-fill any leading ones."""
+    mask = np.isnan(v)
+    if not mask.any():
+        return v
+    idx = np.where(mask, 0, np.arange(len(v)))
+    np.maximum.accumulate(idx, out=idx)
+    v = v[idx]
+    first = np.argmax(~np.isnan(v)) if (~np.isnan(v)).any() else len(v)
+    v[:first] = v[first] if first < len(v) else 0.0
+    return v
+
+
+def _rolling(v: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean/std/min/max with min_periods=1 (std back-filled like the merge path)."""
+    n = len(v)
+    shift = v.mean() if n else 0.0  # centre before cumsum to limit cancellation
+    c = v - shift
+    csum = np.concatenate(([0.0], np.cumsum(c)))
+    csq = np.concatenate(([0.0], np.cumsum(c * c)))
+    hi = np.arange(1, n + 1)
+    lo = np.maximum(hi - window, 0)
+    cnt = hi - lo
+    s, sq = csum[hi] - csum[lo], csq[hi] - csq[lo]
+    mean = s / cnt
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = np.sqrt(np.maximum(sq - s * mean, 0.0) / (cnt - 1))
+    mean += shift
+    std[cnt == 1] = np.nan
+    padded = np.concatenate((np.full(window - 1, np.nan), v))
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window)
+    return np.column_stack((mean, _fill(std), np.nanmin(windows, axis=1), np.nanmax(windows, axis=1)))
+
+
+def _fft_top3(vals: np.ndarray) -> np.ndarray:
+    if len(vals) < 10:
+        return np.zeros(3)
+    return np.sort(np.abs(np.fft.rfft(vals)))[-3:][::-1]
@@ -0,0 +1,229 @@
+"""
+Parquet feature store partitioned by metric and hour.
+
+Layout: `<root>/config=<fingerprint>/metric=<name>/hour=<YYYY-MM-DDTHH>/part.parquet`,
+one file per (metric, UTC hour) holding the FeatureEngineer rows whose
+timestamp falls in that hour. The fingerprint hashes the FeatureEngineer
+settings and the raw data source (how samples were fetched, which
+queries), so changing any of them starts a fresh set of partitions instead
+of reusing stale ones. `materialize` computes only the hours that have no
+partition yet, so repeated training runs over overlapping windows reuse
+earlier work. Reads project columns and memory-map the files.
+"""
+import datetime as dt
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Callable, List, Mapping, Optional, Sequence, Tuple, Union
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+import structlog
+
+from ml_pipeline.data.feature_engineering import FeatureEngineer
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = structlog.get_logger(__name__)
+
+HOUR = 3600
+_HOUR_FORMAT = "%Y-%m-%dT%H"
+
+# compute(start, end) -> feature rows with `timestamp` (epoch seconds) in [start, end)
+ComputeFn = Callable[[int, int], pd.DataFrame]
+
+
+def hour_floor(ts: float) -> int:
+    return int(ts // HOUR * HOUR)
+
+
+def hour_range(start: float, end: float) -> List[int]:
+    """Start of every UTC hour overlapping [start, end)."""
+    return list(range(hour_floor(start), int(end), HOUR)) if end > start else []
+
+
+def _runs(hours: Sequence[int]) -> List[Tuple[int, int]]:
+    """Group sorted hour starts into contiguous [start, end) runs."""
+    runs: List[Tuple[int, int]] = []
+    for hour in hours:
+        if runs and runs[-1][1] == hour:
+            runs[-1] = (runs[-1][0], hour + HOUR)
+        else:
+            runs.append((hour, hour + HOUR))
+    return runs
+
+
+class ParquetFeatureStore:
+    """Columnar feature partitions on a local (or mounted) filesystem."""
+
+    def __init__(self, root: Union[str, Path], compression: str = "zstd", config: Optional[str] = None):
+        """`config` keys the partitions (see `for_features`); None uses `root` directly."""
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required for the feature store (pip install .[feature-store])")
+        self.root = Path(root) / f"config={config}" if config else Path(root)
+        self.compression = compression
+
+    @classmethod
+    def for_features(
+        cls,
+        root: Union[str, Path],
+        engineer: FeatureEngineer,
+        mode: str,
+        source: Optional[Mapping[str, Any]] = None,
+        **kwargs,
+    ) -> "ParquetFeatureStore":
+        """
+        Store for `engineer.transform(raw, mode)` rows, keyed by its fingerprint.
+
+        `source` describes where the raw samples come from (JSON-serializable,
+        e.g. the fetch method and queries); it is hashed into the key too, so
+        rows built from differently defined inputs never mix.
+
+        Raises:
+            ValueError: If the rows are not row-local (e.g. whole-series FFT
+                columns or hopped spectral windows), since stored hours would
+                then depend on which run computed them
+        """
+        if not engineer.row_local(mode):
+            raise ValueError(
+                f"FeatureEngineer mode={mode!r} output depends on the whole computed range "
+                "(set spectral_window with spectral_hop=1, or use mode='summary') "
+                "and cannot be stored per hour"
+            )
+        config = engineer.fingerprint(mode)
+        if source is not None:
+            key = json.dumps({"features": config, "source": source}, sort_keys=True)
+            config = hashlib.sha1(key.encode()).hexdigest()[:12]
+        return cls(root, config=config, **kwargs)
+
+    def _metric_dir(self, metric: str) -> Path:
+        return self.root / f"metric={quote(metric, safe='')}"
+
+    def path(self, metric: str, hour: int) -> Path:
+        label = dt.datetime.fromtimestamp(hour, dt.timezone.utc).strftime(_HOUR_FORMAT)
+        return self._metric_dir(metric) / f"hour={label}" / "part.parquet"
+
+    def metrics(self) -> List[str]:
+        if not self.root.exists():
+            return []
+        return sorted(unquote(p.name[len("metric="):]) for p in self.root.glob("metric=*") if p.is_dir())
+
+    def hours(self, metric: str) -> List[int]:
+        """Hours stored for a metric, ascending."""
+        hours = []
+        for part in self._metric_dir(metric).glob("hour=*/part.parquet"):
+            stamp = dt.datetime.strptime(part.parent.name[len("hour="):], _HOUR_FORMAT)
+            hours.append(int(stamp.replace(tzinfo=dt.timezone.utc).timestamp()))
+        return sorted(hours)
+
+    def missing(self, metric: str, start: float, end: float) -> List[int]:
+        stored = set(self.hours(metric))
+        return [h for h in hour_range(start, end) if h not in stored]
+
+    def write(self, metric: str, hour: int, df: pd.DataFrame) -> Path:
+        """
+        Write one partition atomically (temp file + rename).
+
+        An empty frame still creates the partition, recording that the hour
+        was computed and had no data.
+        """
+        path = self.path(metric, hour)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+        tmp = path.with_name(f".{uuid.uuid4().hex}.tmp")
+        pq.write_table(table, tmp, compression=self.compression)
+        os.replace(tmp, path)
+        return path
+
+    def write_hours(self, metric: str, df: pd.DataFrame, hours: Sequence[int]) -> None:
+        """Split feature rows by hour and write one partition per given hour."""
+        ts = df["timestamp"].to_numpy(dtype=np.float64) if len(df) else np.empty(0)
+        row_hours = (ts // HOUR * HOUR).astype(np.int64)
+        for hour in hours:
+            self.write(metric, hour, df[row_hours == hour])
+
+    def read(
+        self,
+        metric: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Read a metric's stored rows in [start, end), memory-mapped.
+
+        Only partitions overlapping the range are opened, and only `columns`
+        (plus `timestamp`) are decoded.
+        """
+        hours = self.hours(metric)
+        if start is not None:
+            hours = [h for h in hours if h + HOUR > start]
+        if end is not None:
+            hours = [h for h in hours if h < end]
+        if columns is not None:
+            columns = ["timestamp"] + [c for c in columns if c != "timestamp"]
+
+        tables = []
+        for hour in hours:
+            path = self.path(metric, hour)
+            if pq.read_metadata(path).num_rows == 0:
+                continue  # hour computed earlier, no data
+            tables.append(pq.read_table(path, columns=columns, memory_map=True))
+        if not tables:
+            return pd.DataFrame(columns=columns or [])
+        df = pa.concat_tables(tables, promote_options="default").to_pandas()
+        keep = np.ones(len(df), dtype=bool)
+        if start is not None:
+            keep &= df["timestamp"].to_numpy() >= start
+        if end is not None:
+            keep &= df["timestamp"].to_numpy() < end
+        return df[keep].reset_index(drop=True)
+
+    def materialize(
+        self,
+        metric: str,
+        start: float,
+        end: float,
+        compute: ComputeFn,
+        complete_before: Optional[float] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Return features for [start, end), computing only hours not yet stored.
+
+        Missing hours are grouped into contiguous runs and `compute` is called
+        once per run. Hours ending after `complete_before` (default: now) are
+        still being scraped, so they are returned but not persisted.
+        """
+        complete_before = dt.datetime.now(dt.timezone.utc).timestamp() if complete_before is None else complete_before
+        missing = self.missing(metric, start, end)
+        fresh = []
+        for run_start, run_end in _runs(missing):
+            logger.info("Computing feature partitions", metric=metric, start=run_start, hours=(run_end - run_start) // HOUR)
+            df = compute(run_start, run_end)
+            if len(df):
+                ts = df["timestamp"].to_numpy(dtype=np.float64)
+                df = df[(ts >= run_start) & (ts < run_end)]
+            done = [h for h in range(run_start, run_end, HOUR) if h + HOUR <= complete_before]
+            self.write_hours(metric, df, done)
+            if len(done) < (run_end - run_start) // HOUR and len(df):
+                ts = df["timestamp"].to_numpy(dtype=np.float64)
+                fresh.append(df[ts >= run_start + len(done) * HOUR])
+        logger.info("Feature store", metric=metric, reused=len(hour_range(start, end)) - len(missing), computed=len(missing))
+
+        stored = self.read(metric, start, end, columns)
+        if not fresh:
+            return stored
+        if columns is not None:
+            keep = ["timestamp"] + [c for c in columns if c != "timestamp"]
+            fresh = [f[[c for c in keep if c in f.columns]] for f in fresh]
+        frames = [stored] + fresh if len(stored) else fresh
+        return pd.concat(frames, ignore_index=True).sort_values("timestamp").reset_index(drop=True)
@@ -0,0 +1,189 @@
+"""
+Per-series feature kernels over sorted, contiguous multi-series arrays.
+
+All series live in one values array ordered by (series, timestamp);
+`starts` marks where each series begins. Every kernel works on all series
+at once, clamping windows and lags at series boundaries so nothing leaks
+from one pod into the next.
+"""
+from typing import Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ml_pipeline.data.summary_features import SUMMARY_FEATURES, summarize_windows
+
+
+def group_starts(starts: np.ndarray, n: int) -> np.ndarray:
+    """Expand series start offsets into the start index of each element's series."""
+    starts = np.asarray(starts, dtype=np.int64)
+    lengths = np.diff(np.append(starts, n))
+    return np.repeat(starts, lengths)
+
+
+def sort_by_series(
+    df: pd.DataFrame,
+    label_cols: Sequence[str] = None,
+) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Order a long frame by (series fingerprint, timestamp).
+
+    Series identity is the tuple of label column values (everything except
+    timestamp/value by default).
+
+    Returns:
+        Tuple: (sorted frame with a fresh index, series start offsets)
+    """
+    if label_cols is None:
+        label_cols = [c for c in df.columns if c not in ("timestamp", "value")]
+    if label_cols:
+        gid = df.groupby(list(label_cols), sort=False, dropna=False, observed=True).ngroup().to_numpy()
+    else:
+        gid = np.zeros(len(df), dtype=np.int64)
+    order = np.lexsort((df["timestamp"].to_numpy(), gid))
+    gid = gid[order]
+    starts = np.flatnonzero(np.r_[True, gid[1:] != gid[:-1]]) if len(gid) else np.empty(0, np.int64)
+    return df.iloc[order].reset_index(drop=True), starts
+
+
+def rolling_stats(v: np.ndarray, gs: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing mean/std/min/max over `window` rows, clamped to each series.
+
+    NaN samples are skipped, as in pandas rolling with min_periods=1: sums
+    and valid counts come from cumulative sums (centred on each series'
+    first valid value) and min/max from a sparse table of NaN-ignoring
+    reductions queried with two overlapping power-of-two blocks. A window
+    with no valid sample gives NaN. std uses ddof=1 and, where a window has
+    fewer than two valid samples, is back-filled from the next row of the
+    same series (0 if there is none).
+
+    Returns:
+        np.ndarray: (n, 4) array of mean, std, min, max
+    """
+    n = len(v)
+    idx = np.arange(n)
+    lo = np.maximum(idx - window + 1, gs)
+    if n == 0:
+        return np.empty((0, 4))
+
+    valid = ~np.isnan(v)
+    starts = np.flatnonzero(np.r_[True, gs[1:] != gs[:-1]])
+    first_valid = np.minimum.reduceat(np.where(valid, idx, n - 1), starts)
+    shift = np.repeat(np.nan_to_num(v[first_valid]), np.diff(np.append(starts, n)))
+    c = np.where(valid, v - shift, 0.0)
+
+    csum = np.concatenate(([0.0], np.cumsum(c)))
+    csq = np.concatenate(([0.0], np.cumsum(c * c)))
+    ccnt = np.concatenate(([0], np.cumsum(valid)))
+    s, sq = csum[idx + 1] - csum[lo], csq[idx + 1] - csq[lo]
+    cnt = ccnt[idx + 1] - ccnt[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = s / cnt
+        std = np.sqrt(np.maximum(sq - s * mean, 0.0) / (cnt - 1))
+    mean += shift
+    std[cnt < 2] = np.nan
+    missing = np.isnan(std)
+    if missing.any():
+        # back-fill within the series from the next row that has a std
+        nxt = np.minimum.accumulate(np.where(missing, n, idx)[::-1])[::-1]
+        fill = missing & (nxt < n)
+        fill[fill] = gs[nxt[fill]] == gs[fill]
+        std[missing] = 0.0
+        std[fill] = std[nxt[fill]]
+
+    return np.column_stack((mean, std, _sparse_query(v, lo, idx, np.fmin), _sparse_query(v, lo, idx, np.fmax)))
+
+
+def _sparse_query(v: np.ndarray, lo: np.ndarray, hi: np.ndarray, fn) -> np.ndarray:
+    """fn-reduce v[lo..hi] (inclusive) for every row via a sparse table."""
+    n = len(v)
+    if n == 0:
+        return v.copy()
+    length = hi - lo + 1
+    levels = [v]
+    span = 1
+    while span * 2 <= length.max():
+        prev = levels[-1]
+        nxt = prev.copy()
+        nxt[:n - span] = fn(prev[:n - span], prev[span:])
+        levels.append(nxt)
+        span *= 2
+    table = np.stack(levels)
+    k = np.floor(np.log2(length)).astype(np.int64)
+    return fn(table[k, lo], table[k, hi - (1 << k) + 1])
+
+
+def lags(v: np.ndarray, gs: np.ndarray, rows: Sequence[int]) -> np.ndarray:
+    """Lagged values, clamped to the series' first value (bfill within series)."""
+    idx = np.arange(len(v))
+    return np.column_stack([v[np.maximum(idx - r, gs)] for r in rows]) if rows else np.empty((len(v), 0))
+
+
+def fft_top3(v: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """
+    Top-3 rFFT magnitudes per series, one batched rfft per distinct length.
+
+    Series shorter than 10 samples get zeros.
+
+    Returns:
+        np.ndarray: (n_series, 3)
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    lengths = np.diff(np.append(starts, len(v)))
+    out = np.zeros((len(starts), 3))
+    for length in np.unique(lengths[lengths >= 10]):
+        sel = np.flatnonzero(lengths == length)
+        block = v[starts[sel][:, None] + np.arange(length)]
+        mag = np.sort(np.abs(np.fft.rfft(block, axis=1)), axis=1)
+        top = mag[:, ::-1][:, :3]
+        out[sel, :top.shape[1]] = top
+    return out
+
+
+def trailing_summary(v: np.ndarray, starts: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    API summary features of every full trailing window inside one series.
+
+    Windows that would reach back into the previous series are skipped, so
+    a series contributes `len - window + 1` rows (none if it is shorter).
+
+    Returns:
+        Tuple: (index of each window's last row, (k, 9) matrix in
+        `SUMMARY_FEATURES` order)
+    """
+    if window < 1:
+        raise ValueError("window must be >= 1")
+    v = np.asarray(v, dtype=np.float64)
+    n = len(v)
+    if n < window:
+        return np.empty(0, dtype=np.int64), np.empty((0, len(SUMMARY_FEATURES)))
+    gs = group_starts(starts, n)
+    ends = np.arange(window - 1, n)
+    ends = ends[gs[ends] == gs[ends - window + 1]]
+    windows = np.lib.stride_tricks.sliding_window_view(v, window)[ends - window + 1]
+    return ends, summarize_windows(windows)
+
+
+def series_features(
+    v: np.ndarray,
+    starts: np.ndarray,
+    window: int,
+    lag_rows: Sequence[int],
+) -> np.ndarray:
+    """
+    All per-row features for sorted multi-series values.
+
+    Returns:
+        np.ndarray: (n, 4 + len(lag_rows) + 3) matrix of mean, std, min,
+        max, lags and the row's series FFT magnitudes
+    """
+    v = np.asarray(v, dtype=np.float64)
+    starts = np.asarray(starts, dtype=np.int64)
+    gs = group_starts(starts, len(v))
+    series_of_row = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(v))))
+    return np.hstack((
+        rolling_stats(v, gs, window),
+        lags(v, gs, lag_rows),
+        fft_top3(v, starts)[series_of_row],
+    ))
@@ -0,0 +1,187 @@
+import codecs
+import json
+import re
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# one or more complete [ts, "value"] pairs, optionally comma separated
+_PAIRS_RUN = re.compile(r'(?:\s*,?\s*\[\s*[^,\s\]]+\s*,\s*"[^"]*"\s*\])+')
+_PAIR = re.compile(r'\[\s*([^,\s\]]+)\s*,\s*"([^"]*)"\s*\]')
+_KEY = re.compile(r'\s*,?\s*"((?:[^"\\]|\\.)*)"\s*:\s*')
+_RESULT_KEY = re.compile(r'"result"\s*:\s*\[')
+
+_SEEK, _SERIES, _FIELDS, _VALUES, _DONE = range(5)
+
+
+class MatrixResult:
+    """
+    Prometheus matrix held as contiguous arrays.
+
+    Series i spans `timestamps[offsets[i]:offsets[i+1]]` (same for values);
+    `labels[i]` is its label set.
+    """
+
+    def __init__(self, timestamps: np.ndarray, values: np.ndarray, offsets: np.ndarray, labels: List[Dict[str, str]]):
+        self.timestamps = timestamps
+        self.values = values
+        self.offsets = offsets
+        self.labels = labels
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def series(self, i: int):
+        """Return (timestamps, values) views for series i."""
+        lo, hi = self.offsets[i], self.offsets[i + 1]
+        return self.timestamps[lo:hi], self.values[lo:hi]
+
+    def to_frame(self) -> pd.DataFrame:
+        """Long DataFrame: timestamp, value, one categorical column per label."""
+        counts = np.diff(self.offsets)
+        df = pd.DataFrame({"timestamp": self.timestamps.astype(np.int64), "value": self.values})
+        names = sorted({k for lbl in self.labels for k in lbl})
+        for name in names:
+            cats = pd.Categorical([lbl.get(name) for lbl in self.labels])
+            df[name] = pd.Categorical.from_codes(np.repeat(cats.codes, counts), cats.categories)
+        return df
+
+
+class MatrixDecoder:
+    """
+    Incremental decoder for `/api/v1/query_range` JSON responses.
+
+    Feed raw response chunks as they arrive; only the unparsed tail of the
+    current chunk is buffered, and samples go straight into float64 arrays
+    instead of per-sample Python lists.
+    """
+
+    def __init__(self):
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._head = ""
+        self._state = _SEEK
+        self._ts: List[np.ndarray] = []
+        self._vals: List[np.ndarray] = []
+        self._offsets: List[int] = [0]
+        self._labels: List[Dict[str, str]] = []
+        self._current_labels: Optional[Dict[str, str]] = None
+        self._n = 0
+
+    def feed(self, chunk: bytes) -> None:
+        self._buf += self._text.decode(chunk)
+        pos = self._parse(0)
+        self._buf = self._buf[pos:]
+
+    def close(self) -> MatrixResult:
+        self._buf += self._text.decode(b"", final=True)
+        self._buf = self._buf[self._parse(0):]
+        if self._state != _DONE:
+            raise ValueError(self._error_message())
+        ts = np.concatenate(self._ts) if self._ts else np.empty(0)
+        vals = np.concatenate(self._vals) if self._vals else np.empty(0)
+        return MatrixResult(ts, vals, np.asarray(self._offsets, dtype=np.int64), self._labels)
+
+    def _error_message(self) -> str:
+        text = (self._head + self._buf).strip()
+        try:
+            body = json.loads(text)
+            if body.get("status") == "error":
+                return f"Query failed: {body.get('error')}"
+        except ValueError:
+            pass
+        return "Incomplete or unsupported query_range response"
+
+    def _parse(self, pos: int) -> int:
+        buf = self._buf
+        while True:
+            if self._state == _SEEK:
+                m = _RESULT_KEY.search(buf, pos)
+                if m is None:
+                    # keep a short tail in case the key straddles chunks
+                    keep = max(pos, len(buf) - 16)
+                    self._head += buf[pos:keep]
+                    return keep
+                pos = m.end()
+                self._state = _SERIES
+
+            elif self._state == _SERIES:
+                pos = _skip(buf, pos, " \t\r\n,")
+                if pos >= len(buf):
+                    return pos
+                if buf[pos] == "]":
+                    self._state = _DONE
+                    return pos + 1
+                if buf[pos] != "{":
+                    raise ValueError(f"Unexpected character in result: {buf[pos]!r}")
+                pos += 1
+                self._current_labels = {}
+                self._state = _FIELDS
+
+            elif self._state == _FIELDS:
+                pos = _skip(buf, pos, " \t\r\n,")
+                if pos >= len(buf):
+                    return pos
+                if buf[pos] == "}":
+                    self._end_series()
+                    pos += 1
+                    self._state = _SERIES
+                    continue
+                m = _KEY.match(buf, pos)
+                if m is None:
+                    return pos
+                key = m.group(1)
+                if key == "values":
+                    vpos = _skip(buf, m.end(), " \t\r\n")
+                    if vpos >= len(buf):
+                        return pos
+                    pos = vpos + 1  # skip '['
+                    self._state = _VALUES
+                    continue
+                try:
+                    value, end = json.JSONDecoder().raw_decode(buf, m.end())
+                except ValueError:
+                    return pos  # value not complete yet
+                if key == "metric":
+                    self._current_labels = value
+                pos = end
+
+            elif self._state == _VALUES:
+                m = _PAIRS_RUN.match(buf, pos)
+                if m is not None:
+                    pairs = _PAIR.findall(buf, pos, m.end())
+                    arr = np.array(pairs).astype(np.float64)
+                    self._ts.append(arr[:, 0])
+                    self._vals.append(arr[:, 1])
+                    self._n += len(arr)
+                    pos = m.end()
+                pos = _skip(buf, pos, " \t\r\n")
+                if pos >= len(buf):
+                    return pos
+                if buf[pos] != "]":
+                    return pos  # partial pair, wait for more data
+                pos += 1
+                self._state = _FIELDS
+
+            else:
+                return len(buf)
+
+    def _end_series(self) -> None:
+        self._labels.append(self._current_labels or {})
+        self._offsets.append(self._n)
+        self._current_labels = None
+
+
+def _skip(buf: str, pos: int, chars: str) -> int:
+    while pos < len(buf) and buf[pos] in chars:
+        pos += 1
+    return pos
+
+
+def decode_matrix(chunks: Iterable[bytes]) -> MatrixResult:
+    """Decode an iterable of response chunks into a MatrixResult."""
+    decoder = MatrixDecoder()
+    for chunk in chunks:
+        decoder.feed(chunk)
+    return decoder.close()
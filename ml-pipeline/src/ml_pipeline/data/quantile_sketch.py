@@ -0,0 +1,176 @@
+import math
+from typing import Any, Dict, Iterable, Sequence
+
+import numpy as np
+
+
+class _Store:
+    """Dense bucket counts for consecutive keys, starting at `offset`."""
+
+    def __init__(self, max_bins: int):
+        self.max_bins = max_bins
+        self.counts = np.zeros(0, dtype=np.float64)
+        self.offset = 0
+
+    @property
+    def total(self) -> float:
+        return float(self.counts.sum())
+
+    def add(self, keys: np.ndarray, weights: np.ndarray = None) -> None:
+        if keys.size == 0:
+            return
+        lo, hi = int(keys.min()), int(keys.max())
+        self._extend(lo, hi)
+        keys = np.maximum(keys, self.offset)  # collapsed keys fold into the lowest bin
+        self.counts += np.bincount(keys - self.offset, weights=weights, minlength=len(self.counts))
+
+    def _extend(self, lo: int, hi: int) -> None:
+        if self.counts.size:
+            lo, hi = min(lo, self.offset), max(hi, self.offset + len(self.counts) - 1)
+        # keep the highest keys; lower ones collapse into the first kept bin
+        lo = max(lo, hi - self.max_bins + 1)
+        if self.counts.size and lo == self.offset and hi == self.offset + len(self.counts) - 1:
+            return
+        counts = np.zeros(hi - lo + 1, dtype=np.float64)
+        if self.counts.size:
+            old_keys = np.arange(self.offset, self.offset + len(self.counts))
+            np.add.at(counts, np.maximum(old_keys, lo) - lo, self.counts)
+        self.counts, self.offset = counts, lo
+
+    def merge(self, other: "_Store") -> None:
+        if other.counts.size:
+            keys = np.arange(other.offset, other.offset + len(other.counts))
+            nonzero = other.counts > 0
+            self.add(keys[nonzero], other.counts[nonzero])
+
+
+class DDSketch:
+    """
+    Mergeable quantile sketch with bounded relative error (DDSketch).
+
+    Values fall into logarithmic buckets `ceil(log_gamma(|x|))` with
+    `gamma = (1 + a) / (1 - a)`, so any quantile is returned within relative
+    accuracy `a` of a true sample at that rank. Sketches with the same
+    accuracy merge by adding bucket counts, so per-pod or per-window sketches
+    roll up into namespace/deployment percentiles without the raw samples.
+    Memory is bounded by `max_bins` buckets per sign; beyond that the lowest
+    buckets collapse (affecting only the smallest magnitudes).
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048, min_value: float = 1e-9):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be in (0, 1)")
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self._positive = _Store(max_bins)
+        self._negative = _Store(max_bins)
+        self.zero_count = 0.0
+        self.count = 0.0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _keys(self, magnitudes: np.ndarray) -> np.ndarray:
+        return np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+
+    def add(self, value: float) -> None:
+        self.add_many(np.array([value], dtype=np.float64))
+
+    def add_many(self, values: Iterable[float]) -> "DDSketch":
+        """Add many values in one vectorized pass (NaNs are ignored)."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+        pos = values > self.min_value
+        neg = values < -self.min_value
+        self._positive.add(self._keys(values[pos]))
+        self._negative.add(self._keys(-values[neg]))
+        self.zero_count += float(values.size - pos.sum() - neg.sum())
+        self.count += float(values.size)
+        self.sum += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        return self
+
+    def merge(self, other: "DDSketch") -> "DDSketch":
+        """Fold another sketch with the same accuracy into this one."""
+        if not math.isclose(self.gamma, other.gamma):
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        self._positive.merge(other._positive)
+        self._negative.merge(other._negative)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @classmethod
+    def merged(cls, sketches: Sequence["DDSketch"]) -> "DDSketch":
+        """Return a new sketch combining all given sketches."""
+        if not sketches:
+            raise ValueError("No sketches to merge")
+        first = sketches[0]
+        out = cls(first.relative_accuracy, first.max_bins, first.min_value)
+        for sketch in sketches:
+            out.merge(sketch)
+        return out
+
+    def _value(self, key: np.ndarray) -> np.ndarray:
+        return 2.0 * np.power(self.gamma, key) / (self.gamma + 1.0)
+
+    def quantiles(self, qs: Sequence[float]) -> np.ndarray:
+        """
+        Quantiles for every q in [0, 1] from one cumulative pass.
+
+        Ranks follow numpy's default interpolation (`q * (count - 1)`); the
+        bucket holding that rank answers, clamped to the observed min/max.
+        """
+        if self.count == 0:
+            raise ValueError("Sketch is empty")
+        qs = np.asarray(qs, dtype=np.float64)
+        ranks = qs * (self.count - 1)
+
+        neg, pos = self._negative, self._positive
+        # ascending value order: negative keys high->low, zeros, positive keys low->high
+        neg_counts = neg.counts[::-1]
+        neg_keys = np.arange(neg.offset, neg.offset + len(neg.counts))[::-1]
+        pos_keys = np.arange(pos.offset, pos.offset + len(pos.counts))
+        counts = np.concatenate((neg_counts, [self.zero_count], pos.counts))
+        values = np.concatenate((-self._value(neg_keys), [0.0], self._value(pos_keys)))
+
+        idx = np.searchsorted(np.cumsum(counts), ranks, side="right")
+        idx = np.minimum(idx, len(values) - 1)
+        return np.clip(values[idx], self.min, self.max)
+
+    def quantile(self, q: float) -> float:
+        return float(self.quantiles([q])[0])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable representation (e.g. to ship per-pod sketches)."""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_bins": self.max_bins,
+            "min_value": self.min_value,
+            "positive": [self._positive.offset, self._positive.counts.tolist()],
+            "negative": [self._negative.offset, self._negative.counts.tolist()],
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DDSketch":
+        sketch = cls(data["relative_accuracy"], data["max_bins"], data["min_value"])
+        for store, (offset, counts) in ((sketch._positive, data["positive"]), (sketch._negative, data["negative"])):
+            store.offset = int(offset)
+            store.counts = np.asarray(counts, dtype=np.float64)
+        for name in ("zero_count", "count", "sum", "min", "max"):
+            setattr(sketch, name, float(data[name]))
+        return sketch
@@ -0,0 +1,469 @@
+"""
+Prometheus remote-read protocol (prompb) without generated protobuf code.
+
+Covers what the collector needs: encoding a ReadRequest, splitting a
+streamed `ChunkedReadResponse` body into CRC-checked frames, decoding XOR
+chunks into numpy arrays, and the non-streamed SAMPLES fallback.
+Snappy and CRC32C use native bindings when installed (extra
+`remote-read`) and pure-Python fallbacks otherwise.
+"""
+import json
+import re
+import struct
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from ml_pipeline.data.matrix_decoder import MatrixResult
+
+try:
+    import snappy
+    SNAPPY_AVAILABLE = True
+except ImportError:
+    SNAPPY_AVAILABLE = False
+
+try:
+    import crc32c as _crc32c
+    CRC32C_AVAILABLE = True
+except ImportError:
+    CRC32C_AVAILABLE = False
+
+STREAMED_CONTENT_TYPE = "application/x-streamed-protobuf; proto=prometheus.ChunkedReadResponse"
+
+# prompb enums
+RESPONSE_SAMPLES = 0
+RESPONSE_STREAMED_XOR_CHUNKS = 1
+CHUNK_XOR = 1
+MATCHER_TYPES = {"=": 0, "!=": 1, "=~": 2, "!~": 3}
+
+_SELECTOR = re.compile(r"^\s*([a-zA-Z_:][a-zA-Z0-9_:]*)?\s*(?:\{(.*)\})?\s*$", re.S)
+_MATCHER = re.compile(r'\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*(=~|!~|!=|=)\s*"((?:[^"\\]|\\.)*)"\s*(?:,|$)')
+
+Matcher = Tuple[int, str, str]
+
+
+def parse_selector(selector: str) -> List[Matcher]:
+    """Parse `name{label="v", other=~"re"}` into (type, name, value) matchers."""
+    m = _SELECTOR.match(selector)
+    if m is None or not (m.group(1) or m.group(2)):
+        raise ValueError(f"Invalid series selector: {selector!r}")
+    matchers = []
+    if m.group(1):
+        matchers.append((MATCHER_TYPES["="], "__name__", m.group(1)))
+    body, pos = (m.group(2) or "").strip(), 0
+    while pos < len(body):
+        mm = _MATCHER.match(body, pos)
+        if mm is None:
+            raise ValueError(f"Invalid label matcher in {selector!r} at {body[pos:]!r}")
+        name, op, value = mm.groups()
+        matchers.append((MATCHER_TYPES[op], name, json.loads(f'"{value}"')))
+        pos = mm.end()
+    return matchers
+
+
+def _uvarint(n: int) -> bytes:
+    out = bytearray()
+    n &= (1 << 64) - 1
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+def _read_uvarint(buf, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        if pos >= len(buf):
+            raise ValueError("Truncated varint")
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _int64(n: int) -> int:
+    return n - (1 << 64) if n >= 1 << 63 else n
+
+
+def _field_varint(field: int, n: int) -> bytes:
+    return _uvarint(field << 3) + _uvarint(n)
+
+
+def _field_bytes(field: int, data: bytes) -> bytes:
+    return _uvarint(field << 3 | 2) + _uvarint(len(data)) + data
+
+
+def _fields(buf) -> Iterator[Tuple[int, object]]:
+    """Yield (field number, value) for a message; length-delimited values are memoryviews."""
+    buf = memoryview(buf)
+    pos, end = 0, len(buf)
+    while pos < end:
+        key, pos = _read_uvarint(buf, pos)
+        field, wire = key >> 3, key & 7
+        if wire == 0:
+            value, pos = _read_uvarint(buf, pos)
+        elif wire == 1:
+            value, pos = buf[pos:pos + 8], pos + 8
+        elif wire == 2:
+            n, pos = _read_uvarint(buf, pos)
+            value, pos = buf[pos:pos + n], pos + n
+        elif wire == 5:
+            value, pos = buf[pos:pos + 4], pos + 4
+        else:
+            raise ValueError(f"Unsupported protobuf wire type {wire}")
+        yield field, value
+
+
+def encode_read_request(
+    queries: Sequence[Tuple[int, int, Sequence[Matcher]]],
+    streamed: bool = True,
+) -> bytes:
+    """Encode a ReadRequest for [(start_ms, end_ms, matchers)] (uncompressed)."""
+    out = bytearray()
+    for start_ms, end_ms, matchers in queries:
+        query = _field_varint(1, start_ms) + _field_varint(2, end_ms)
+        for kind, name, value in matchers:
+            query += _field_bytes(
+                3, _field_varint(1, kind) + _field_bytes(2, name.encode()) + _field_bytes(3, value.encode())
+            )
+        out += _field_bytes(1, query)
+    types = [RESPONSE_STREAMED_XOR_CHUNKS, RESPONSE_SAMPLES] if streamed else [RESPONSE_SAMPLES]
+    out += _field_bytes(2, b"".join(_uvarint(t) for t in types))
+    return bytes(out)
+
+
+def _labels(raw_labels: Iterable[memoryview]) -> Dict[str, str]:
+    labels = {}
+    for raw in raw_labels:
+        name = value = ""
+        for field, v in _fields(raw):
+            if field == 1:
+                name = bytes(v).decode()
+            elif field == 2:
+                value = bytes(v).decode()
+        labels[name] = value
+    return labels
+
+
+def snappy_compress(data: bytes) -> bytes:
+    """Snappy block-compress; the fallback emits literal-only (valid) blocks."""
+    if SNAPPY_AVAILABLE:
+        return snappy.compress(data)
+    out = bytearray(_uvarint(len(data)))
+    for i in range(0, len(data), 65536):
+        block = data[i:i + 65536]
+        n = len(block) - 1
+        if n < 60:
+            out.append(n << 2)
+        elif n < 256:
+            out += bytes((60 << 2, n))
+        else:
+            out.append(61 << 2)
+            out += n.to_bytes(2, "little")
+        out += block
+    return bytes(out)
+
+
+def snappy_decompress(data: bytes) -> bytes:
+    """Decompress a snappy block."""
+    if SNAPPY_AVAILABLE:
+        return snappy.uncompress(data)
+    length, pos = _read_uvarint(data, 0)
+    out = bytearray()
+    while pos < len(data):
+        tag = data[pos]
+        pos += 1
+        kind = tag & 3
+        if kind == 0:
+            n = tag >> 2
+            if n >= 60:
+                extra = n - 59
+                n = int.from_bytes(data[pos:pos + extra], "little")
+                pos += extra
+            n += 1
+            out += data[pos:pos + n]
+            pos += n
+            continue
+        if kind == 1:
+            n = ((tag >> 2) & 7) + 4
+            offset = ((tag >> 5) << 8) | data[pos]
+            pos += 1
+        elif kind == 2:
+            n = (tag >> 2) + 1
+            offset = int.from_bytes(data[pos:pos + 2], "little")
+            pos += 2
+        else:
+            n = (tag >> 2) + 1
+            offset = int.from_bytes(data[pos:pos + 4], "little")
+            pos += 4
+        if offset == 0 or offset > len(out):
+            raise ValueError("Invalid snappy copy offset")
+        start = len(out) - offset
+        if offset >= n:
+            out += out[start:start + n]
+        else:
+            for i in range(n):
+                out.append(out[start + i])
+    if len(out) != length:
+        raise ValueError("Snappy length mismatch")
+    return bytes(out)
+
+
+def _crc32c_table() -> List[int]:
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x82F63B78 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+_CRC32C_TABLE = _crc32c_table()
+
+
+def crc32c(data: bytes) -> int:
+    """CRC32C (Castagnoli) checksum."""
+    if CRC32C_AVAILABLE:
+        return _crc32c.crc32c(data)
+    crc = 0xFFFFFFFF
+    table = _CRC32C_TABLE
+    for b in data:
+        crc = table[(crc ^ b) & 0xFF] ^ (crc >> 8)
+    return crc ^ 0xFFFFFFFF
+
+
+def iter_frames(chunks: Iterable[bytes], verify: bool = True) -> Iterator[bytes]:
+    """
+    Split a streamed body into messages.
+
+    Each frame is `uvarint(len) | crc32c(message) as big-endian uint32 | message`.
+    Frames may straddle network chunks; only the unconsumed bytes are kept.
+    """
+    buf = bytearray()
+    for chunk in chunks:
+        buf += chunk
+        pos = 0
+        while True:
+            try:
+                size, header_end = _read_uvarint(buf, pos)
+            except ValueError:
+                break
+            end = header_end + 4 + size
+            if end > len(buf):
+                break
+            checksum = int.from_bytes(buf[header_end:header_end + 4], "big")
+            message = bytes(buf[header_end + 4:end])
+            if verify and crc32c(message) != checksum:
+                raise ValueError("Remote-read frame checksum mismatch")
+            yield message
+            pos = end
+        del buf[:pos]
+    if buf:
+        raise ValueError("Truncated remote-read frame")
+
+
+class _BitReader:
+    __slots__ = ("data", "pos", "limit")
+
+    def __init__(self, data: bytes, pos: int = 0):
+        self.data = data
+        self.pos = pos
+        self.limit = len(data) * 8
+
+    def read(self, n: int) -> int:
+        pos = self.pos
+        if pos + n > self.limit:
+            raise ValueError("Truncated XOR chunk")
+        start, end = pos >> 3, (pos + n + 7) >> 3
+        word = int.from_bytes(self.data[start:end], "big")
+        self.pos = pos + n
+        return (word >> ((end << 3) - pos - n)) & ((1 << n) - 1)
+
+    def read_uvarint(self) -> int:
+        result = shift = 0
+        while True:
+            b = self.read(8)
+            result |= (b & 0x7F) << shift
+            if b < 0x80:
+                return result
+            shift += 7
+
+    def read_varint(self) -> int:
+        ux = self.read_uvarint()
+        return ~(ux >> 1) if ux & 1 else ux >> 1
+
+
+# delta-of-delta prefix -> bit width, as written by Prometheus' XOR appender
+_DOD_WIDTHS = {0b10: 14, 0b110: 17, 0b1110: 20}
+
+
+def decode_xor_chunk(data: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decode a Prometheus XOR (Gorilla) chunk.
+
+    Returns:
+        Tuple: (timestamps in ms as int64, values as float64)
+    """
+    data = bytes(data)
+    num = int.from_bytes(data[:2], "big")
+    timestamps = np.empty(num, dtype=np.int64)
+    bits = np.empty(num, dtype=np.uint64)
+    if num == 0:
+        return timestamps, bits.view(np.float64)
+
+    reader = _BitReader(data, 16)
+    read = reader.read
+    t = reader.read_varint()
+    v = read(64)
+    timestamps[0], bits[0] = t, v
+    delta = leading = trailing = 0
+
+    for i in range(1, num):
+        if i == 1:
+            delta = reader.read_uvarint()
+        else:
+            prefix = 0
+            for _ in range(4):
+                prefix <<= 1
+                if not read(1):
+                    break
+                prefix |= 1
+            if prefix == 0b1111:
+                delta += _int64(read(64))
+            elif prefix:
+                width = _DOD_WIDTHS[prefix]
+                dod = read(width)
+                if dod > 1 << (width - 1):
+                    dod -= 1 << width
+                delta += dod
+        t += delta
+
+        if read(1):
+            if read(1):
+                leading = read(5)
+                significant = read(6) or 64
+                trailing = 64 - leading - significant
+            v ^= read(64 - leading - trailing) << trailing
+
+        timestamps[i], bits[i] = t, v
+
+    return timestamps, bits.view(np.float64)
+
+
+class _SeriesAccumulator:
+    """Collects per-query series pieces in arrival order and builds MatrixResults."""
+
+    def __init__(self, bounds: Sequence[Tuple[int, int]]):
+        self.bounds = bounds
+        self.series: List["OrderedDict[Tuple, Tuple[Dict[str, str], List, List]]"] = [
+            OrderedDict() for _ in bounds
+        ]
+
+    def add(self, index: int, labels: Dict[str, str], timestamps: np.ndarray, values: np.ndarray) -> None:
+        start_ms, end_ms = self.bounds[index]
+        keep = (timestamps >= start_ms) & (timestamps <= end_ms)
+        entry = self.series[index].setdefault(tuple(sorted(labels.items())), (labels, [], []))
+        entry[1].append(timestamps[keep])
+        entry[2].append(values[keep])
+
+    def results(self) -> List[MatrixResult]:
+        results = []
+        for by_labels in self.series:
+            labels, ts_parts, val_parts, offsets = [], [], [], [0]
+            for series_labels, ts, vals in by_labels.values():
+                ts, vals = np.concatenate(ts), np.concatenate(vals)
+                if ts.size == 0:
+                    continue
+                labels.append(series_labels)
+                ts_parts.append(ts)
+                val_parts.append(vals)
+                offsets.append(offsets[-1] + ts.size)
+            results.append(MatrixResult(
+                np.concatenate(ts_parts) / 1000.0 if ts_parts else np.empty(0),
+                np.concatenate(val_parts) if val_parts else np.empty(0),
+                np.asarray(offsets, dtype=np.int64),
+                labels,
+            ))
+        return results
+
+
+def decode_chunked_response(
+    frames: Iterable[bytes],
+    bounds: Sequence[Tuple[int, int]],
+) -> List[MatrixResult]:
+    """
+    Decode ChunkedReadResponse frames into one MatrixResult per query.
+
+    Args:
+        frames: Frame messages from `iter_frames`
+        bounds: (start_ms, end_ms) per query; chunks are trimmed to them
+
+    Returns:
+        List: MatrixResult per query, timestamps in seconds
+    """
+    acc = _SeriesAccumulator(bounds)
+    for message in frames:
+        query_index, chunked = 0, []
+        for field, value in _fields(message):
+            if field == 1:
+                chunked.append(value)
+            elif field == 2:
+                query_index = value
+        for raw_series in chunked:
+            raw_labels, chunks = [], []
+            for field, value in _fields(raw_series):
+                if field == 1:
+                    raw_labels.append(value)
+                elif field == 2:
+                    chunks.append(value)
+            labels = _labels(raw_labels)
+            for raw_chunk in chunks:
+                encoding, data = 0, b""
+                for field, value in _fields(raw_chunk):
+                    if field == 3:
+                        encoding = value
+                    elif field == 4:
+                        data = value
+                if encoding != CHUNK_XOR:
+                    raise ValueError(f"Unsupported chunk encoding {encoding}")
+                acc.add(query_index, labels, *decode_xor_chunk(data))
+    return acc.results()
+
+
+def decode_samples_response(body: bytes, bounds: Sequence[Tuple[int, int]]) -> List[MatrixResult]:
+    """Decode a snappy-compressed (non-streamed) ReadResponse."""
+    acc = _SeriesAccumulator(bounds)
+    message = snappy_decompress(body)
+    index = 0
+    for field, result in _fields(message):
+        if field != 1:
+            continue
+        for field, raw_series in _fields(result):
+            if field != 1:
+                continue
+            raw_labels, timestamps, values = [], [], []
+            for field, value in _fields(raw_series):
+                if field == 1:
+                    raw_labels.append(value)
+                elif field == 2:
+                    sample_value, sample_ts = 0.0, 0
+                    for f, v in _fields(value):
+                        if f == 1:
+                            sample_value = struct.unpack("<d", v)[0]
+                        elif f == 2:
+                            sample_ts = _int64(v)
+                    values.append(sample_value)
+                    timestamps.append(sample_ts)
+            acc.add(
+                index,
+                _labels(raw_labels),
+                np.asarray(timestamps, dtype=np.int64),
+                np.asarray(values, dtype=np.float64),
+            )
+        index += 1
+    return acc.results()
@@ -0,0 +1,166 @@
+"""
+Time-local spectral features.
+
+Batch mode takes the rFFT of trailing windows (every `hop` samples) in one
+batched call, so each row gets the spectrum of its recent past instead of
+the whole series. Streaming mode tracks a few DFT bins per sample with a
+sliding DFT (O(bins) per sample), and `goertzel` evaluates single bins over
+many windows without a full FFT.
+"""
+import numpy as np
+
+SPECTRAL_FEATURES = ("fft_1", "fft_2", "fft_3", "fft_energy")
+
+
+def windowed_spectra(v: np.ndarray, window: int, hop: int = 1) -> np.ndarray:
+    """
+    rFFT magnitudes of every `hop`-th window of `window` samples.
+
+    Windows are strided views (no copy) passed to a single batched rfft.
+
+    Returns:
+        np.ndarray: (n_windows, window // 2 + 1); window i starts at i * hop
+    """
+    v = np.asarray(v, dtype=np.float64)
+    if len(v) < window:
+        return np.empty((0, window // 2 + 1))
+    frames = np.lib.stride_tricks.sliding_window_view(v, window)[::hop]
+    return np.abs(np.fft.rfft(frames, axis=1))
+
+
+def summarize(mag: np.ndarray, window: int) -> np.ndarray:
+    """
+    Top-3 magnitudes and AC energy per spectrum row.
+
+    Energy is the one-sided power without the DC bin, scaled so that it
+    equals the sum of squared deviations from the window mean (Parseval).
+
+    Returns:
+        np.ndarray: (n, 4) in `SPECTRAL_FEATURES` order
+    """
+    top = np.zeros((len(mag), 3))
+    ordered = -np.sort(-mag, axis=1)[:, :3]
+    top[:, :ordered.shape[1]] = ordered
+    weights = np.full(mag.shape[1], 2.0)
+    weights[0] = 0.0
+    if window % 2 == 0:
+        weights[-1] = 1.0  # the Nyquist bin has no mirror
+    energy = (mag ** 2) @ weights / window
+    return np.column_stack((top, energy))
+
+
+def window_features(
+    v: np.ndarray,
+    window: int,
+    hop: int = 1,
+    starts: np.ndarray = None,
+) -> np.ndarray:
+    """
+    Per-row spectral features from the latest trailing window of the row's series.
+
+    Window ends sit at `start + window - 1 + k * hop`; each row uses the last
+    end at or before it, and rows before a series' first full window reuse
+    that window (back-fill). Series shorter than `window` get zeros. Only the
+    distinct windows are transformed, in one batched rfft.
+
+    Args:
+        v: Values, contiguous per series
+        window: Samples per window
+        hop: Samples between consecutive windows
+        starts: Series start offsets (default: one series)
+
+    Returns:
+        np.ndarray: (n, 4) in `SPECTRAL_FEATURES` order
+    """
+    v = np.asarray(v, dtype=np.float64)
+    n = len(v)
+    if window < 2 or hop < 1:
+        raise ValueError("window must be >= 2 and hop >= 1")
+    starts = np.zeros(1, dtype=np.int64) if starts is None else np.asarray(starts, dtype=np.int64)
+    out = np.zeros((n, len(SPECTRAL_FEATURES)))
+    if n == 0:
+        return out
+
+    lengths = np.diff(np.append(starts, n))
+    gs = np.repeat(starts, lengths)
+    stops = np.repeat(starts + lengths, lengths)
+    first_end = gs + window - 1
+    ends = first_end + np.maximum(np.arange(n) - first_end, 0) // hop * hop
+    valid = first_end < stops
+    if not valid.any():
+        return out
+
+    unique_ends, inverse = np.unique(ends[valid], return_inverse=True)
+    frames = v[unique_ends[:, None] - window + 1 + np.arange(window)]
+    out[valid] = summarize(np.abs(np.fft.rfft(frames, axis=1)), window)[inverse]
+    return out
+
+
+def goertzel(frames: np.ndarray, k: float) -> np.ndarray:
+    """
+    Complex DFT bin `k` of each row, matching `np.fft.rfft(frames)[:, k]`.
+
+    Runs the Goertzel recurrence over the window length, vectorized across
+    rows; cheaper than a full FFT when only a few bins are needed.
+    """
+    frames = np.atleast_2d(np.asarray(frames, dtype=np.float64))
+    window = frames.shape[1]
+    omega = 2.0 * np.pi * k / window
+    coeff = 2.0 * np.cos(omega)
+    s1 = np.zeros(len(frames))
+    s2 = np.zeros(len(frames))
+    for x in frames.T:
+        s1, s2 = x + coeff * s1 - s2, s1
+    # y[N-1] = s1 - e^{-j omega} s2, rotated back so bin phase matches the DFT
+    return (s1 - np.exp(-1j * omega) * s2) * np.exp(-1j * omega * (window - 1))
+
+
+class SlidingDFT:
+    """
+    Streaming DFT bins over the last `window` samples.
+
+    Each sample updates the tracked bins with
+    `X_k <- (X_k - x_oldest + x_new) * exp(2j*pi*k/window)`, O(len(bins)) per
+    sample regardless of window size. Bins are recomputed exactly every 64
+    windows to bound rounding drift. Before the window fills, the missing
+    samples count as zeros.
+    """
+
+    def __init__(self, window: int, bins=(1, 2, 3)):
+        if window < 2:
+            raise ValueError("window must be >= 2")
+        self.window = window
+        self.bins = np.asarray(bins, dtype=np.float64)
+        self._twiddle = np.exp(2j * np.pi * self.bins / window)
+        self._buffer = np.zeros(window)
+        self._pos = 0
+        self._count = 0
+        self.values = np.zeros(len(self.bins), dtype=np.complex128)
+
+    @property
+    def full(self) -> bool:
+        return self._count >= self.window
+
+    def update(self, x: float) -> np.ndarray:
+        """Push one sample and return the current complex bins."""
+        x = float(x)
+        oldest = self._buffer[self._pos]
+        self._buffer[self._pos] = x
+        self._pos = (self._pos + 1) % self.window
+        self._count += 1
+        self.values = (self.values - oldest + x) * self._twiddle
+        if self._count % (self.window * 64) == 0:
+            self._refresh()
+        return self.values
+
+    def _refresh(self) -> None:
+        ordered = np.roll(self._buffer, -self._pos)[None, :]
+        self.values = np.array([goertzel(ordered, k)[0] for k in self.bins])
+
+    def magnitudes(self) -> np.ndarray:
+        return np.abs(self.values)
+
+    def power(self) -> float:
+        """One-sided power of the tracked bins, on the same scale as `fft_energy`."""
+        weights = np.where(self.bins == 0, 0.0, np.where(2 * self.bins == self.window, 1.0, 2.0))
+        return float(weights @ np.abs(self.values) ** 2 / self.window)
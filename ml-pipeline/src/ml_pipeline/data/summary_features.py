@@ -0,0 +1,67 @@
+"""
+Trailing-window summary features in the detector API's column layout.
+
+The API scores a workload from the raw samples a request carries, each
+metric summarised into `{metric}_{feature}` columns (see
+`anomaly_detector.metrics_processor.summary_features`). Training builds the
+same statistics from trailing windows of each workload's own series (see
+`FeatureEngineer.transform_summary`).
+"""
+import numpy as np
+
+# Same names and order as the API's SUMMARY_FEATURES
+SUMMARY_FEATURES = ("mean", "std", "min", "max", "median", "current", "rate", "p95", "p99")
+
+
+def trailing_summary(v: np.ndarray, window: int) -> np.ndarray:
+    """
+    Summary features of every full trailing window of `window` samples.
+
+    Row i summarises `v[i:i + window]` (see `summarize_windows`).
+
+    Returns:
+        np.ndarray: (len(v) - window + 1, 9) in `SUMMARY_FEATURES` order
+    """
+    if window < 1:
+        raise ValueError("window must be >= 1")
+    v = np.asarray(v, dtype=np.float64)
+    if len(v) < window:
+        return np.empty((0, len(SUMMARY_FEATURES)))
+    return summarize_windows(np.lib.stride_tricks.sliding_window_view(v, window))
+
+
+def summarize_windows(windows: np.ndarray) -> np.ndarray:
+    """
+    Summary features of each row of a (n, window) array of samples.
+
+    Population std, numpy's linear percentile interpolation, `current` the
+    window's last sample and `rate` its last difference, all as the API
+    computes them.
+
+    Returns:
+        np.ndarray: (n, 9) in `SUMMARY_FEATURES` order
+    """
+    windows = np.asarray(windows, dtype=np.float64)
+    window = windows.shape[1]
+    ordered = np.sort(windows, axis=1)
+
+    def percentile(q: float) -> np.ndarray:
+        position = q * (window - 1)
+        lower = int(np.floor(position))
+        upper = min(lower + 1, window - 1)
+        return ordered[:, lower] + (ordered[:, upper] - ordered[:, lower]) * (position - lower)
+
+    mean = windows.mean(axis=1)
+    current = windows[:, -1]
+    rate = current - windows[:, -2] if window > 1 else np.zeros(len(current))
+    return np.column_stack((
+        mean,
+        np.sqrt(((windows - mean[:, None]) ** 2).mean(axis=1)),
+        ordered[:, 0],
+        ordered[:, -1],
+        percentile(0.5),
+        current,
+        rate,
+        percentile(0.95),
+        percentile(0.99),
+    ))
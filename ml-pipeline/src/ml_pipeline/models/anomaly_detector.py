@@ -1,12 +1,19 @@
+from typing import Optional, Tuple
+
 import joblib
 import numpy as np
 import pandas as pd
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 
+from ml_pipeline.models.forest_compiler import CompiledForest, compile_forest
+
 class IsolationForestDetector:
     """Unsupervised point-anomaly detector."""
 
+    # each row is scored on its own, so per-row results can be cached
+    row_independent = True
+
     def __init__(self, contamination: float = 0.01, n_estimators: int = 300, random_state=42):
         self.scaler = StandardScaler()
         self.model = IsolationForest(
@@ -15,19 +22,35 @@ class IsolationForestDetector:
             random_state=random_state,
             n_jobs=-1,
         )
+        self.compiled = None
+        self.feature_names = None
 
     def fit(self, X: pd.DataFrame):
-        X_scaled = self.scaler.fit_transform(X)
+        self.feature_names = list(X.columns) if isinstance(X, pd.DataFrame) else None
+        # fit on a plain array so schema-encoded float32 rows need no DataFrame
+        X_scaled = self.scaler.fit_transform(np.asarray(X, dtype=np.float64))
         self.model.fit(X_scaled)
+        self.compiled = compile_forest(self.model)
         return self
 
     def predict(self, X: pd.DataFrame) -> np.ndarray:
         """Return anomaly score (higher = more anomalous)."""
-        X_scaled = self.scaler.transform(X)
+        names = getattr(self, "feature_names", None)
+        if isinstance(X, pd.DataFrame) and names:
+            X = X[names]
+        # arrays (e.g. schema-encoded rows) must already be in training column order
+        X_scaled = (np.asarray(X, dtype=np.float64) - self.scaler.mean_) / self.scaler.scale_
+        # flat-array scorer: no per-tree Python calls or joblib dispatch
+        compiled = getattr(self, "compiled", None)
+        if compiled is not None:
+            return compiled.decision_function(X_scaled) * -1
         return self.model.decision_function(X_scaled) * -1
 
     def save(self, path: str):
-        joblib.dump({"scaler": self.scaler, "model": self.model}, path)
+        bundle = {"scaler": self.scaler, "model": self.model, "feature_names": self.feature_names}
+        if self.compiled is not None:
+            bundle["compiled"] = self.compiled.to_dict()
+        joblib.dump(bundle, path)
 
     @classmethod
     def load(cls, path: str):
@@ -35,23 +58,93 @@ class IsolationForestDetector:
         inst = cls()
         inst.scaler = bundle["scaler"]
         inst.model = bundle["model"]
+        inst.feature_names = bundle.get("feature_names")
+        if "compiled" in bundle:
+            inst.compiled = CompiledForest(bundle["compiled"])
+        else:
+            inst.compiled = compile_forest(inst.model)
         return inst
 
 
 class EnsembleModel:
     """Combine Isolation-Forest + LSTM residuals."""
 
-    def __init__(self, iforest: IsolationForestDetector, lstm_predictor):
+    # LSTM residuals depend on the preceding rows
+    row_independent = False
+
+    def __init__(self, iforest: IsolationForestDetector, lstm_predictor, target_col: str = "value"):
         self.iforest = iforest
         self.lstm = lstm_predictor
+        self.target_col = target_col
 
-    def fit(self, X: pd.DataFrame):
+    def fit(self, X: pd.DataFrame, starts: np.ndarray = None):
+        """`starts`: row offsets where each time-ordered series begins (default: one series)."""
         self.iforest.fit(X)
-        self.lstm.fit(X)
+        self.lstm.fit(X, target_col=self.target_col, starts=starts)
         return self
 
-    def predict(self, X: pd.DataFrame) -> np.ndarray:
+    def predict(self, X: pd.DataFrame, starts: np.ndarray = None) -> np.ndarray:
+        """
+        Score time-ordered rows, each series contiguous from its `starts` offset.
+
+        Rows before the first full lookback window of their series have no
+        forecast and get a zero residual.
+        """
+        if not isinstance(X, pd.DataFrame) or self.target_col not in X.columns:
+            raise ValueError(f"EnsembleModel needs time-ordered rows with a {self.target_col!r} column")
         iso_score = self.iforest.predict(X)
-        lstm_residual = self.lstm.residual(X)
+        lstm_residual = np.zeros(len(X))
+        bounds = np.append(starts if starts is not None else [0], len(X)).astype(np.int64)
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            if hi - lo > self.lstm.lookback:
+                residual = self.lstm.residual(X.iloc[lo:hi], target_col=self.target_col)
+                lstm_residual[hi - len(residual):hi] = residual
+        return self._combine(iso_score, lstm_residual)
+
+    def predict_independent(self, X) -> np.ndarray:
+        """
+        Score rows that each stand alone, with no preceding rows (e.g. one
+        row per workload in an API request): like rows before the first
+        lookback window, they get a zero residual.
+        """
+        return self._combine(self.iforest.predict(X), 0.0)
+
+    def predict_sequence(self, X, history: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score consecutive rows of one series that continue after `history`.
+
+        Args:
+            X: New rows, oldest first; a frame, or an array in training column
+                order (e.g. schema-encoded rows)
+            history: Target values of the series' earlier rows, as returned
+                by the previous call (None for a new series)
+
+        Returns:
+            Tuple: (scores, the last `lookback` target values to pass as the
+            next call's history)
+
+        Raises:
+            ValueError: If the target column cannot be found in X
+        """
+        if isinstance(X, pd.DataFrame):
+            if self.target_col not in X.columns:
+                raise ValueError(f"Rows have no {self.target_col!r} column")
+            targets = X[self.target_col].to_numpy(dtype=np.float64)
+        else:
+            names = getattr(self.iforest, "feature_names", None) or []
+            if self.target_col not in names:
+                raise ValueError(f"Forest was not trained with a {self.target_col!r} column")
+            targets = np.asarray(X, dtype=np.float64)[:, names.index(self.target_col)]
+
+        series = targets if history is None else np.concatenate((np.asarray(history, dtype=np.float64), targets))
+        lstm_residual = np.zeros(len(targets))
+        # only the new rows' forecasts; `lstm` is a NumpyLSTMPredictor here
+        residual = self.lstm.residual_series([series[-(len(targets) + self.lstm.lookback):]])[0]
+        if len(residual):
+            lstm_residual[len(targets) - len(residual):] = residual
+        return self._combine(self.iforest.predict(X), lstm_residual), series[-self.lstm.lookback:]
+
+    @staticmethod
+    def _combine(iso_score: np.ndarray, lstm_residual) -> np.ndarray:
         # simple weighted sum (can be learnt later)
-        return 0.6 * iso_score + 0.4 * lstm_residual
\ No newline at end of file
+        return 0.6 * iso_score + 0.4 * lstm_residual
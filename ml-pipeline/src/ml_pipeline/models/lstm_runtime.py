@@ -0,0 +1,186 @@
+"""
+TensorFlow-free inference for trained LSTMPredictor models.
+
+Training exports the Keras weights, the target scaler and the name of the
+forecast feature column to a portable `.npz`; `NumpyLSTMPredictor` loads it
+anywhere TensorFlow is not installed (the API does, next to the forest),
+with a forward pass of plain numpy matmuls batched over the windows of many
+series. Gates follow
+the Keras LSTM layout (i, f, c, o) with sigmoid recurrent activation and
+tanh activation.
+"""
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)  # overflow-free logistic
+
+
+def keras_weights(
+    keras_model,
+    scaler,
+    lookback: int,
+    horizon: int,
+    target_col: Optional[str] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Collect an LSTM -> Dense Keras model and its MinMaxScaler as arrays.
+
+    Only `get_weights()` is used, so this works with any Keras backend.
+    `target_col`, the feature column the model forecasts, is stored when given.
+    """
+    lstm, dense = keras_model.layers[0], keras_model.layers[-1]
+    kernel, recurrent_kernel, bias = lstm.get_weights()
+    dense_kernel, dense_bias = dense.get_weights()
+    weights = {
+        "format_version": np.asarray(FORMAT_VERSION),
+        "lookback": np.asarray(lookback),
+        "horizon": np.asarray(horizon),
+        "kernel": kernel,
+        "recurrent_kernel": recurrent_kernel,
+        "bias": bias,
+        "dense_kernel": dense_kernel,
+        "dense_bias": dense_bias,
+        "scale": scaler.scale_,
+        "offset": scaler.min_,
+    }
+    if target_col is not None:
+        weights["target_col"] = np.asarray(target_col)
+    return weights
+
+
+def export_weights(
+    keras_model,
+    scaler,
+    lookback: int,
+    horizon: int,
+    path: Union[str, Path],
+    target_col: Optional[str] = None,
+) -> Path:
+    """Write `keras_weights` to a portable `.npz`."""
+    path = Path(path)
+    np.savez(path, **keras_weights(keras_model, scaler, lookback, horizon, target_col))
+    return path
+
+
+class NumpyLSTM:
+    """Single-layer LSTM + Dense forward pass over (batch, time, features) inputs."""
+
+    def __init__(self, weights: Dict[str, np.ndarray], dtype=np.float32):
+        self.kernel = np.asarray(weights["kernel"], dtype=dtype)
+        self.recurrent_kernel = np.asarray(weights["recurrent_kernel"], dtype=dtype)
+        self.bias = np.asarray(weights["bias"], dtype=dtype)
+        self.dense_kernel = np.asarray(weights["dense_kernel"], dtype=dtype)
+        self.dense_bias = np.asarray(weights["dense_bias"], dtype=dtype)
+        self.units = self.recurrent_kernel.shape[0]
+        self.dtype = dtype
+
+    def forward(self, X: np.ndarray, batch_size: int = 4096) -> np.ndarray:
+        """
+        Final-step Dense outputs for every sequence.
+
+        The input projection for all timesteps is one matmul per chunk; the
+        recurrence then costs one (batch, units) x (units, 4*units) matmul
+        per timestep. Chunks bound the (batch, time, 4*units) buffer.
+
+        Returns:
+            np.ndarray: (batch, horizon)
+        """
+        X = np.asarray(X, dtype=self.dtype)
+        if X.ndim == 2:
+            X = X[:, :, None]
+        out = np.empty((len(X), self.dense_kernel.shape[1]), dtype=self.dtype)
+        for lo in range(0, len(X), batch_size):
+            out[lo:lo + batch_size] = self._forward(X[lo:lo + batch_size])
+        return out
+
+    def _forward(self, X: np.ndarray) -> np.ndarray:
+        u = self.units
+        projected = X @ self.kernel + self.bias  # (b, t, 4u)
+        h = np.zeros((len(X), u), dtype=self.dtype)
+        c = np.zeros_like(h)
+        for t in range(X.shape[1]):
+            z = projected[:, t] + h @ self.recurrent_kernel
+            i = _sigmoid(z[:, :u])
+            f = _sigmoid(z[:, u:2 * u])
+            g = np.tanh(z[:, 2 * u:3 * u])
+            o = _sigmoid(z[:, 3 * u:])
+            c = f * c + i * g
+            h = o * np.tanh(c)
+        return h @ self.dense_kernel + self.dense_bias
+
+
+class NumpyLSTMPredictor:
+    """
+    Drop-in replacement for `LSTMPredictor` at inference time.
+
+    Same `predict`/`residual` contract, without importing TensorFlow.
+    Pickles as plain numpy arrays, so an EnsembleModel holding it can be
+    joblib-loaded without TensorFlow.
+    """
+
+    def __init__(self, weights: Dict[str, np.ndarray]):
+        version = int(weights.get("format_version", FORMAT_VERSION))
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported LSTM weights format: {version}")
+        self.lookback = int(weights["lookback"])
+        self.horizon = int(weights["horizon"])
+        self.scale = np.asarray(weights["scale"], dtype=np.float64).ravel()
+        self.offset = np.asarray(weights["offset"], dtype=np.float64).ravel()
+        self.target_col = str(weights["target_col"]) if "target_col" in weights else None
+        self.net = NumpyLSTM(weights)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "NumpyLSTMPredictor":
+        with np.load(path) as data:
+            return cls({name: data[name] for name in data.files})
+
+    def _scale(self, values: np.ndarray) -> np.ndarray:
+        return (np.asarray(values, dtype=np.float64) * self.scale[0] + self.offset[0]).astype(np.float32)
+
+    def _unscale(self, scaled: np.ndarray) -> np.ndarray:
+        return (scaled.astype(np.float64) - self.offset[0]) / self.scale[0]
+
+    def predict_series(self, series: Sequence[np.ndarray], batch_size: int = 4096) -> List[np.ndarray]:
+        """
+        Predictions for several series in one batched forward pass.
+
+        Windows of all series are gathered chunk by chunk from one scaled
+        copy of the data, so memory stays near one copy plus one chunk.
+        """
+        scaled = [self._scale(s).ravel() for s in series]
+        counts = [max(len(s) - self.lookback + 1, 0) for s in scaled]
+        if not sum(counts):
+            return [np.empty(0) for _ in series]
+        flat = np.concatenate(scaled)
+        offsets = np.cumsum([0] + [len(s) for s in scaled[:-1]])
+        starts = np.concatenate([offset + np.arange(n) for offset, n in zip(offsets, counts)])
+        steps = np.arange(self.lookback)
+
+        preds = np.empty((len(starts), self.horizon), dtype=np.float32)
+        for lo in range(0, len(starts), batch_size):
+            windows = flat[starts[lo:lo + batch_size, None] + steps]
+            preds[lo:lo + batch_size] = self.net.forward(windows, batch_size)
+        preds = self._unscale(preds).ravel()
+        return np.split(preds, np.cumsum([n * self.horizon for n in counts])[:-1])
+
+    def predict(self, df: pd.DataFrame, target_col: str = "value") -> np.ndarray:
+        return self.predict_series([df[target_col].to_numpy()])[0]
+
+    def residual(self, df: pd.DataFrame, target_col: str = "value") -> np.ndarray:
+        return self.residual_series([df[target_col].to_numpy()])[0]
+
+    def residual_series(self, series: Sequence[np.ndarray], batch_size: int = 4096) -> List[np.ndarray]:
+        """|actual - forecast| after the first `lookback` values of each series, in one batched pass."""
+        residuals = []
+        for values, preds in zip(series, self.predict_series(series, batch_size)):
+            # one-step-ahead forecasts; the last window forecasts past the data
+            preds = preds.reshape(-1, self.horizon)[:-1, 0]
+            residuals.append(np.abs(np.asarray(values, dtype=np.float64)[self.lookback:] - preds))
+        return residuals
@@ -5,28 +5,44 @@ from tensorflow.keras.layers import LSTM, Dense
 from tensorflow.keras.optimizers import Adam
 from sklearn.preprocessing import MinMaxScaler
 
+from ml_pipeline.models.lstm_runtime import NumpyLSTMPredictor, export_weights, keras_weights
+from ml_pipeline.models.windowing import WindowBatches
+
 class LSTMPredictor:
     """Predict next value(s); residual = |actual - predicted|."""
 
-    def __init__(self, lookback: int = 60, horizon: int = 1, units: int = 50):
+    def __init__(self, lookback: int = 60, horizon: int = 1, units: int = 50, batch_size: int = 32):
         self.lookback = lookback
         self.horizon = horizon
         self.units = units
+        self.batch_size = batch_size
         self.scaler = MinMaxScaler()
         self.model = None
+        self.target_col = None
 
-    def _reshape(self, series: pd.Series) -> np.ndarray:
-        scaled = self.scaler.fit_transform(series.values.reshape(-1, 1))
-        X, y = [], []
-        for i in range(self.lookback, len(scaled) - self.horizon + 1):
-            X.append(scaled[i - self.lookback : i, 0])
-            y.append(scaled[i : i + self.horizon, 0])
-        return np.array(X), np.array(y)
+    def _scale(self, series: pd.Series, fit: bool = False) -> np.ndarray:
+        column = series.to_numpy(dtype=np.float64).reshape(-1, 1)
+        scaled = self.scaler.fit_transform(column) if fit else self.scaler.transform(column)
+        return scaled.astype(np.float32).ravel()
 
-    def fit(self, df: pd.DataFrame, target_col: str = "value"):
-        series = df[target_col]
-        X, y = self._reshape(series)
-        X = X.reshape(X.shape[0], X.shape[1], 1)
+    def fit(
+        self,
+        df: pd.DataFrame,
+        target_col: str = "value",
+        epochs: int = 10,
+        shuffle: bool = True,
+        starts: np.ndarray = None,
+    ):
+        """`starts`: row offsets where each stacked series begins (default: one series)."""
+        self.target_col = target_col
+        batches = WindowBatches(
+            self._scale(df[target_col], fit=True),
+            self.lookback,
+            self.horizon,
+            batch_size=self.batch_size,
+            shuffle=shuffle,
+            starts=starts,
+        )
 
         self.model = Sequential(
             [
@@ -35,21 +51,27 @@ class LSTMPredictor:
             ]
         )
         self.model.compile(optimizer=Adam(learning_rate=0.001), loss="mse")
-        self.model.fit(X, y, epochs=10, batch_size=32, verbose=0)
+        self.model.fit(batches.generator(), steps_per_epoch=len(batches), epochs=epochs, verbose=0)
         return self
 
     def predict(self, df: pd.DataFrame, target_col: str = "value") -> np.ndarray:
-        series = df[target_col]
-        scaled = self.scaler.transform(series.values.reshape(-1, 1))
-        X = []
-        for i in range(self.lookback, len(scaled) + 1):
-            X.append(scaled[i - self.lookback : i, 0])
-        X = np.array(X).reshape(len(X), self.lookback, 1)
-        preds_scaled = self.model.predict(X, verbose=0)
+        batches = WindowBatches(
+            self._scale(df[target_col]), self.lookback, horizon=0, batch_size=max(self.batch_size, 256)
+        )
+        preds_scaled = self.model.predict(batches.generator(epochs=1), steps=len(batches), verbose=0)
         preds = self.scaler.inverse_transform(preds_scaled)
         return preds.flatten()
 
     def residual(self, df: pd.DataFrame, target_col: str = "value") -> np.ndarray:
-        preds = self.predict(df, target_col)
+        # one-step-ahead forecasts; the last window forecasts past the data
+        preds = self.predict(df, target_col).reshape(-1, self.horizon)[:-1, 0]
         actual = df[target_col].iloc[self.lookback :].values
-        return np.abs(actual - preds)
\ No newline at end of file
+        return np.abs(actual - preds)
+
+    def export(self, path: str):
+        """Write weights, scaler and target column to a portable .npz for the numpy runtime."""
+        return export_weights(self.model, self.scaler, self.lookback, self.horizon, path, self.target_col)
+
+    def to_runtime(self) -> NumpyLSTMPredictor:
+        """TensorFlow-free predictor with this model's weights."""
+        return NumpyLSTMPredictor(keras_weights(self.model, self.scaler, self.lookback, self.horizon, self.target_col))
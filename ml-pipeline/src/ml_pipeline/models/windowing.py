@@ -0,0 +1,106 @@
+"""
+Lookback windows for sequence models without copying the series.
+
+Windows are strided views over one contiguous array, so building them is
+O(1) and memory stays at one copy of the series; only the batch being fed
+to the model is materialized. Kept free of TensorFlow so it can be used
+(and tested) without it.
+"""
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+
+def sliding_windows(
+    values: np.ndarray,
+    lookback: int,
+    horizon: int = 0,
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Read-only views of every lookback window and its next `horizon` values.
+
+    Window i covers `values[i:i + lookback]` and its target
+    `values[i + lookback:i + lookback + horizon]`. With horizon=0 every
+    window up to the end of the series is returned and targets are None.
+
+    Returns:
+        Tuple: (X of shape (n, lookback), y of shape (n, horizon) or None)
+    """
+    values = np.ascontiguousarray(values).ravel()
+    n = len(values) - lookback - horizon + 1
+    if n <= 0:
+        empty = np.empty((0, lookback), dtype=values.dtype)
+        return empty, (np.empty((0, horizon), dtype=values.dtype) if horizon else None)
+    X = np.lib.stride_tricks.sliding_window_view(values, lookback)[:n]
+    if not horizon:
+        return X, None
+    y = np.lib.stride_tricks.sliding_window_view(values[lookback:], horizon)[:n]
+    return X, y
+
+
+class WindowBatches:
+    """
+    Mini-batches of lookback windows gathered from strided views.
+
+    Each batch is one fancy-index gather of shape (batch, lookback, 1), so
+    peak memory is the series plus one batch regardless of series length.
+    Window order is reshuffled every epoch when `shuffle` is set. With
+    `starts` the values hold several series back to back, and windows (with
+    their targets) that would span two series are left out.
+    """
+
+    def __init__(
+        self,
+        values: np.ndarray,
+        lookback: int,
+        horizon: int = 1,
+        batch_size: int = 32,
+        shuffle: bool = False,
+        seed: Optional[int] = None,
+        dtype=np.float32,
+        starts: Optional[np.ndarray] = None,
+    ):
+        self.values = np.ascontiguousarray(values, dtype=dtype).ravel()
+        self.lookback = lookback
+        self.horizon = horizon
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self._rng = np.random.default_rng(seed)
+        self.X, self.y = sliding_windows(self.values, lookback, horizon)
+        self._order = np.arange(len(self.X))
+        if starts is not None and len(self._order):
+            series = np.cumsum(np.isin(np.arange(len(self.values)), starts))
+            self._order = self._order[series[self._order] == series[self._order + lookback + horizon - 1]]
+
+    @property
+    def n_windows(self) -> int:
+        return len(self._order)
+
+    def __len__(self) -> int:
+        return -(-self.n_windows // self.batch_size)
+
+    def __getitem__(self, i: int):
+        """Batch i of the current epoch: (X,) or (X, y), X (b, lookback, 1) and y (b, horizon)."""
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        idx = self._order[i * self.batch_size:(i + 1) * self.batch_size]
+        X = self.X[idx][:, :, None]
+        return (X,) if self.y is None else (X, self.y[idx])
+
+    def on_epoch_end(self) -> None:
+        if self.shuffle:
+            self._rng.shuffle(self._order)
+
+    def __iter__(self) -> Iterator:
+        for i in range(len(self)):
+            yield self[i]
+
+    def generator(self, epochs: Optional[int] = None) -> Iterator:
+        """Batches for `epochs` passes (forever if None), for Keras `fit(..., steps_per_epoch=len(self))`."""
+        if self.shuffle:
+            self._rng.shuffle(self._order)
+        epoch = 0
+        while epochs is None or epoch < epochs:
+            yield from self
+            self.on_epoch_end()
+            epoch += 1
@@ -4,61 +4,191 @@ Training orchestrator.
 Called by Helm CronJob:  k8s-ml-train --tune --validate
 """
 import argparse
+import json
 import os
 import datetime as dt
+import joblib
+import pandas as pd
 import structlog
 from pathlib import Path
 
-from ml_pipeline.data import PrometheusCollector, FeatureEngineer
-from ml_pipeline.models import IsolationForestDetector, LSTMPredictor, EnsembleModel
-from mlflow import log_metric, log_param, sklearn
+from ml_pipeline.data.data_collector import WORKLOAD_QUERIES, WORKLOAD_SELECTORS, PrometheusCollector
+from ml_pipeline.data import grouped_features
+from ml_pipeline.data.feature_engineering import WORKLOAD_LABELS, FeatureEngineer
+from ml_pipeline.data.feature_store import ParquetFeatureStore
+from ml_pipeline.models.anomaly_detector import IsolationForestDetector, EnsembleModel
+from ml_pipeline.models.time_series_predictor import LSTMPredictor
+
+try:
+    from mlflow import log_metric, log_param, sklearn
+    MLFLOW_AVAILABLE = True
+except ImportError:
+    MLFLOW_AVAILABLE = False
 
 logger = structlog.get_logger(__name__)
 
 DEFAULT_PROM_QUERY_WINDOW = int(os.getenv("TRAINING_QUERY_WINDOW_HOURS", "6"))
 ARTIFACT_PATH = Path(os.getenv("MODEL_ARTIFACT_PATH", "/models"))
 CLOUD = os.getenv("CLOUD_PROVIDER", "azure")
+SCHEMA_FILENAME = "feature_schema.json"  # read by the service's FeatureSchema
+LSTM_WEIGHTS_FILENAME = "lstm_weights.npz"  # read by the service's AnomalyDetector
+FEATURE_STORE_PATH = os.getenv("FEATURE_STORE_PATH")
+# pull raw samples over remote read instead of evaluating query_range
+REMOTE_READ = os.getenv("TRAINING_REMOTE_READ", "false").lower() in ("1", "true", "yes")
+# samples per metric summarised into one row, as the API does per request
+SUMMARY_ROWS = int(os.getenv("SUMMARY_WINDOW_ROWS", "60"))
+# feature column the LSTM forecasts; its residual feeds the ensemble score
+LSTM_TARGET = os.getenv("LSTM_TARGET_COLUMN", "cpu_usage_current")
+# row identity (which workload, when), not model input
+KEY_COLUMNS = ("timestamp",) + WORKLOAD_LABELS
+
+def fetch_metrics(collector: PrometheusCollector, metrics, start: dt.datetime, end: dt.datetime, remote_read: bool = False) -> dict:
+    """Raw frames for the named workload metrics, via remote read or query_range."""
+    if remote_read:
+        return collector.remote_read_metrics({m: WORKLOAD_SELECTORS[m] for m in metrics}, start, end)
+    return collector.default_metrics(start, end, queries={m: WORKLOAD_QUERIES[m] for m in metrics})
+
+def feature_source(remote_read: bool = False) -> dict:
+    """
+    How raw samples are fetched, for the feature store key.
 
-def load_data(collector: PrometheusCollector, hours: int) -> dict:
-    end = dt.datetime.utcnow()
+    Remote read rates are per-sample `counter_rate`, not PromQL `rate()[5m]`,
+    so features from the two paths are stored apart.
+    """
+    if remote_read:
+        return {"fetch": "remote_read", "selectors": WORKLOAD_SELECTORS}
+    return {"fetch": "query_range", "queries": WORKLOAD_QUERIES}
+
+def load_data(collector: PrometheusCollector, hours: int, remote_read: bool = False) -> dict:
+    end = dt.datetime.now(dt.timezone.utc)
     start = end - dt.timedelta(hours=hours)
-    raw = collector.default_metrics()
+    raw = fetch_metrics(collector, WORKLOAD_QUERIES, start, end, remote_read)
     logger.info("raw metrics pulled", shapes={k: v.shape for k, v in raw.items()})
     return raw
 
+def fill_missing(feat: pd.DataFrame) -> pd.DataFrame:
+    """
+    Fill metrics a workload lacks at a row with the column median.
+
+    The API does the same for metrics a request lacks (the schema defaults
+    are the training medians).
+    """
+    columns = [c for c in feat.columns if c not in KEY_COLUMNS]
+    feat[columns] = feat[columns].fillna(feat[columns].median()).fillna(0.0)
+    return feat
+
 def build_features(raw: dict) -> pd.DataFrame:
-    feat = FeatureEngineer().transform(raw)
+    """Per-workload summary rows, the layout the API encodes requests into."""
+    feat = FeatureEngineer(summary_rows=SUMMARY_ROWS).transform(raw, mode="summary")
     if feat.empty:
         raise RuntimeError("Empty feature matrix after transform")
+    return fill_missing(feat)
+
+def build_features_cached(collector: PrometheusCollector, root: str, hours: int, remote_read: bool = False) -> pd.DataFrame:
+    """
+    Summary features for the last `hours`, reusing hourly partitions under `root`.
+
+    Partitions are keyed by the FeatureEngineer config and the data source
+    (`feature_source`). Only hours missing from the store are queried, each
+    run with enough extra history to fill the first rows' trailing windows.
+    """
+    engineer = FeatureEngineer(summary_rows=SUMMARY_ROWS)
+    store = ParquetFeatureStore.for_features(root, engineer, mode="summary", source=feature_source(remote_read))
+    warmup = pd.Timedelta(engineer.step) * engineer.summary_rows
+    end = dt.datetime.now(dt.timezone.utc).timestamp()
+    start = end - hours * 3600
+
+    frames = []
+    for metric in WORKLOAD_QUERIES:
+        def compute(lo, hi, metric=metric):
+            lo_dt = dt.datetime.fromtimestamp(lo, dt.timezone.utc) - warmup
+            hi_dt = dt.datetime.fromtimestamp(hi, dt.timezone.utc)
+            return engineer.transform(fetch_metrics(collector, [metric], lo_dt, hi_dt, remote_read), mode="summary")
+
+        feat = store.materialize(metric, start, end, compute, complete_before=end)
+        if len(feat):
+            frames.append(feat)
+    if not frames:
+        raise RuntimeError("Empty feature matrix after transform")
+
+    # per-metric rows share workload labels and step-aligned timestamps
+    keys = list(engineer.group_by) + ["timestamp"]
+    feat = pd.concat([df.set_index(keys) for df in frames], axis=1, join="outer").sort_index().reset_index()
+    feat = fill_missing(feat)
+    logger.info("features loaded", rows=len(feat), columns=feat.shape[1], store=str(store.root))
     return feat
 
-def train_models(X: pd.DataFrame, tune: bool = False):
+def save_feature_schema(X: pd.DataFrame, path: Path, default: float = 0.0):
+    """
+    Record the model's input columns (in order) for the API's FeatureSchema.
+
+    Metrics a request lacks are filled with the training median of each
+    column, so a partial request is scored as typical on those metrics.
+    """
+    columns = [str(c) for c in X.columns if c not in KEY_COLUMNS]
+    medians = X[columns].median()
+    defaults = {c: float(medians[c]) for c in columns if pd.notna(medians[c])}
+    schema = {"version": 1, "columns": columns, "default": default, "defaults": defaults}
+    path.write_text(json.dumps(schema, indent=2))
+
+def save_serving_model(model, X: pd.DataFrame, directory: Path = None) -> Path:
+    """
+    Write the forest the API loads (`ensemble.joblib`) and its feature schema.
+
+    The API combines it with the exported LSTM (`LSTM_WEIGHTS_FILENAME`)
+    into the ensemble, so the pickle itself must score rows independently;
+    sequence models are rejected.
+    """
+    directory = directory or ARTIFACT_PATH
+    if not getattr(model, "row_independent", False):
+        raise ValueError(f"{type(model).__name__} scores ordered rows and cannot serve single requests")
+    path = directory / "ensemble.joblib"
+    joblib.dump(model, path)
+    save_feature_schema(X, directory / SCHEMA_FILENAME)
+    return path
+
+def train_models(X: pd.DataFrame, tune: bool = False, target_col: str = LSTM_TARGET):
+    if target_col not in X.columns:
+        raise RuntimeError(f"LSTM target column {target_col!r} not in features")
+    # one time-ordered series per workload; labels and timestamps are not features
+    labels = [c for c in WORKLOAD_LABELS if c in X.columns]
+    X, starts = grouped_features.sort_by_series(X, labels)
+    X = X.drop(columns=list(KEY_COLUMNS), errors="ignore")
+
     # Isolation-Forest
     iso = IsolationForestDetector(contamination=0.01)
     iso.fit(X)
     iso_path = ARTIFACT_PATH / "isolation_forest.joblib"
     iso.save(str(iso_path))
-    sklearn.log_model(iso.model, "isolation_forest")
+    if MLFLOW_AVAILABLE:
+        sklearn.log_model(iso.model, "isolation_forest")
     logger.info("Isolation-Forest saved", path=iso_path)
 
     # LSTM
     lstm = LSTMPredictor(lookback=60)
-    lstm.fit(X)
+    lstm.fit(X, target_col=target_col, starts=starts)
     lstm_path = ARTIFACT_PATH / "lstm.h5"
     lstm.model.save(str(lstm_path))
-    log_param("lstm_lookback", 60)
+    if MLFLOW_AVAILABLE:
+        log_param("lstm_lookback", 60)
+        log_param("lstm_target", target_col)
     logger.info("LSTM saved", path=lstm_path)
 
-    # Ensemble
-    ensemble = EnsembleModel(iso, lstm)
-    ensemble.fit(X)
-    ens_path = ARTIFACT_PATH / "ensemble.joblib"
-    joblib.dump(ensemble, ens_path)
-    logger.info("Ensemble saved", path=ens_path)
+    # Ensemble (offline: scores time-ordered rows)
+    ensemble = EnsembleModel(iso, lstm, target_col=target_col)
+    ensemble.fit(X, starts=starts)
+    # TensorFlow-free weights for NumpyLSTMPredictor; the API rebuilds the
+    # ensemble from them and the forest, scoring streamed rows with the LSTM
+    weights_path = lstm.export(ARTIFACT_PATH / LSTM_WEIGHTS_FILENAME)
+    logger.info("LSTM weights exported", path=weights_path)
+
+    ens_path = save_serving_model(ensemble.iforest, X)
+    logger.info("Serving model saved", path=ens_path, n_features=X.shape[1])
 
     # quick validation on same data (real life → time split)
-    score = ensemble.predict(X).mean()
-    log_metric("train_avg_anomaly_score", score)
+    score = ensemble.predict(X, starts=starts).mean()
+    if MLFLOW_AVAILABLE:
+        log_metric("train_avg_anomaly_score", score)
     logger.info("training complete", avg_score=score)
 
 def main():
@@ -66,13 +196,17 @@ def main():
     parser.add_argument("--tune", action="store_true", help="run optuna hyper-param tuning")
     parser.add_argument("--validate", action="store_true", help="run hold-out validation")
     parser.add_argument("--window", type=int, default=DEFAULT_PROM_QUERY_WINDOW, help="hours of data to pull")
+    parser.add_argument("--feature-store", default=FEATURE_STORE_PATH, help="reuse hourly feature partitions under this path")
+    parser.add_argument("--remote-read", action="store_true", default=REMOTE_READ, help="pull raw samples via Prometheus remote read")
     args = parser.parse_args()
 
     ARTIFACT_PATH.mkdir(parents=True, exist_ok=True)
 
     collector = PrometheusCollector()
-    raw = load_data(collector, args.window)
-    X = build_features(raw)
+    if args.feature_store:
+        X = build_features_cached(collector, args.feature_store, args.window, remote_read=args.remote_read)
+    else:
+        X = build_features(load_data(collector, args.window, remote_read=args.remote_read))
     train_models(X, tune=args.tune)
 
     logger.info("job finished", model_dir=ARTIFACT_PATH)
@@ -3,11 +3,47 @@ import joblib
 import numpy as np
 import pandas as pd
 from pathlib import Path
-from typing import Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from datetime import datetime
+from sklearn.ensemble import IsolationForest
+
+from anomaly_detector.feature_schema import SCHEMA_FILENAME, FeaturePlan, FeatureSchema
+from anomaly_detector.prediction_cache import PredictionCache
 
 logger = logging.getLogger(__name__)
 
+# TensorFlow-free LSTM exported by training, combined with the forest on load
+LSTM_WEIGHTS_FILENAME = "lstm_weights.npz"
+
+
+def _rows_independent(model: object) -> bool:
+    """
+    Whether a model scores every row on its own.
+    
+    Models declare it with a `row_independent` attribute; a bare sklearn
+    IsolationForest qualifies. Anything else (e.g. an ensemble with a
+    sequence-dependent LSTM residual) may score a row differently depending
+    on its neighbours, so its per-row results must not be cached.
+    """
+    flag = getattr(model, "row_independent", None)
+    if flag is not None:
+        return bool(flag)
+    return isinstance(model, IsolationForest)
+
+
+def _row_predictor(model: object) -> Optional[Callable[[Any], np.ndarray]]:
+    """
+    The method scoring rows that each stand alone (one per workload, no history).
+    
+    Sequence models offer `predict_independent` for that; row-independent
+    models just use `predict`. Either way each row's score depends on that
+    row alone, so it can be cached. None for anything else.
+    """
+    independent = getattr(model, "predict_independent", None)
+    if independent is not None:
+        return independent
+    return model.predict if _rows_independent(model) else None
+
 
 class AnomalyDetector:
     """
@@ -17,12 +53,13 @@ class AnomalyDetector:
     Supports hot-reloading of models for zero-downtime updates.
     """
 
-    def __init__(self, model_dir: Union[str, Path]):
+    def __init__(self, model_dir: Union[str, Path], cache: Optional[PredictionCache] = None):
         """
         Initialize the anomaly detector.
         
         Args:
             model_dir: Directory containing the model files
+            cache: Optional result cache consulted before running the model
             
         Raises:
             ValueError: If model_dir is invalid
@@ -36,6 +73,8 @@ class AnomalyDetector:
             self.model: Optional[object] = None
             self.model_loaded_at: Optional[datetime] = None
             self.model_version: Optional[str] = None
+            self.plan: Optional[FeaturePlan] = None
+            self.cache = cache
             
             # Try to load model on initialization
             try:
@@ -63,15 +102,28 @@ class AnomalyDetector:
                 raise FileNotFoundError(f"Model not found: {ensemble_path}")
             
             logger.info(f"Loading model from {ensemble_path}")
-            self.model = joblib.load(ensemble_path)
-            self.model_loaded_at = datetime.utcnow()
+            model = joblib.load(ensemble_path)
+            lstm_path = self.model_dir / LSTM_WEIGHTS_FILENAME
+            if lstm_path.exists() and _rows_independent(model):
+                model = self._with_lstm(model, lstm_path)
+            
+            # Feature schema saved with the model fixes column order and defaults;
+            # compiled before the swap so an unusable schema keeps the old model
+            schema_path = self.model_dir / SCHEMA_FILENAME
+            plan = None
+            if schema_path.exists():
+                plan = FeatureSchema.load(schema_path).compile()
+                logger.info(f"Compiled feature plan with {plan.width} columns")
             
             # Try to get model version if available
             version_path = self.model_dir / "version.txt"
             if version_path.exists():
-                self.model_version = version_path.read_text().strip()
+                version = version_path.read_text().strip()
             else:
-                self.model_version = "unknown"
+                version = "unknown"
+            
+            self.model, self.plan, self.model_version = model, plan, version
+            self.model_loaded_at = datetime.utcnow()
                 
             logger.info(
                 f"Model loaded successfully. Version: {self.model_version}, "
@@ -84,6 +136,23 @@ class AnomalyDetector:
             logger.error(f"Failed to load model: {e}", exc_info=True)
             raise Exception(f"Model loading failed: {e}") from e
 
+    @staticmethod
+    def _with_lstm(forest: object, lstm_path: Path) -> object:
+        """
+        Combine the forest with the exported LSTM into the training ensemble.
+        
+        The numpy runtime needs no TensorFlow; the LSTM scores rows that
+        arrive in order (see `predict_sequence`).
+        """
+        from ml_pipeline.models.anomaly_detector import EnsembleModel
+        from ml_pipeline.models.lstm_runtime import NumpyLSTMPredictor
+        
+        lstm = NumpyLSTMPredictor.load(lstm_path)
+        if lstm.target_col is None:
+            raise ValueError(f"{lstm_path} does not name the column its LSTM forecasts")
+        logger.info(f"Loaded LSTM runtime from {lstm_path} (target: {lstm.target_col})")
+        return EnsembleModel(forest, lstm, target_col=lstm.target_col)
+
     def reload(self) -> bool:
         """
         Reload the model from disk (hot-reload).
@@ -95,18 +164,42 @@ class AnomalyDetector:
             logger.info("Attempting to reload model...")
             old_version = self.model_version
             self._load()
+            if self.cache is not None:
+                self.cache.clear()
             logger.info(f"Model reloaded: {old_version} -> {self.model_version}")
             return True
         except Exception as e:
             logger.error(f"Failed to reload model: {e}", exc_info=True)
             return False
 
-    def predict(self, features: pd.DataFrame) -> np.ndarray:
+    def encode(self, raws: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Encode raw metrics straight into the model's feature matrix.
+        
+        Args:
+            raws: List of dictionaries of metric name -> values/timestamps
+            
+        Returns:
+            np.ndarray: float32 matrix in feature schema order
+            
+        Raises:
+            RuntimeError: If the loaded model has no feature schema
+            ValueError: If the metrics are invalid
+        """
+        if self.plan is None:
+            raise RuntimeError("Model has no feature schema")
+        return self.plan.encode(raws)
+
+    def predict(self, features: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
         """
         Return anomaly scores for input features.
         
+        With a feature schema, DataFrames are aligned to the schema's column
+        order and arrays must already be in it (see `encode`). Each row is
+        scored on its own, without preceding rows of its series.
+        
         Args:
-            features: DataFrame with feature columns
+            features: DataFrame with feature columns, or a 2-D feature array
             
         Returns:
             np.ndarray: Anomaly scores ∈ [0, ∞) for each row
@@ -120,18 +213,28 @@ class AnomalyDetector:
                 logger.error("Prediction attempted with no model loaded")
                 raise RuntimeError("Model not loaded. Cannot make predictions.")
             
-            if features.empty:
+            if features.size == 0:
                 logger.warning("Empty features provided for prediction")
                 return np.array([])
             
+            if isinstance(features, np.ndarray):
+                if features.ndim != 2:
+                    raise ValueError(f"Expected a 2-D feature array, got shape {features.shape}")
+                if self.plan is not None and features.shape[1] != self.plan.width:
+                    raise ValueError(
+                        f"Feature array has {features.shape[1]} columns, schema has {self.plan.width}"
+                    )
+            elif self.plan is not None:
+                features = self.plan.align(features)
+            
             logger.debug(f"Predicting on {len(features)} samples")
             
             # Make prediction
-            scores = self.model.predict(features)
-            
-            # Validate output
-            if not isinstance(scores, np.ndarray):
-                scores = np.array(scores)
+            row_predict = _row_predictor(self.model)
+            if self.cache is not None and row_predict is not None:
+                scores = self._predict_cached(features, row_predict)
+            else:
+                scores = np.asarray((row_predict or self.model.predict)(features))
                 
             logger.debug(f"Prediction complete. Score range: [{scores.min():.3f}, {scores.max():.3f}]")
             
@@ -143,6 +246,87 @@ class AnomalyDetector:
             logger.error(f"Prediction failed: {e}", exc_info=True)
             raise ValueError(f"Prediction error: {e}") from e
 
+    def _predict_cached(
+        self,
+        features: Union[pd.DataFrame, np.ndarray],
+        predict: Callable[[Any], np.ndarray],
+    ) -> np.ndarray:
+        """
+        Predict through the result cache, running the model only on misses.
+        
+        Only valid for per-row scoring (see `_row_predictor`).
+        
+        Args:
+            features: DataFrame with feature columns, or a 2-D feature array
+            predict: Row scoring method of the model
+            
+        Returns:
+            np.ndarray: Anomaly scores for each row
+        """
+        if isinstance(features, np.ndarray):
+            values = features
+            columns = self.plan.columns if self.plan is not None else range(features.shape[1])
+        else:
+            values, columns = features.to_numpy(), features.columns
+        try:
+            keys = self.cache.fingerprint(values, columns, self.model_version)
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Features not cacheable, predicting directly: {e}")
+            return np.asarray(predict(features))
+        
+        cached = self.cache.get_many(keys)
+        misses = [i for i, score in enumerate(cached) if score is None]
+        
+        if not misses:
+            return np.array(cached, dtype=float)
+        
+        rows = features[misses] if isinstance(features, np.ndarray) else features.iloc[misses]
+        miss_scores = np.asarray(predict(rows))
+        self.cache.put_many([keys[i] for i in misses], miss_scores)
+        
+        if len(misses) == len(cached):
+            return miss_scores
+        
+        scores = np.array([np.nan if score is None else score for score in cached], dtype=float)
+        scores[misses] = miss_scores
+        return scores
+
+    def predict_sequence(
+        self,
+        features: Union[pd.DataFrame, np.ndarray],
+        history: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Score consecutive rows of one series (e.g. a streaming session).
+        
+        Sequence models also score each row against the series' earlier
+        rows, summarised by `history`; other models score rows as `predict`.
+        
+        Args:
+            features: New rows of the series, oldest first (see `predict`)
+            history: State returned by the previous call (None at first)
+            
+        Returns:
+            Tuple: (anomaly scores, history to pass with the next rows)
+            
+        Raises:
+            RuntimeError: If model is not loaded
+            ValueError: If features are invalid
+        """
+        model = self.model
+        if model is None or not hasattr(model, "predict_sequence"):
+            return self.predict(features), history
+        if len(features) == 0:
+            return np.array([]), history
+        if self.plan is not None and isinstance(features, pd.DataFrame):
+            features = self.plan.align(features)
+        try:
+            scores, history = model.predict_sequence(features, history)
+        except Exception as e:
+            logger.error(f"Sequence prediction failed: {e}", exc_info=True)
+            raise ValueError(f"Prediction error: {e}") from e
+        return np.asarray(scores), history
+
     def health(self) -> bool:
         """
         Check if detector is healthy (model loaded).
@@ -167,4 +351,5 @@ class AnomalyDetector:
             "model_version": self.model_version,
             "loaded_at": self.model_loaded_at.isoformat() if self.model_loaded_at else None,
             "model_dir": str(self.model_dir),
+            "feature_columns": self.plan.width if self.plan is not None else None,
         }
\ No newline at end of file
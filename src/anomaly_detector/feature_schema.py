@@ -0,0 +1,223 @@
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from anomaly_detector.metrics_processor import (
+    SUMMARY_FEATURES,
+    group_metric_values,
+    ragged_summary_features,
+)
+
+logger = logging.getLogger(__name__)
+
+# Written next to ensemble.joblib by the training job
+SCHEMA_FILENAME = "feature_schema.json"
+SCHEMA_VERSION = 1
+
+
+class FeatureSchema:
+    """
+    Ordered feature columns a model was trained on.
+
+    Stored with the model artifact as JSON:
+    `{"version": 1, "columns": [...], "default": 0.0, "defaults": {col: value}}`.
+    `defaults` overrides the fill value of individual columns. The schema is
+    compiled once per model load into a `FeaturePlan`.
+    """
+
+    def __init__(
+        self,
+        columns: Sequence[str],
+        default: float = 0.0,
+        defaults: Optional[Mapping[str, float]] = None,
+    ):
+        """
+        Initialize the schema.
+
+        Args:
+            columns: Feature names in model input order
+            default: Fill value for missing features
+            defaults: Per-column fill values overriding `default`
+
+        Raises:
+            ValueError: If columns are empty or repeated, or a default names
+                an unknown column
+        """
+        self.columns = [str(c) for c in columns]
+        if not self.columns:
+            raise ValueError("Feature schema has no columns")
+        if len(set(self.columns)) != len(self.columns):
+            raise ValueError("Feature schema has duplicate columns")
+        self.default = float(default)
+        self.defaults = {str(k): float(v) for k, v in (defaults or {}).items()}
+        unknown = set(self.defaults) - set(self.columns)
+        if unknown:
+            raise ValueError(f"Defaults for unknown columns: {sorted(unknown)}")
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, **kwargs: Any) -> "FeatureSchema":
+        """Schema with a training frame's columns, in order."""
+        return cls(list(df.columns), **kwargs)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": SCHEMA_VERSION,
+            "columns": self.columns,
+            "default": self.default,
+            "defaults": self.defaults,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FeatureSchema":
+        """
+        Build a schema from its JSON form.
+
+        Raises:
+            ValueError: If the version is unsupported or columns are missing
+        """
+        version = data.get("version", SCHEMA_VERSION)
+        if version != SCHEMA_VERSION:
+            raise ValueError(f"Unsupported feature schema version: {version}")
+        if "columns" not in data:
+            raise ValueError("Feature schema is missing 'columns'")
+        return cls(data["columns"], data.get("default", 0.0), data.get("defaults"))
+
+    def save(self, path: Union[str, Path]) -> None:
+        Path(path).write_text(json.dumps(self.to_dict(), indent=2))
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "FeatureSchema":
+        return cls.from_dict(json.loads(Path(path).read_text()))
+
+    def compile(self) -> "FeaturePlan":
+        return FeaturePlan(self)
+
+
+class FeaturePlan:
+    """
+    A `FeatureSchema` compiled for the scoring hot path.
+
+    Resolves, once, which summary feature of which metric lands in which
+    column, so raw metrics go straight into a preallocated C-contiguous
+    float32 matrix in schema order. Features the schema does not list are
+    dropped; listed features a request does not provide (or that come out
+    NaN) take the column default.
+    """
+
+    dtype = np.float32
+
+    def __init__(self, schema: FeatureSchema):
+        """
+        Compile the plan.
+
+        Args:
+            schema: Schema to compile
+            
+        Raises:
+            ValueError: If a column is not a `{metric}_{feature}` summary
+                feature, which no request could ever fill
+        """
+        self.schema = schema
+        self.columns: List[str] = list(schema.columns)
+        self.index: Dict[str, int] = {name: i for i, name in enumerate(self.columns)}
+        self.defaults = np.array(
+            [schema.defaults.get(name, schema.default) for name in self.columns],
+            dtype=self.dtype,
+        )
+        # metric -> (positions in SUMMARY_FEATURES, target columns)
+        self.metrics: Dict[str, Any] = {}
+        for name, column in self.index.items():
+            for position, feature in enumerate(SUMMARY_FEATURES):
+                suffix = f"_{feature}"
+                if name.endswith(suffix) and len(name) > len(suffix):
+                    sources, targets = self.metrics.setdefault(name[:-len(suffix)], ([], []))
+                    sources.append(position)
+                    targets.append(column)
+        self.metrics = {
+            metric: (np.array(sources), np.array(targets))
+            for metric, (sources, targets) in self.metrics.items()
+        }
+        mapped = {int(c) for _, targets in self.metrics.values() for c in targets}
+        unmapped = [name for name, column in self.index.items() if column not in mapped]
+        if unmapped:
+            raise ValueError(
+                f"Feature schema columns are not {{metric}}_{{feature}} summary features "
+                f"({', '.join(SUMMARY_FEATURES)}), so requests can never fill them: {unmapped}"
+            )
+
+    @property
+    def width(self) -> int:
+        return len(self.columns)
+
+    def empty(self, n: int) -> np.ndarray:
+        """An n x width matrix holding the column defaults."""
+        return np.tile(self.defaults, (n, 1))
+
+    def _fill_missing(self, matrix: np.ndarray) -> np.ndarray:
+        missing = np.isnan(matrix)
+        if missing.any():
+            matrix[missing] = np.broadcast_to(self.defaults, matrix.shape)[missing]
+        return matrix
+
+    def encode(self, raws: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Built-in summary features for many workloads, in schema order.
+
+        Args:
+            raws: List of dictionaries of metric name -> values/timestamps
+
+        Returns:
+            np.ndarray: N x width float32 matrix, one row per workload
+
+        Raises:
+            ValueError: If the batch is empty or a workload has no metric
+                the schema uses
+        """
+        if not raws:
+            raise ValueError("Batch of raw metrics is empty")
+        matrix = self.empty(len(raws))
+        for metric, (rows, arrays) in group_metric_values(raws, self.metrics).items():
+            sources, targets = self.metrics[metric]
+            summary = ragged_summary_features(arrays)
+            matrix[np.ix_(rows, targets)] = summary[:, sources]
+        return self._fill_missing(matrix)
+
+    def from_records(self, records: Sequence[Mapping[str, float]]) -> np.ndarray:
+        """
+        Feature dicts (e.g. streaming rows) as an N x width matrix.
+        
+        Raises:
+            ValueError: If a record has no feature the schema uses
+        """
+        matrix = self.empty(len(records))
+        index = self.index
+        for i, record in enumerate(records):
+            row = matrix[i]
+            matched = False
+            for name, value in record.items():
+                column = index.get(name)
+                if column is not None:
+                    row[column] = value
+                    matched = True
+            if not matched:
+                raise ValueError(f"No features at index {i} match the model's feature schema")
+        return self._fill_missing(matrix)
+
+    def align(self, features: pd.DataFrame) -> np.ndarray:
+        """
+        Reorder a feature frame's columns to the schema, filling missing ones.
+        
+        Raises:
+            ValueError: If no column is one the schema uses
+        """
+        matrix = self.empty(len(features))
+        present = [(self.index[c], c) for c in features.columns if c in self.index]
+        if not present:
+            raise ValueError("No feature columns match the model's feature schema")
+        targets, names = zip(*present)
+        matrix[:, list(targets)] = features[list(names)].to_numpy(dtype=self.dtype)
+        return self._fill_missing(matrix)
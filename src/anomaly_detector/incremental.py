@@ -0,0 +1,186 @@
+import bisect
+import logging
+import math
+from collections import deque
+from typing import Deque, Dict, List, Mapping, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class WindowedStats:
+    """
+    Sliding-window summary statistics updated per sample.
+
+    Keeps the same statistics `MetricsProcessor._builtin_row` computes over
+    the last `window` samples, without rescanning them:
+
+    - mean/std: Welford running moments with removal of the evicted sample
+    - min/max: monotonic deques of (sample index, value)
+    - median/p95/p99: a sorted copy of the window maintained with bisect,
+      read with numpy's linear interpolation
+    - current/rate: the last two samples
+
+    Mean, std, min, max, current and rate cost O(1) per sample; keeping
+    the window sorted is O(log w) to search plus a C-level memmove.
+    Moments are recomputed exactly every 64 windows to bound drift.
+    """
+
+    def __init__(self, window: int):
+        """
+        Initialize the statistics.
+
+        Args:
+            window: Number of most recent samples covered
+
+        Raises:
+            ValueError: If window is not positive
+        """
+        if window < 1:
+            raise ValueError("window must be >= 1")
+        self.window = window
+        self._values: Deque[float] = deque()
+        self._sorted: List[float] = []
+        self._min: Deque[Tuple[int, float]] = deque()
+        self._max: Deque[Tuple[int, float]] = deque()
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._count = 0  # samples ever appended; index of the next sample
+        self._previous = 0.0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def append(self, value: float) -> None:
+        """
+        Add one sample, evicting the oldest once the window is full.
+
+        Raises:
+            ValueError: If the sample is NaN or infinite
+        """
+        value = float(value)
+        if not math.isfinite(value):
+            raise ValueError(f"Non-finite sample: {value}")
+        if len(self._values) == self.window:
+            self._evict(self._values.popleft())
+
+        if self._values:
+            self._previous = self._values[-1]
+        self._values.append(value)
+        bisect.insort(self._sorted, value)
+
+        n = len(self._values)
+        delta = value - self._mean
+        self._mean += delta / n
+        self._m2 += delta * (value - self._mean)
+
+        index = self._count
+        self._count += 1
+        if self._count % (self.window * 64) == 0:
+            self._refresh()
+        oldest = index - n + 1
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((index, value))
+        while self._min[0][0] < oldest:
+            self._min.popleft()
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((index, value))
+        while self._max[0][0] < oldest:
+            self._max.popleft()
+
+    def _evict(self, value: float) -> None:
+        del self._sorted[bisect.bisect_left(self._sorted, value)]
+        n = len(self._values)  # after popleft
+        if n == 0:
+            self._mean = self._m2 = 0.0
+            return
+        delta = value - self._mean
+        self._mean -= delta / n
+        self._m2 -= delta * (value - self._mean)
+
+    def _refresh(self) -> None:
+        """Recompute the moments exactly to bound drift from removals (amortized O(1))."""
+        n = len(self._values)
+        self._mean = math.fsum(self._values) / n
+        self._m2 = math.fsum((v - self._mean) ** 2 for v in self._values)
+
+    def quantile(self, q: float) -> float:
+        """Quantile in [0, 1] with numpy's default linear interpolation."""
+        data = self._sorted
+        position = q * (len(data) - 1)
+        lower = math.floor(position)
+        upper = min(lower + 1, len(data) - 1)
+        return data[lower] + (data[upper] - data[lower]) * (position - lower)
+
+    def features(self, prefix: str) -> Dict[str, float]:
+        """
+        Current features named like `MetricsProcessor._builtin_row`.
+
+        Raises:
+            ValueError: If no sample has been appended
+        """
+        n = len(self._values)
+        if n == 0:
+            raise ValueError("No samples in window")
+        return {
+            f"{prefix}_mean": self._mean,
+            f"{prefix}_std": math.sqrt(max(self._m2, 0.0) / n),
+            f"{prefix}_min": self._min[0][1],
+            f"{prefix}_max": self._max[0][1],
+            f"{prefix}_median": self.quantile(0.5),
+            f"{prefix}_current": self._values[-1],
+            f"{prefix}_rate": self._values[-1] - self._previous if n > 1 else 0.0,
+            f"{prefix}_p95": self.quantile(0.95),
+            f"{prefix}_p99": self.quantile(0.99),
+        }
+
+
+class IncrementalFeatureState:
+    """
+    Per-series incremental feature state.
+
+    Holds one `WindowedStats` per metric so each new sample updates that
+    series' features in (near) constant time instead of recomputing them
+    over the whole window.
+    """
+
+    def __init__(self, window: int = 240):
+        """
+        Initialize the state.
+
+        Args:
+            window: Samples covered per metric
+        """
+        self.window = window
+        self.metrics: Dict[str, WindowedStats] = {}
+
+    def update(self, sample: Mapping[str, float]) -> Dict[str, float]:
+        """
+        Append one sample per metric and return the updated feature row.
+
+        NaN or infinite values (e.g. a JSON null for a missed scrape) are
+        skipped: that metric's window simply gets no sample this time.
+
+        Args:
+            sample: Metric name -> new value
+
+        Returns:
+            Dict[str, float]: Feature name -> value for every metric seen so far
+        """
+        for name, value in sample.items():
+            if not math.isfinite(value):
+                continue
+            stats = self.metrics.get(name)
+            if stats is None:
+                stats = self.metrics[name] = WindowedStats(self.window)
+            stats.append(value)
+        return self.features()
+
+    def features(self) -> Dict[str, float]:
+        """Return the current feature row."""
+        row: Dict[str, float] = {}
+        for name, stats in self.metrics.items():
+            if len(stats):
+                row.update(stats.features(name))
+        return row
@@ -1,11 +1,128 @@
 import logging
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Optional
+from typing import Any, Collection, Dict, List, Optional, Tuple
 from datetime import datetime
 
+try:
+    from ml_pipeline.data.quantile_sketch import DDSketch
+    SKETCH_AVAILABLE = True
+except ImportError:
+    SKETCH_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Built-in summary features per metric, in column order
+SUMMARY_FEATURES = ("mean", "std", "min", "max", "median", "current", "rate", "p95", "p99")
+
+
+def summary_features(values: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    Compute the built-in summary features for many series at once.
+    
+    Series are given as one concatenated values array plus offsets
+    (series i spans `values[offsets[i]:offsets[i + 1]]`, every series
+    non-empty). Moments and extrema come from `reduceat`; the order
+    statistics from a single segmented sort, read with numpy's linear
+    interpolation. Series containing NaN get NaN for every statistic
+    except current and rate, as with the per-series numpy reductions.
+    
+    Args:
+        values: Concatenated float samples
+        offsets: Series boundaries, length N + 1
+        
+    Returns:
+        np.ndarray: N x 9 matrix in `SUMMARY_FEATURES` order
+    """
+    values = np.asarray(values, dtype=np.float64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    starts, ends = offsets[:-1], offsets[1:]
+    counts = ends - starts
+    segment = np.repeat(np.arange(len(counts)), counts)
+    
+    mean = np.add.reduceat(values, starts) / counts
+    std = np.sqrt(np.add.reduceat((values - mean[segment]) ** 2, starts) / counts)
+    
+    # sort once: segment-major, value-minor (NaNs sort last within a segment)
+    ordered = values[np.lexsort((values, segment))]
+    
+    def percentile(q: float) -> np.ndarray:
+        position = q * (counts - 1)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, counts - 1)
+        low, high = ordered[starts + lower], ordered[starts + upper]
+        return low + (high - low) * (position - lower)
+    
+    current = values[ends - 1]
+    previous = values[np.maximum(ends - 2, starts)]
+    
+    matrix = np.column_stack((
+        mean,
+        std,
+        ordered[starts],
+        ordered[ends - 1],
+        percentile(0.5),
+        current,
+        np.where(counts > 1, current - previous, 0.0),
+        percentile(0.95),
+        percentile(0.99),
+    ))
+    has_nan = np.add.reduceat(np.isnan(values), starts) > 0
+    if has_nan.any():
+        matrix[np.ix_(has_nan, [0, 1, 2, 3, 4, 7, 8])] = np.nan
+    return matrix
+
+
+def ragged_summary_features(arrays: List[np.ndarray]) -> np.ndarray:
+    """`summary_features` for a list of non-empty series."""
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+    np.cumsum([len(a) for a in arrays], out=offsets[1:])
+    return summary_features(np.concatenate(arrays), offsets)
+
+
+def group_metric_values(
+    raws: List[Dict[str, Any]],
+    metrics: Optional[Collection[str]] = None,
+) -> Dict[str, Tuple[List[int], List[np.ndarray]]]:
+    """
+    Collect each metric's series across workloads.
+    
+    Args:
+        raws: List of dictionaries of metric name -> values/timestamps
+        metrics: Only keep these metric names (default: all)
+        
+    Returns:
+        Dict: metric -> (workload indices, value arrays), in first-seen order
+        
+    Raises:
+        ValueError: If any workload is empty or has no usable metric
+    """
+    grouped: Dict[str, Tuple[List[int], List[np.ndarray]]] = {}
+    for idx, raw in enumerate(raws):
+        if not raw:
+            raise ValueError(f"Raw metrics dictionary at index {idx} is empty")
+        usable = False
+        for metric_name, metric_data in raw.items():
+            if metrics is not None and metric_name not in metrics:
+                continue
+            if isinstance(metric_data, dict):
+                values = metric_data.get('values', [])
+            elif isinstance(metric_data, list):
+                values = metric_data
+            else:
+                logger.warning(f"Unexpected metric format for {metric_name}")
+                continue
+            if len(values) == 0:
+                logger.warning(f"No values for metric {metric_name}")
+                continue
+            rows, arrays = grouped.setdefault(metric_name, ([], []))
+            rows.append(idx)
+            arrays.append(np.asarray(values, dtype=float).ravel())
+            usable = True
+        if not usable:
+            raise ValueError(f"No usable metrics at index {idx}")
+    return grouped
+
 
 class MetricsProcessor:
     """
@@ -15,15 +132,21 @@ class MetricsProcessor:
     and time-based features.
     """
 
-    def __init__(self, window_size: int = 60):
+    def __init__(self, window_size: int = 60, sketch_accuracy: Optional[float] = None):
         """
         Initialize the metrics processor.
         
         Args:
             window_size: Number of time points for rolling window calculations
+            sketch_accuracy: Relative accuracy of DDSketch percentiles; None
+                computes exact percentiles
         """
         try:
             self.window_size = window_size
+            if sketch_accuracy is not None and not SKETCH_AVAILABLE:
+                logger.warning("Quantile sketch requested but ml_pipeline is not available, using exact percentiles")
+                sketch_accuracy = None
+            self.sketch_accuracy = sketch_accuracy
             logger.info(f"MetricsProcessor initialized with window_size={window_size}")
             
             # Try to import feature engineer if available
@@ -77,6 +200,83 @@ class MetricsProcessor:
             logger.error(f"Feature transformation failed: {e}", exc_info=True)
             raise ValueError(f"Failed to transform metrics: {e}") from e
 
+    def to_features_batch(self, raws: List[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        Convert many workloads' raw metrics into one feature matrix.
+        
+        Each workload contributes exactly one row, in input order, so the
+        result can be scored with a single model call. Features missing for
+        a workload (e.g. a metric it did not report) are filled with 0.0.
+        
+        Args:
+            raws: List of dictionaries of metric name -> values/timestamps
+            
+        Returns:
+            pd.DataFrame: Feature matrix with one row per workload
+            
+        Raises:
+            ValueError: If the batch is empty or any workload yields no features
+        """
+        try:
+            if not raws:
+                logger.warning("Empty batch provided")
+                raise ValueError("Batch of raw metrics is empty")
+            
+            if self.sketch_accuracy is not None:
+                rows = []
+                for idx, raw in enumerate(raws):
+                    if not raw:
+                        raise ValueError(f"Raw metrics dictionary at index {idx} is empty")
+                    row = self._builtin_row(raw)
+                    if not row:
+                        raise ValueError(f"No usable metrics at index {idx}")
+                    rows.append(row)
+                df = pd.DataFrame.from_records(rows).fillna(0.0)
+            else:
+                matrix, columns = self.to_feature_matrix(raws)
+                df = pd.DataFrame(matrix, columns=columns)
+            
+            logger.debug(f"Generated {df.shape[0]}x{df.shape[1]} batch feature matrix")
+            
+            return df
+            
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error(f"Batch feature transformation failed: {e}", exc_info=True)
+            raise ValueError(f"Failed to transform metrics batch: {e}") from e
+
+    def to_feature_matrix(self, raws: List[Dict[str, Any]]) -> Tuple[np.ndarray, List[str]]:
+        """
+        Built-in features for many workloads as one N x F float matrix.
+        
+        Each metric's series from every workload are concatenated with
+        offsets and reduced together by `summary_features`, so the cost
+        is a few vectorized passes per metric rather than nine numpy
+        reductions per metric per workload. Columns match
+        `to_features_batch`; missing metrics and NaN features are 0.0.
+        
+        Args:
+            raws: List of dictionaries of metric name -> values/timestamps
+            
+        Returns:
+            Tuple: (N x F float64 matrix, column names)
+            
+        Raises:
+            ValueError: If any workload is empty or yields no features
+        """
+        grouped = group_metric_values(raws)
+        
+        width = len(SUMMARY_FEATURES)
+        matrix = np.zeros((len(raws), width * len(grouped)), dtype=np.float64)
+        columns: List[str] = []
+        for j, (metric_name, (rows, arrays)) in enumerate(grouped.items()):
+            matrix[rows, j * width:(j + 1) * width] = ragged_summary_features(arrays)
+            columns.extend(f"{metric_name}_{name}" for name in SUMMARY_FEATURES)
+        
+        np.nan_to_num(matrix, copy=False, nan=0.0, posinf=np.inf, neginf=-np.inf)
+        return matrix, columns
+
     def _builtin_transform(self, raw: Dict[str, Any]) -> pd.DataFrame:
         """
         Built-in feature engineering when ml_pipeline is not available.
@@ -88,49 +288,10 @@ class MetricsProcessor:
             pd.DataFrame: Engineered features
         """
         try:
-            features = {}
-            
-            # Process each metric
-            for metric_name, metric_data in raw.items():
-                if isinstance(metric_data, dict):
-                    values = metric_data.get('values', [])
-                    timestamps = metric_data.get('timestamps', [])
-                elif isinstance(metric_data, list):
-                    values = metric_data
-                    timestamps = list(range(len(values)))
-                else:
-                    logger.warning(f"Unexpected metric format for {metric_name}")
-                    continue
-                
-                if not values:
-                    logger.warning(f"No values for metric {metric_name}")
-                    continue
-                
-                # Convert to numpy array
-                values_array = np.array(values, dtype=float)
-                
-                # Basic statistics
-                features[f"{metric_name}_mean"] = [np.mean(values_array)]
-                features[f"{metric_name}_std"] = [np.std(values_array)]
-                features[f"{metric_name}_min"] = [np.min(values_array)]
-                features[f"{metric_name}_max"] = [np.max(values_array)]
-                features[f"{metric_name}_median"] = [np.median(values_array)]
-                
-                # Current value (last in series)
-                features[f"{metric_name}_current"] = [values_array[-1]]
-                
-                # Rate of change
-                if len(values_array) > 1:
-                    features[f"{metric_name}_rate"] = [values_array[-1] - values_array[-2]]
-                else:
-                    features[f"{metric_name}_rate"] = [0.0]
-                
-                # Percentiles
-                features[f"{metric_name}_p95"] = [np.percentile(values_array, 95)]
-                features[f"{metric_name}_p99"] = [np.percentile(values_array, 99)]
+            features = self._builtin_row(raw)
             
             # Create DataFrame
-            df = pd.DataFrame(features)
+            df = pd.DataFrame({name: [value] for name, value in features.items()})
             
             logger.debug(f"Generated {len(df.columns)} features from {len(raw)} metrics")
             
@@ -140,6 +301,91 @@ class MetricsProcessor:
             logger.error(f"Built-in transformation failed: {e}", exc_info=True)
             raise
 
+    def _builtin_row(self, raw: Dict[str, Any]) -> Dict[str, float]:
+        """
+        Compute the built-in summary features for a single workload.
+        
+        Args:
+            raw: Dictionary of metric name -> values
+            
+        Returns:
+            Dict[str, float]: Feature name -> value
+        """
+        features: Dict[str, float] = {}
+        
+        # Process each metric
+        for metric_name, metric_data in raw.items():
+            if isinstance(metric_data, dict):
+                values = metric_data.get('values', [])
+            elif isinstance(metric_data, list):
+                values = metric_data
+            else:
+                logger.warning(f"Unexpected metric format for {metric_name}")
+                continue
+            
+            if len(values) == 0:
+                logger.warning(f"No values for metric {metric_name}")
+                continue
+            
+            # Convert to numpy array
+            values_array = np.asarray(values, dtype=float)
+            
+            # Basic statistics
+            features[f"{metric_name}_mean"] = float(np.mean(values_array))
+            features[f"{metric_name}_std"] = float(np.std(values_array))
+            features[f"{metric_name}_min"] = float(np.min(values_array))
+            features[f"{metric_name}_max"] = float(np.max(values_array))
+            if self.sketch_accuracy is not None:
+                # one bucketing pass answers all three percentiles
+                median, p95, p99 = DDSketch(self.sketch_accuracy).add_many(values_array).quantiles([0.5, 0.95, 0.99])
+            else:
+                median = np.median(values_array)
+                p95, p99 = np.percentile(values_array, [95, 99])
+            features[f"{metric_name}_median"] = float(median)
+            
+            # Current value (last in series)
+            features[f"{metric_name}_current"] = float(values_array[-1])
+            
+            # Rate of change
+            if len(values_array) > 1:
+                features[f"{metric_name}_rate"] = float(values_array[-1] - values_array[-2])
+            else:
+                features[f"{metric_name}_rate"] = 0.0
+            
+            # Percentiles
+            features[f"{metric_name}_p95"] = float(p95)
+            features[f"{metric_name}_p99"] = float(p99)
+        
+        return features
+
+    def sketches(self, raw: Dict[str, Any], relative_accuracy: float = 0.01) -> Dict[str, "DDSketch"]:
+        """
+        Build one mergeable quantile sketch per metric.
+        
+        Sketches from many workloads or windows can be merged with
+        `DDSketch.merged` to get namespace- or deployment-level percentiles
+        without the raw samples.
+        
+        Args:
+            raw: Dictionary of metric name -> values
+            relative_accuracy: Relative error bound of the sketch quantiles
+            
+        Returns:
+            Dict[str, DDSketch]: Metric name -> sketch
+            
+        Raises:
+            RuntimeError: If ml_pipeline is not available
+        """
+        if not SKETCH_AVAILABLE:
+            raise RuntimeError("Quantile sketches require ml_pipeline")
+        
+        result = {}
+        for metric_name, metric_data in raw.items():
+            values = metric_data.get('values', []) if isinstance(metric_data, dict) else metric_data
+            if len(values) > 0:
+                result[metric_name] = DDSketch(relative_accuracy).add_many(values)
+        return result
+
     def validate_features(self, features: pd.DataFrame) -> bool:
         """
         Validate that features are in expected format.
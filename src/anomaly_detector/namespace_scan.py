@@ -0,0 +1,125 @@
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GROUP_BY = ("pod", "container")
+
+RawMetrics = Dict[str, Dict[str, np.ndarray]]
+
+
+def split_series(
+    metrics: Dict[str, Dict[str, Any]],
+    group_by: Sequence[str] = DEFAULT_GROUP_BY,
+) -> Tuple[List[Dict[str, str]], List[RawMetrics]]:
+    """
+    Split Prometheus range-query results into one raw metrics dict per series.
+
+    Series are identified by the `group_by` label values. When several
+    result series of the same metric map to one identity (e.g. one per
+    network interface), their values are summed per timestamp.
+
+    Args:
+        metrics: Metric name -> Prometheus matrix data (`{"result": [...]}`)
+        group_by: Labels identifying a workload series
+
+    Returns:
+        Tuple: (label dicts, raw metrics dicts), aligned by index
+    """
+    parts: Dict[Tuple[str, ...], Dict[str, List[np.ndarray]]] = {}
+    namespaces: Dict[Tuple[str, ...], str] = {}
+
+    for metric_name, data in metrics.items():
+        for series in (data or {}).get("result", []):
+            labels = series.get("metric", {})
+            key = tuple(labels.get(label, "") for label in group_by)
+            pairs = np.asarray(series.get("values", []), dtype=np.float64).reshape(-1, 2)
+            if len(pairs) == 0:
+                continue
+            parts.setdefault(key, {}).setdefault(metric_name, []).append(pairs)
+            namespaces.setdefault(key, labels.get("namespace", ""))
+
+    series_labels, raws = [], []
+    for key, by_metric in parts.items():
+        raw: RawMetrics = {}
+        for metric_name, chunks in by_metric.items():
+            if len(chunks) == 1:
+                timestamps, values = chunks[0][:, 0], chunks[0][:, 1]
+            else:
+                stacked = np.concatenate(chunks)
+                timestamps, inverse = np.unique(stacked[:, 0], return_inverse=True)
+                values = np.bincount(inverse, weights=stacked[:, 1], minlength=len(timestamps))
+            raw[metric_name] = {"timestamps": timestamps, "values": values}
+
+        labels = dict(zip(group_by, key))
+        labels["namespace"] = namespaces[key]
+        series_labels.append(labels)
+        raws.append(raw)
+
+    logger.debug(f"Split {len(metrics)} metrics into {len(raws)} series")
+    return series_labels, raws
+
+
+def rank_series(
+    series_labels: List[Dict[str, str]],
+    scores: np.ndarray,
+    top_k: int = 20,
+) -> List[Dict[str, Any]]:
+    """
+    Rank series by anomaly score, most anomalous first.
+
+    Args:
+        series_labels: Label dicts aligned with scores
+        scores: Anomaly score per series
+        top_k: Number of series to return
+
+    Returns:
+        List: `{"labels", "anomaly_score"}` entries, highest score first
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    order = np.argsort(-scores, kind="stable")[:top_k]
+    return [
+        {"labels": series_labels[i], "anomaly_score": float(scores[i])}
+        for i in order
+    ]
+
+
+async def scan_namespace(
+    client: Any,
+    score_batch: Callable[[List[RawMetrics]], Awaitable[np.ndarray]],
+    namespace: str,
+    start: str,
+    end: str,
+    group_by: Sequence[str] = DEFAULT_GROUP_BY,
+    top_k: int = 20,
+) -> Dict[str, Any]:
+    """
+    Fetch the default metric set for a namespace and rank its series.
+
+    Args:
+        client: PrometheusClient used to fetch the default metrics
+        score_batch: Coroutine scoring a list of raw metrics dicts at once
+        namespace: Kubernetes namespace to scan
+        start: Start timestamp
+        end: End timestamp
+        group_by: Labels identifying a workload series
+        top_k: Number of series to return
+
+    Returns:
+        Dict: `series_scored` count and ranked `results`
+    """
+    metrics = await client.get_default_metrics(start=start, end=end, namespace=namespace)
+    series_labels, raws = split_series(metrics, group_by)
+
+    if not raws:
+        logger.info(f"No series found for namespace {namespace}")
+        return {"series_scored": 0, "results": []}
+
+    scores = await score_batch(raws)
+    logger.info(f"Scanned {len(raws)} series in namespace {namespace}")
+    return {
+        "series_scored": len(raws),
+        "results": rank_series(series_labels, scores, top_k),
+    }
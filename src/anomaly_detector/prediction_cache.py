@@ -0,0 +1,114 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Sequence
+
+import numpy as np
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics for the result cache
+cache_hits = Counter("anomaly_detector_prediction_cache_hits_total", "Prediction cache hits")
+cache_misses = Counter("anomaly_detector_prediction_cache_misses_total", "Prediction cache misses")
+cache_size = Gauge("anomaly_detector_prediction_cache_entries", "Entries in the prediction cache")
+
+
+class PredictionCache:
+    """
+    In-process LRU + TTL cache of per-row anomaly scores.
+
+    Entries are keyed by the model version and a hash of the feature
+    schema and row values, so identical metric windows scored against the
+    same model skip inference. Safe to share between worker threads.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 30.0):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of cached rows
+            ttl_seconds: Lifetime of an entry in seconds
+        """
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, score)
+        self._lock = threading.Lock()
+        logger.info(f"PredictionCache initialized: max_size={max_size}, ttl={ttl_seconds}s")
+
+    @staticmethod
+    def fingerprint(
+        values: np.ndarray,
+        columns: Sequence[str],
+        model_version: Optional[str],
+    ) -> List[Hashable]:
+        """
+        Compute one cache key per feature row.
+
+        Args:
+            values: 2-D feature matrix
+            columns: Feature column names, in matrix order
+            model_version: Version of the model producing the scores
+
+        Returns:
+            List: Cache keys, one per row
+        """
+        rows = np.ascontiguousarray(values, dtype=np.float64)
+        schema = "\x1f".join(map(str, columns)).encode()
+        keys = []
+        for row in rows:
+            digest = hashlib.blake2b(schema, digest_size=16)
+            digest.update(row.tobytes())
+            keys.append((model_version, digest.digest()))
+        return keys
+
+    def get_many(self, keys: Sequence[Hashable]) -> List[Optional[float]]:
+        """
+        Look up scores, returning None for missing or expired keys.
+        """
+        now = time.monotonic()
+        found: List[Optional[float]] = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    found.append(entry[1])
+                else:
+                    if entry is not None:
+                        del self._entries[key]
+                    found.append(None)
+            cache_size.set(len(self._entries))
+
+        hits = sum(score is not None for score in found)
+        if hits:
+            cache_hits.inc(hits)
+        if len(found) - hits:
+            cache_misses.inc(len(found) - hits)
+        return found
+
+    def put_many(self, keys: Sequence[Hashable], scores: Sequence[float]) -> None:
+        """
+        Store scores, evicting least recently used entries beyond max_size.
+        """
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            for key, score in zip(keys, scores):
+                self._entries[key] = (expires_at, float(score))
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            cache_size.set(len(self._entries))
+
+    def clear(self) -> None:
+        """Drop every entry (e.g. after a model swap)."""
+        with self._lock:
+            self._entries.clear()
+            cache_size.set(0)
+        logger.info("Prediction cache cleared")
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,71 @@
+import logging
+from typing import Dict, List, Mapping, Sequence
+
+import numpy as np
+
+from anomaly_detector.incremental import IncrementalFeatureState
+
+logger = logging.getLogger(__name__)
+
+
+class SeriesSession:
+    """
+    Server-side state for one streamed series.
+
+    Keeps an `IncrementalFeatureState` so clients only push new samples and
+    each sample updates the features in (near) constant time. Each pushed
+    timestamp yields the feature row for the window ending at that sample,
+    with the same columns as `MetricsProcessor.to_features_batch`.
+    """
+
+    def __init__(self, key: str, window_size: int = 240):
+        """
+        Initialize the session.
+
+        Args:
+            key: Series identifier chosen by the client
+            window_size: Samples retained per metric
+        """
+        self.key = key
+        self.window_size = window_size
+        self.state = IncrementalFeatureState(window_size)
+        self.samples_seen = 0
+        # sequence-model state carried between pushes (see AnomalyDetector.predict_sequence)
+        self.history = None
+
+    def push(
+        self,
+        timestamps: Sequence[float],
+        values: Mapping[str, Sequence[float]],
+    ) -> List[Dict[str, float]]:
+        """
+        Append new samples and return one feature row per timestamp.
+
+        Args:
+            timestamps: New sample timestamps
+            values: Metric name -> new values aligned with timestamps
+
+        Returns:
+            List: Feature rows (feature name -> value), one per new timestamp
+
+        Raises:
+            ValueError: If the message is empty or arrays are misaligned
+        """
+        if not values:
+            raise ValueError("No metric values provided")
+
+        n = len(timestamps)
+        arrays = {}
+        for name, column in values.items():
+            array = np.asarray(column, dtype=np.float64)
+            if array.shape != (n,):
+                raise ValueError(f"Metric '{name}' has {array.size} values for {n} timestamps")
+            arrays[name] = array.tolist()
+
+        rows = [
+            self.state.update({name: column[i] for name, column in arrays.items()})
+            for i in range(n)
+        ]
+
+        self.samples_seen += n
+        return rows
@@ -0,0 +1,172 @@
+"""Adaptive micro-batching of concurrent single-item predictions."""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from prometheus_client import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics for tuning the batching window
+batch_size_histogram = Histogram(
+    "anomaly_detector_batch_size",
+    "Rows per micro-batched model call",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+batch_queue_wait = Histogram(
+    "anomaly_detector_batch_queue_wait_seconds",
+    "Time a request waited in the micro-batch queue before dispatch",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+
+_Features = Union[pd.DataFrame, np.ndarray]
+_Pending = Tuple[_Features, "asyncio.Future[np.ndarray]", float]
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent predictions into one model call.
+
+    Requests are queued and a background task stacks their feature rows
+    into a single DataFrame per dispatch. When no batch is in flight the
+    queue is dispatched immediately, so an idle service adds no latency;
+    under load the dispatcher waits up to `window_ms` for more requests or
+    until `max_batch_size` rows are gathered. Rows with different feature
+    columns are dispatched as separate batches; schema-encoded arrays are
+    stacked with `np.concatenate` and grouped by width.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[_Features], Awaitable[np.ndarray]],
+        window_ms: float = 5.0,
+        max_batch_size: int = 64,
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            predict_fn: Coroutine scoring a feature DataFrame or array
+            window_ms: Maximum time to wait for more requests under load
+            max_batch_size: Maximum rows per model call
+        """
+        self.predict_fn = predict_fn
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._queue: Optional["asyncio.Queue[_Pending]"] = None
+        self._task: Optional[asyncio.Task] = None
+        self._dispatches: Set[asyncio.Task] = set()
+        logger.info(f"MicroBatcher initialized: window_ms={window_ms}, max_batch_size={max_batch_size}")
+
+    async def start(self) -> None:
+        """Start the background dispatch loop."""
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the dispatch loop and fail any queued requests."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        while self._queue is not None and not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher stopped"))
+
+    async def submit(self, features: _Features) -> np.ndarray:
+        """
+        Queue features for scoring and wait for their scores.
+
+        Args:
+            features: Feature rows for a single request
+
+        Returns:
+            np.ndarray: Scores for the submitted rows
+
+        Raises:
+            RuntimeError: If the batcher is not started
+        """
+        if self._queue is None or self._task is None:
+            raise RuntimeError("Micro-batcher not started")
+
+        future: "asyncio.Future[np.ndarray]" = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((features, future, time.monotonic()))
+        return await future
+
+    async def _run(self) -> None:
+        """Collect queued requests into batches and dispatch them."""
+        while True:
+            batch = [await self._queue.get()]
+            rows = len(batch[0][0])
+
+            # Under load, hold the batch open for the window to gather more
+            deadline = time.monotonic() + (self.window if self._dispatches else 0.0)
+            while rows < self.max_batch_size:
+                if not self._queue.empty():
+                    item = self._queue.get_nowait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        break
+                batch.append(item)
+                rows += len(item[0])
+
+            for group in self._group_by_columns(batch):
+                task = asyncio.get_running_loop().create_task(self._dispatch(group))
+                self._dispatches.add(task)
+                task.add_done_callback(self._dispatches.discard)
+
+    @staticmethod
+    def _group_by_columns(batch: List[_Pending]) -> List[List[_Pending]]:
+        """Split a batch so every group shares one feature schema."""
+        groups: Dict[Hashable, List[_Pending]] = {}
+        for item in batch:
+            features = item[0]
+            key = features.shape[1:] if isinstance(features, np.ndarray) else tuple(features.columns)
+            groups.setdefault(key, []).append(item)
+        return list(groups.values())
+
+    async def _dispatch(self, group: List[_Pending]) -> None:
+        """Score one group with a single call and resolve its futures."""
+        now = time.monotonic()
+        for _, _, enqueued_at in group:
+            batch_queue_wait.observe(now - enqueued_at)
+
+        frames = [features for features, _, _ in group]
+        if len(frames) == 1:
+            stacked = frames[0]
+        elif isinstance(frames[0], np.ndarray):
+            stacked = np.concatenate(frames)
+        else:
+            stacked = pd.concat(frames, ignore_index=True)
+        batch_size_histogram.observe(len(stacked))
+
+        try:
+            scores = np.asarray(await self.predict_fn(stacked))
+        except Exception as e:
+            for _, future, _ in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        offset = 0
+        for features, future, _ in group:
+            end = offset + len(features)
+            if not future.done():
+                future.set_result(scores[offset:end])
+            offset = end
@@ -0,0 +1,103 @@
+"""Decoders for the compact columnar prediction payload."""
+import json
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+JSON_CONTENT_TYPES = ("application/json",)
+MSGPACK_CONTENT_TYPES = ("application/msgpack", "application/x-msgpack")
+
+ColumnarMetrics = Dict[str, Dict[str, np.ndarray]]
+
+
+def decode_columnar(body: bytes, content_type: str) -> Tuple[ColumnarMetrics, Optional[float]]:
+    """
+    Decode a columnar prediction payload into float64 numpy arrays.
+
+    The payload has one entry per metric with parallel arrays::
+
+        {"series": {"cpu_usage": {"timestamps": [...], "values": [...]}},
+         "threshold": 0.9}
+
+    JSON arrays are converted in one `np.asarray` call per column. For
+    msgpack, a column may also be a `bin` of little-endian float64s, which
+    is wrapped with `np.frombuffer` without copying.
+
+    Args:
+        body: Raw request body
+        content_type: Request Content-Type header
+
+    Returns:
+        Tuple: (metric name -> {"timestamps", "values"} arrays, threshold)
+
+    Raises:
+        ValueError: If the content type is unsupported or the payload invalid
+    """
+    media_type = content_type.split(";")[0].strip().lower()
+
+    if media_type in MSGPACK_CONTENT_TYPES:
+        if not MSGPACK_AVAILABLE:
+            raise ValueError("msgpack payloads require the 'msgpack' package")
+        payload = msgpack.unpackb(body, raw=False)
+    elif media_type in JSON_CONTENT_TYPES or not media_type:
+        payload = orjson.loads(body) if ORJSON_AVAILABLE else json.loads(body)
+    else:
+        raise ValueError(f"Unsupported content type: {content_type}")
+
+    if not isinstance(payload, dict) or not isinstance(payload.get("series"), dict):
+        raise ValueError("Payload must be an object with a 'series' mapping")
+
+    threshold = payload.get("threshold")
+    if threshold is not None:
+        try:
+            threshold = float(threshold)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"threshold must be a number: {e}") from e
+        if not 0.0 <= threshold <= 1.0:
+            raise ValueError("threshold must be between 0 and 1")
+
+    metrics: ColumnarMetrics = {}
+    for name, series in payload["series"].items():
+        if not isinstance(series, dict):
+            raise ValueError(f"Series '{name}' must be an object")
+        timestamps = _to_array(series.get("timestamps", []), name, "timestamps")
+        values = _to_array(series.get("values", []), name, "values")
+        if timestamps.shape != values.shape:
+            raise ValueError(
+                f"Series '{name}' has {len(timestamps)} timestamps but {len(values)} values"
+            )
+        if len(values) == 0:
+            continue
+        metrics[name] = {"timestamps": timestamps, "values": values}
+
+    return metrics, threshold
+
+
+def _to_array(column: Any, name: str, field: str) -> np.ndarray:
+    """Convert one column to a 1-D float64 array."""
+    try:
+        if isinstance(column, (bytes, bytearray, memoryview)):
+            array = np.frombuffer(column, dtype="<f8")
+        else:
+            array = np.asarray(column, dtype=np.float64)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Series '{name}' has invalid {field}: {e}") from e
+
+    if array.ndim != 1:
+        raise ValueError(f"Series '{name}' {field} must be a flat array")
+    return array
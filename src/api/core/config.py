@@ -25,6 +25,20 @@ class Settings(BaseSettings):
     # Model
     model_dir: str = Field(default="/models", env="MODEL_DIR")
     model_reload_interval: int = Field(default=300, env="MODEL_RELOAD_INTERVAL")
+    prediction_cache_size: int = Field(default=10000, env="PREDICTION_CACHE_SIZE")
+    prediction_cache_ttl: float = Field(default=30.0, env="PREDICTION_CACHE_TTL")
+    metrics_window_size: int = Field(default=60, env="METRICS_WINDOW_SIZE")
+    
+    # Inference execution
+    inference_executor: str = Field(default="thread", env="INFERENCE_EXECUTOR")
+    inference_workers: int = Field(default=4, env="INFERENCE_WORKERS")
+    inference_queue_depth: int = Field(default=32, env="INFERENCE_QUEUE_DEPTH")
+    inference_retry_after: int = Field(default=1, env="INFERENCE_RETRY_AFTER")
+    
+    # Micro-batching of single-item predictions
+    batching_enabled: bool = Field(default=True, env="BATCHING_ENABLED")
+    batching_window_ms: float = Field(default=5.0, env="BATCHING_WINDOW_MS")
+    batching_max_size: int = Field(default=64, env="BATCHING_MAX_SIZE")
     
     # Prometheus
     prometheus_url: str = Field(
@@ -32,10 +46,26 @@ class Settings(BaseSettings):
         env="PROMETHEUS_URL"
     )
     prometheus_query_timeout: int = Field(default=30, env="PROMETHEUS_QUERY_TIMEOUT")
+    prometheus_max_connections: int = Field(default=100, env="PROMETHEUS_MAX_CONNECTIONS")
+    prometheus_max_keepalive_connections: int = Field(default=20, env="PROMETHEUS_MAX_KEEPALIVE_CONNECTIONS")
+    prometheus_keepalive_expiry: float = Field(default=30.0, env="PROMETHEUS_KEEPALIVE_EXPIRY")
+    prometheus_http2: bool = Field(default=False, env="PROMETHEUS_HTTP2")
+    prometheus_max_concurrency: int = Field(default=6, env="PROMETHEUS_MAX_CONCURRENCY")
+    prometheus_coalesce_requests: bool = Field(default=True, env="PROMETHEUS_COALESCE_REQUESTS")
+    prometheus_range_cache_enabled: bool = Field(default=True, env="PROMETHEUS_RANGE_CACHE_ENABLED")
+    prometheus_range_cache_max_samples: int = Field(default=1_000_000, env="PROMETHEUS_RANGE_CACHE_MAX_SAMPLES")
+    prometheus_range_cache_chunk_seconds: float = Field(default=600.0, env="PROMETHEUS_RANGE_CACHE_CHUNK_SECONDS")
+    prometheus_range_cache_max_freshness: float = Field(default=300.0, env="PROMETHEUS_RANGE_CACHE_MAX_FRESHNESS")
+    query_range_max_points: int = Field(default=11000, env="QUERY_RANGE_MAX_POINTS")
+    query_range_lttb_source_points: int = Field(default=10000, env="QUERY_RANGE_LTTB_SOURCE_POINTS")
     
     # Anomaly Detection
     anomaly_threshold_critical: float = Field(default=0.95, env="ANOMALY_THRESHOLD_CRITICAL")
     anomaly_threshold_warning: float = Field(default=0.80, env="ANOMALY_THRESHOLD_WARNING")
+    prediction_max_batch_size: int = Field(default=1000, env="PREDICTION_MAX_BATCH_SIZE")
+    streaming_window_size: int = Field(default=240, env="STREAMING_WINDOW_SIZE")
+    streaming_max_window_size: int = Field(default=5760, env="STREAMING_MAX_WINDOW_SIZE")
+    quantile_sketch_accuracy: Optional[float] = Field(default=None, env="QUANTILE_SKETCH_ACCURACY")
     
     # Alertmanager
     alertmanager_url: Optional[str] = Field(default=None, env="ALERTMANAGER_URL")
@@ -1,14 +1,57 @@
 """Dependency injection container for application components."""
 import logging
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
 from anomaly_detector.detector import AnomalyDetector
 from anomaly_detector.metrics_processor import MetricsProcessor
+from anomaly_detector.prediction_cache import PredictionCache
 from api.core.config import settings
+from api.core.batching import MicroBatcher
+from api.core.executor import InferenceExecutor
+from utils.prometheus_client import PrometheusClient
+from utils.range_cache import RangeQueryCache
 
 logger = logging.getLogger(__name__)
 
+# Per-process components used when inference runs in a process pool
+_worker_components: Dict[str, Any] = {}
+
+
+def _build_cache() -> Optional[PredictionCache]:
+    """Create the prediction cache from settings, or None if disabled."""
+    if settings.prediction_cache_size <= 0:
+        return None
+    return PredictionCache(
+        max_size=settings.prediction_cache_size,
+        ttl_seconds=settings.prediction_cache_ttl,
+    )
+
+
+def _init_worker(model_dir: str, window_size: int) -> None:
+    """Build worker-local components in each pool process."""
+    _worker_components["metrics_processor"] = MetricsProcessor(
+        window_size=window_size,
+        sketch_accuracy=settings.quantile_sketch_accuracy,
+    )
+    _worker_components["detector"] = AnomalyDetector(model_dir=model_dir, cache=_build_cache())
+
+
+def _call_in_worker(component: str, method: str, model_version: Optional[str], *args: Any) -> Any:
+    """
+    Call a component method inside a pool process.
+    
+    The worker reloads its detector when the parent has swapped models, so
+    hot-reloads propagate to every process.
+    """
+    detector = _worker_components["detector"]
+    if model_version is not None and detector.model_version != model_version:
+        detector.reload()
+    return getattr(_worker_components[component], method)(*args)
+
 
 class Container:
     """
@@ -17,6 +60,8 @@ class Container:
     Handles initialization and lifecycle of:
     - Anomaly detector (ML model)
     - Metrics processor
+    - Inference executor (worker pool for CPU-bound stages)
+    - Micro-batcher (coalesces concurrent single-item predictions)
     - External clients (Prometheus, Kubernetes)
     """
     
@@ -24,6 +69,9 @@ class Container:
         """Initialize the container."""
         self.detector: Optional[AnomalyDetector] = None
         self.metrics_processor: Optional[MetricsProcessor] = None
+        self.executor: Optional[InferenceExecutor] = None
+        self.batcher: Optional[MicroBatcher] = None
+        self.prometheus_client: Optional[PrometheusClient] = None
         self._started = False
         
     async def start(self) -> None:
@@ -42,18 +90,69 @@ class Container:
             
             # Initialize metrics processor
             logger.info("Initializing metrics processor...")
-            self.metrics_processor = MetricsProcessor(window_size=60)
+            self.metrics_processor = MetricsProcessor(
+                window_size=settings.metrics_window_size,
+                sketch_accuracy=settings.quantile_sketch_accuracy,
+            )
             logger.info("Metrics processor initialized")
             
             # Initialize anomaly detector
             logger.info(f"Initializing anomaly detector with model_dir={settings.model_dir}")
+            cache = _build_cache()
             try:
-                self.detector = AnomalyDetector(model_dir=settings.model_dir)
+                self.detector = AnomalyDetector(model_dir=settings.model_dir, cache=cache)
                 logger.info("Anomaly detector initialized")
             except Exception as e:
                 logger.warning(f"Could not initialize detector: {e}. Will retry on first request.")
                 # Create detector anyway, it will try to load model on first use
-                self.detector = AnomalyDetector(model_dir=settings.model_dir)
+                self.detector = AnomalyDetector(model_dir=settings.model_dir, cache=cache)
+            
+            # Initialize inference executor
+            logger.info(f"Initializing {settings.inference_executor} inference executor...")
+            initializer, initargs = None, ()
+            if settings.inference_executor == "process":
+                initializer, initargs = _init_worker, (settings.model_dir, settings.metrics_window_size)
+            self.executor = InferenceExecutor(
+                kind=settings.inference_executor,
+                max_workers=settings.inference_workers,
+                queue_depth=settings.inference_queue_depth,
+                initializer=initializer,
+                initargs=initargs,
+            )
+            logger.info("Inference executor initialized")
+            
+            # Initialize micro-batcher
+            if settings.batching_enabled:
+                logger.info("Initializing micro-batcher...")
+                self.batcher = MicroBatcher(
+                    predict_fn=self.predict,
+                    window_ms=settings.batching_window_ms,
+                    max_batch_size=settings.batching_max_size,
+                )
+                await self.batcher.start()
+                logger.info("Micro-batcher initialized")
+            
+            # Initialize shared Prometheus client
+            logger.info(f"Initializing Prometheus client for {settings.prometheus_url}")
+            range_cache = None
+            if settings.prometheus_range_cache_enabled:
+                range_cache = RangeQueryCache(
+                    max_samples=settings.prometheus_range_cache_max_samples,
+                    chunk_seconds=settings.prometheus_range_cache_chunk_seconds,
+                    max_freshness=settings.prometheus_range_cache_max_freshness,
+                )
+            self.prometheus_client = PrometheusClient(
+                base_url=settings.prometheus_url,
+                timeout=settings.prometheus_query_timeout,
+                max_connections=settings.prometheus_max_connections,
+                max_keepalive_connections=settings.prometheus_max_keepalive_connections,
+                keepalive_expiry=settings.prometheus_keepalive_expiry,
+                http2=settings.prometheus_http2,
+                max_concurrency=settings.prometheus_max_concurrency,
+                range_cache=range_cache,
+                coalesce=settings.prometheus_coalesce_requests,
+            )
+            logger.info("Prometheus client initialized")
             
             self._started = True
             logger.info("Container started successfully")
@@ -74,6 +173,15 @@ class Container:
             logger.info("Stopping container...")
             
             # Cleanup resources if needed
+            if self.prometheus_client is not None:
+                await self.prometheus_client.aclose()
+            self.prometheus_client = None
+            if self.batcher is not None:
+                await self.batcher.stop()
+            self.batcher = None
+            if self.executor is not None:
+                self.executor.shutdown()
+            self.executor = None
             self.detector = None
             self.metrics_processor = None
             
@@ -110,6 +218,85 @@ class Container:
         if not self._started or self.metrics_processor is None:
             raise RuntimeError("Container not started or metrics processor not initialized")
         return self.metrics_processor
+    
+    def get_prometheus_client(self) -> PrometheusClient:
+        """
+        Get the shared Prometheus client.
+        
+        Returns:
+            PrometheusClient: The pooled client instance
+            
+        Raises:
+            RuntimeError: If container not started
+        """
+        if not self._started or self.prometheus_client is None:
+            raise RuntimeError("Container not started or Prometheus client not initialized")
+        return self.prometheus_client
+    
+    def _has_feature_plan(self) -> bool:
+        return self.detector is not None and self.detector.plan is not None
+    
+    async def to_features(self, raw: Dict[str, Any]) -> Union[pd.DataFrame, np.ndarray]:
+        """
+        Run `MetricsProcessor.to_features` on the inference executor.
+        
+        When the loaded model ships a feature schema, its compiled plan
+        encodes the metrics straight into a float32 array instead.
+        """
+        if self._has_feature_plan():
+            return await self._run("detector", "encode", [raw])
+        return await self._run("metrics_processor", "to_features", raw)
+    
+    async def to_features_batch(self, raws: List[Dict[str, Any]]) -> Union[pd.DataFrame, np.ndarray]:
+        """Run `MetricsProcessor.to_features_batch` (or the feature plan) on the inference executor."""
+        if self._has_feature_plan():
+            return await self._run("detector", "encode", raws)
+        return await self._run("metrics_processor", "to_features_batch", raws)
+    
+    async def predict(self, features: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+        """Run `AnomalyDetector.predict` on the inference executor."""
+        return await self._run("detector", "predict", features)
+    
+    async def predict_sequence(
+        self,
+        features: Union[pd.DataFrame, np.ndarray],
+        history: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Run `AnomalyDetector.predict_sequence` on the inference executor."""
+        return await self._run("detector", "predict_sequence", features, history)
+    
+    async def score_batch(self, raws: List[Dict[str, Any]]) -> np.ndarray:
+        """Build one feature matrix for many workloads and score it in one call."""
+        features = await self.to_features_batch(raws)
+        return await self.predict(features)
+    
+    async def score(self, features: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+        """
+        Score features for a single request.
+        
+        Goes through the micro-batcher when enabled so concurrent requests
+        share one model call; otherwise calls `predict` directly.
+        """
+        if self.batcher is not None:
+            return await self.batcher.submit(features)
+        return await self.predict(features)
+    
+    async def _run(self, component: str, method: str, *args: Any) -> Any:
+        """
+        Dispatch a component method to the inference executor.
+        
+        Raises:
+            RuntimeError: If container not started
+            ExecutorSaturatedError: If the executor is at capacity
+        """
+        if not self._started or self.executor is None:
+            raise RuntimeError("Container not started or executor not initialized")
+        
+        if self.executor.kind == "process":
+            model_version = self.detector.model_version if self.detector else None
+            return await self.executor.run(_call_in_worker, component, method, model_version, *args)
+        
+        return await self.executor.run(getattr(getattr(self, component), method), *args)
 
 
 # Global container instance
@@ -0,0 +1,138 @@
+"""Bounded worker pool for CPU-bound inference stages."""
+import asyncio
+import functools
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics for the execution layer
+inference_in_flight = Gauge(
+    "anomaly_detector_inference_in_flight",
+    "Inference tasks running or queued in the worker pool",
+)
+inference_capacity = Gauge(
+    "anomaly_detector_inference_capacity",
+    "Maximum inference tasks (workers + queue depth) before rejecting",
+)
+inference_rejected = Counter(
+    "anomaly_detector_inference_rejected_total",
+    "Inference tasks rejected because the worker pool was saturated",
+)
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when the worker pool has no free slot for a new task."""
+
+
+class InferenceExecutor:
+    """
+    Run blocking feature engineering and model inference off the event loop.
+
+    Wraps a thread or process pool and bounds the number of tasks that may
+    be running or waiting at once. When the bound is reached, `run()` fails
+    fast with `ExecutorSaturatedError` instead of queueing indefinitely, so
+    callers can shed load while the event loop stays responsive.
+    """
+
+    KINDS = ("thread", "process")
+
+    def __init__(
+        self,
+        kind: str = "thread",
+        max_workers: int = 4,
+        queue_depth: int = 32,
+        initializer: Optional[Callable[..., None]] = None,
+        initargs: Tuple[Any, ...] = (),
+    ):
+        """
+        Initialize the executor.
+
+        Args:
+            kind: "thread" or "process"
+            max_workers: Number of pool workers
+            queue_depth: Tasks allowed to wait for a free worker
+            initializer: Optional per-worker initializer (process pools)
+            initargs: Arguments for the initializer
+
+        Raises:
+            ValueError: If kind or sizes are invalid
+        """
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown executor kind: {kind}. Expected one of {self.KINDS}")
+        if max_workers < 1 or queue_depth < 0:
+            raise ValueError("max_workers must be >= 1 and queue_depth must be >= 0")
+
+        self.kind = kind
+        self.max_workers = max_workers
+        self.queue_depth = queue_depth
+        self._in_flight = 0
+
+        if kind == "process":
+            self._pool: Executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=initializer,
+                initargs=initargs,
+            )
+        else:
+            self._pool = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix="inference",
+                initializer=initializer,
+                initargs=initargs,
+            )
+
+        inference_capacity.set(self.capacity)
+        logger.info(
+            f"InferenceExecutor initialized: kind={kind}, workers={max_workers}, "
+            f"queue_depth={queue_depth}"
+        )
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of running plus queued tasks."""
+        return self.max_workers + self.queue_depth
+
+    @property
+    def in_flight(self) -> int:
+        """Number of tasks currently running or queued."""
+        return self._in_flight
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run `fn(*args)` in the pool and await its result.
+
+        Only called from the event loop thread, so the in-flight counter
+        needs no locking.
+
+        Args:
+            fn: Callable to run (must be picklable for process pools)
+            *args: Positional arguments for fn
+
+        Returns:
+            Any: The return value of fn
+
+        Raises:
+            ExecutorSaturatedError: If the pool is at capacity
+        """
+        if self._in_flight >= self.capacity:
+            inference_rejected.inc()
+            logger.warning(f"Inference pool saturated ({self._in_flight}/{self.capacity})")
+            raise ExecutorSaturatedError("Inference pool saturated")
+
+        self._in_flight += 1
+        inference_in_flight.set(self._in_flight)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, functools.partial(fn, *args))
+        finally:
+            self._in_flight -= 1
+            inference_in_flight.set(self._in_flight)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the pool, cancelling tasks that have not started."""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+        logger.info("InferenceExecutor shut down")
@@ -11,7 +11,7 @@ from prometheus_client import make_asgi_app
 try:
     from api.core.config import settings
     from api.core.logging import setup_logging
-    from api.routes import health, predictions, metrics
+    from api.routes import health, predictions, metrics, streaming
 except ImportError as e:
     logging.error(f"Failed to import modules: {e}")
     raise
@@ -45,9 +45,10 @@ async def lifespan(app: FastAPI):
     """Manage application startup and shutdown."""
     logger.info("Starting application...")
     try:
-        from api.core.container import Container
+        from api.core.container import Container, set_container
         container = Container()
         await container.start()
+        set_container(container)
         logger.info("Application started successfully")
         yield
     except Exception as e:
@@ -88,6 +89,7 @@ app.add_exception_handler(Exception, global_exception_handler)
 try:
     app.include_router(health.router, tags=["Health"])
     app.include_router(predictions.router, prefix="/api/v1", tags=["Predictions"])
+    app.include_router(streaming.router, prefix="/api/v1", tags=["Predictions"])
     app.include_router(metrics.router, prefix="/api/v1", tags=["Metrics"])
     logger.info("Routes registered successfully")
 except Exception as e:
@@ -1,4 +1,4 @@
 """API routes package."""
-from . import health, predictions, metrics
+from . import health, predictions, metrics, streaming
 
-__all__ = ["health", "predictions", "metrics"]
+__all__ = ["health", "predictions", "metrics", "streaming"]
@@ -5,11 +5,33 @@ from datetime import datetime, timedelta
 
 from fastapi import APIRouter, HTTPException, Query, status
 
+from utils.downsampling import downsample_matrix, format_duration, select_step
+from utils.range_cache import parse_duration, parse_timestamp
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/metrics")
 
 
+def _get_client():
+    """
+    Get the shared Prometheus client from the container.
+    
+    Raises:
+        HTTPException: 503 if the container is not ready
+    """
+    from api.core.container import get_container
+    
+    try:
+        return get_container().get_prometheus_client()
+    except RuntimeError as e:
+        logger.error(f"Container not ready: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service not ready. Please try again later."
+        )
+
+
 @router.get("/query")
 async def query_metrics(
     query: str = Query(..., description="PromQL query"),
@@ -26,13 +48,10 @@ async def query_metrics(
         Dict: Query results
     """
     try:
-        from utils.prometheus_client import PrometheusClient
-        from api.core.config import settings
-        
         logger.info(f"Metrics query: {query}")
         
-        # Initialize Prometheus client
-        client = PrometheusClient(base_url=settings.prometheus_url)
+        # Shared, pooled Prometheus client
+        client = _get_client()
         
         # Execute query
         try:
@@ -58,12 +77,44 @@ async def query_metrics(
         )
 
 
+def _plan_step(start: str, end: str, step: str, max_points: int, downsample: str) -> str:
+    """
+    Choose the upstream step for a bounded range query.
+    
+    In "step" mode the step is coarsened until each series fits in
+    `max_points`. In "lttb" mode it is only coarsened to the configured
+    source resolution; LTTB then reduces the result to `max_points`.
+    
+    Raises:
+        HTTPException: 422 if start, end or step cannot be parsed
+    """
+    from api.core.config import settings
+    
+    try:
+        start_s, end_s, step_s = parse_timestamp(start), parse_timestamp(end), parse_duration(step)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"max_points requires parseable start, end and step: {e}"
+        )
+    
+    target = max_points if downsample == "step" else max(max_points, settings.query_range_lttb_source_points)
+    selected = select_step(start_s, end_s, step_s, target)
+    return step if selected == step_s else format_duration(selected)
+
+
 @router.get("/query_range")
 async def query_range(
     query: str = Query(..., description="PromQL query"),
     start: str = Query(..., description="Start timestamp (RFC3339 or Unix)"),
     end: str = Query(..., description="End timestamp (RFC3339 or Unix)"),
     step: str = Query("15s", description="Query resolution step width"),
+    max_points: Optional[int] = Query(None, description="Maximum points per series", ge=3),
+    downsample: str = Query(
+        "step",
+        description="How max_points is enforced: coarser step or LTTB",
+        pattern="^(step|lttb)$"
+    ),
 ) -> Dict[str, Any]:
     """
     Query Prometheus metrics over a time range.
@@ -72,19 +123,24 @@ async def query_range(
         query: PromQL query string
         start: Start timestamp
         end: End timestamp
-        step: Query resolution
+        step: Query resolution (the finest step used)
+        max_points: Optional bound on points returned per series
+        downsample: "step" to coarsen the step, "lttb" to keep visual shape
         
     Returns:
-        Dict: Query results
+        Dict: Query results and the step actually used
     """
+    from api.core.config import settings
+    
     try:
-        from utils.prometheus_client import PrometheusClient
-        from api.core.config import settings
-        
         logger.info(f"Range query: {query} from {start} to {end}")
         
-        # Initialize Prometheus client
-        client = PrometheusClient(base_url=settings.prometheus_url)
+        if max_points is not None:
+            max_points = min(max_points, settings.query_range_max_points)
+            step = _plan_step(start, end, step, max_points, downsample)
+        
+        # Shared, pooled Prometheus client
+        client = _get_client()
         
         # Execute range query
         try:
@@ -94,16 +150,21 @@ async def query_range(
                 end=end,
                 step=step
             )
-            return {
-                "status": "success",
-                "data": result
-            }
         except Exception as e:
             logger.error(f"Prometheus range query failed: {e}", exc_info=True)
             raise HTTPException(
                 status_code=status.HTTP_502_BAD_GATEWAY,
                 detail=f"Prometheus query failed: {str(e)}"
             )
+        
+        if max_points is not None and downsample == "lttb":
+            result = {**result, "result": downsample_matrix(result.get("result", []), max_points)}
+        
+        return {
+            "status": "success",
+            "data": result,
+            "step": step
+        }
             
     except HTTPException:
         raise
@@ -124,32 +185,38 @@ async def get_default_metrics() -> Dict[str, Any]:
         Dict: Default metrics data
     """
     try:
-        from utils.prometheus_client import PrometheusClient
-        from api.core.config import settings
-        
         logger.info("Fetching default metrics")
         
-        # Initialize Prometheus client
-        client = PrometheusClient(base_url=settings.prometheus_url)
+        # Shared, pooled Prometheus client
+        client = _get_client()
         
         # Get default metrics (last 1 hour)
         end_time = datetime.utcnow()
         start_time = end_time - timedelta(hours=1)
         
-        metrics = await client.get_default_metrics(
+        metrics, errors = await client.collect_default_metrics(
             start=start_time.isoformat(),
             end=end_time.isoformat()
         )
         
+        if errors and not metrics:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Prometheus queries failed: {errors}"
+            )
+        
         return {
-            "status": "success",
+            "status": "partial" if errors else "success",
             "data": metrics,
+            "errors": errors,
             "time_range": {
                 "start": start_time.isoformat(),
                 "end": end_time.isoformat()
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to fetch default metrics: {e}", exc_info=True)
         raise HTTPException(
@@ -1,11 +1,14 @@
 """Prediction endpoints for anomaly detection."""
 import logging
 from typing import Dict, List, Any, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Request, status
 from pydantic import BaseModel, Field
 
+from api.core.codecs import decode_columnar
+from api.core.executor import ExecutorSaturatedError
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/predictions")
@@ -46,6 +49,162 @@ class PredictionResponse(BaseModel):
     model_version: Optional[str] = Field(None, description="Model version used")
 
 
+class WorkloadMetrics(BaseModel):
+    """Metrics for a single workload inside a batch request."""
+    key: str = Field(..., description="Caller-defined workload key (e.g. namespace/pod)")
+    metrics: Dict[str, List[MetricSample]] = Field(
+        ...,
+        description="Dictionary of metric_name -> list of samples"
+    )
+
+
+class BatchPredictionRequest(BaseModel):
+    """Request body for batch anomaly prediction."""
+    workloads: List[WorkloadMetrics] = Field(
+        ...,
+        description="Workloads to score in a single model call",
+        min_length=1
+    )
+    threshold: Optional[float] = Field(
+        None,
+        description="Custom anomaly threshold (0-1)",
+        ge=0.0,
+        le=1.0
+    )
+
+
+class WorkloadPrediction(BaseModel):
+    """Prediction result for a single workload."""
+    key: str = Field(..., description="Workload key from the request")
+    anomaly_score: Optional[float] = Field(None, description="Anomaly score (0-1)")
+    is_anomaly: bool = Field(False, description="Whether an anomaly was detected")
+    error: Optional[str] = Field(None, description="Why the workload could not be scored")
+
+
+class BatchPredictionResponse(BaseModel):
+    """Response body for batch anomaly prediction."""
+    results: List[WorkloadPrediction] = Field(..., description="Per-workload results in request order")
+    threshold: float = Field(..., description="Threshold used for detection")
+    timestamp: str = Field(..., description="Prediction timestamp")
+    model_version: Optional[str] = Field(None, description="Model version used")
+
+
+def _get_components():
+    """
+    Get the container and its detector.
+    
+    Raises:
+        HTTPException: 503 if the container is not ready
+    """
+    from api.core.container import get_container
+    
+    try:
+        container = get_container()
+        return container, container.get_detector()
+    except RuntimeError as e:
+        logger.error(f"Container not ready: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service not ready. Please try again later."
+        )
+
+
+def _saturated() -> HTTPException:
+    """Build the fast 503 returned when the inference pool is full."""
+    from api.core.config import settings
+    
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Inference capacity exhausted. Please retry.",
+        headers={"Retry-After": str(settings.inference_retry_after)}
+    )
+
+
+def _to_raw_metrics(metrics: Dict[str, List[MetricSample]]) -> Dict[str, Dict[str, list]]:
+    """Convert request samples to the raw metrics format used by MetricsProcessor."""
+    raw_metrics = {}
+    for metric_name, samples in metrics.items():
+        if not samples:
+            continue
+        raw_metrics[metric_name] = {
+            "timestamps": [s.timestamp for s in samples],
+            "values": [s.value for s in samples]
+        }
+    return raw_metrics
+
+
+def _normalize_score(score: float) -> float:
+    """Normalize a raw model score to the 0-1 range."""
+    if score > 1.0:
+        score = min(score / 100.0, 1.0)
+    return score
+
+
+async def _score_raw(
+    container,
+    detector,
+    raw_metrics: Dict[str, Any],
+    threshold: Optional[float],
+) -> PredictionResponse:
+    """
+    Turn one workload's raw metrics into a scored prediction response.
+    
+    Raises:
+        HTTPException: If feature processing or prediction fails
+    """
+    from api.core.config import settings
+    
+    # Process metrics into features
+    try:
+        features = await container.to_features(raw_metrics)
+        logger.debug(f"Generated {features.shape[1]} features")
+    except ExecutorSaturatedError:
+        raise _saturated()
+    except Exception as e:
+        logger.error(f"Feature processing failed: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Failed to process metrics: {str(e)}"
+        )
+    
+    # Make prediction
+    try:
+        scores = await container.score(features)
+        anomaly_score = float(scores[0]) if len(scores) > 0 else 0.0
+        
+        # Normalize score to 0-1 range if needed
+        anomaly_score = _normalize_score(anomaly_score)
+        
+    except ExecutorSaturatedError:
+        raise _saturated()
+    except Exception as e:
+        logger.error(f"Prediction failed: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Prediction failed: {str(e)}"
+        )
+    
+    # Determine threshold
+    threshold = threshold or settings.anomaly_threshold_warning
+    is_anomaly = anomaly_score >= threshold
+    
+    # Get model info
+    model_info = detector.get_info()
+    
+    logger.info(
+        f"Prediction complete: score={anomaly_score:.3f}, "
+        f"is_anomaly={is_anomaly}, threshold={threshold}"
+    )
+    
+    return PredictionResponse(
+        anomaly_score=anomaly_score,
+        is_anomaly=is_anomaly,
+        threshold=threshold,
+        timestamp=datetime.utcnow().isoformat(),
+        model_version=model_info.get("model_version")
+    )
+
+
 @router.post("/predict", response_model=PredictionResponse)
 async def predict(request: PredictionRequest) -> PredictionResponse:
     """
@@ -61,22 +220,10 @@ async def predict(request: PredictionRequest) -> PredictionResponse:
         HTTPException: If prediction fails
     """
     try:
-        from api.core.container import get_container
-        from api.core.config import settings
-        
         logger.info(f"Received prediction request with {len(request.metrics)} metrics")
         
         # Get container components
-        try:
-            container = get_container()
-            detector = container.get_detector()
-            processor = container.get_metrics_processor()
-        except RuntimeError as e:
-            logger.error(f"Container not ready: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Service not ready. Please try again later."
-            )
+        container, detector = _get_components()
         
         # Validate request
         if not request.metrics:
@@ -86,57 +233,172 @@ async def predict(request: PredictionRequest) -> PredictionResponse:
             )
         
         # Convert request to raw metrics format
-        raw_metrics = {}
-        for metric_name, samples in request.metrics.items():
-            if not samples:
-                continue
-            raw_metrics[metric_name] = {
-                "timestamps": [s.timestamp for s in samples],
-                "values": [s.value for s in samples]
-            }
+        raw_metrics = _to_raw_metrics(request.metrics)
+        
+        return await _score_raw(container, detector, raw_metrics, request.threshold)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in prediction: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
+
+@router.post("/predict_columnar", response_model=PredictionResponse)
+async def predict_columnar(request: Request) -> PredictionResponse:
+    """
+    Predict anomaly score for metrics sent as parallel columnar arrays.
+    
+    Accepts `application/json` or `application/msgpack` bodies of the form
+    `{"series": {name: {"timestamps": [...], "values": [...]}}, "threshold": t}`.
+    The body is decoded straight into float64 arrays, skipping per-sample
+    validation objects.
+    
+    Args:
+        request: Raw HTTP request
+        
+    Returns:
+        PredictionResponse: Anomaly prediction result
+        
+    Raises:
+        HTTPException: If the payload is invalid or prediction fails
+    """
+    try:
+        container, detector = _get_components()
         
-        # Process metrics into features
         try:
-            features = processor.to_features(raw_metrics)
-            logger.debug(f"Generated {len(features.columns)} features")
-        except Exception as e:
-            logger.error(f"Feature processing failed: {e}", exc_info=True)
+            raw_metrics, threshold = decode_columnar(
+                await request.body(),
+                request.headers.get("content-type", "")
+            )
+        except ValueError as e:
             raise HTTPException(
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail=f"Failed to process metrics: {str(e)}"
+                detail=f"Invalid columnar payload: {str(e)}"
             )
         
-        # Make prediction
-        try:
-            scores = detector.predict(features)
-            anomaly_score = float(scores[0]) if len(scores) > 0 else 0.0
-            
-            # Normalize score to 0-1 range if needed
-            if anomaly_score > 1.0:
-                anomaly_score = min(anomaly_score / 100.0, 1.0)
-            
-        except Exception as e:
-            logger.error(f"Prediction failed: {e}", exc_info=True)
+        logger.info(f"Received columnar prediction request with {len(raw_metrics)} metrics")
+        
+        if not raw_metrics:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Prediction failed: {str(e)}"
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="No metrics provided"
             )
         
-        # Determine threshold
+        return await _score_raw(container, detector, raw_metrics, threshold)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in columnar prediction: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
+
+@router.post("/predict_batch", response_model=BatchPredictionResponse)
+async def predict_batch(request: BatchPredictionRequest) -> BatchPredictionResponse:
+    """
+    Predict anomaly scores for many workloads in one model call.
+    
+    All scorable workloads are turned into a single N-row feature matrix
+    and scored with one `detector.predict` call on the inference executor.
+    Workloads without any samples are reported individually instead of
+    failing the batch.
+    
+    Args:
+        request: Batch prediction request with keyed workloads
+        
+    Returns:
+        BatchPredictionResponse: Per-workload results in request order
+        
+    Raises:
+        HTTPException: If the batch is invalid or prediction fails
+    """
+    try:
+        from api.core.config import settings
+        
+        logger.info(f"Received batch prediction request with {len(request.workloads)} workloads")
+        
+        container, detector = _get_components()
+        
+        # Validate request
+        if len(request.workloads) > settings.prediction_max_batch_size:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Batch exceeds maximum size of {settings.prediction_max_batch_size}"
+            )
+        
+        keys = [w.key for w in request.workloads]
+        if len(set(keys)) != len(keys):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Workload keys must be unique"
+            )
+        
+        # Convert request to raw metrics, skipping workloads with no samples
+        results: Dict[str, WorkloadPrediction] = {}
+        scorable_keys, raws = [], []
+        for workload in request.workloads:
+            raw_metrics = _to_raw_metrics(workload.metrics)
+            if not raw_metrics:
+                results[workload.key] = WorkloadPrediction(
+                    key=workload.key,
+                    error="No metrics provided"
+                )
+                continue
+            scorable_keys.append(workload.key)
+            raws.append(raw_metrics)
+        
         threshold = request.threshold or settings.anomaly_threshold_warning
-        is_anomaly = anomaly_score >= threshold
         
-        # Get model info
+        if raws:
+            # Process all workloads into one feature matrix
+            try:
+                features = await container.to_features_batch(raws)
+                logger.debug(f"Generated {features.shape} batch features")
+            except ExecutorSaturatedError:
+                raise _saturated()
+            except Exception as e:
+                logger.error(f"Batch feature processing failed: {e}", exc_info=True)
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=f"Failed to process metrics: {str(e)}"
+                )
+            
+            # Single vectorized prediction over all rows
+            try:
+                scores = await container.predict(features)
+            except ExecutorSaturatedError:
+                raise _saturated()
+            except Exception as e:
+                logger.error(f"Batch prediction failed: {e}", exc_info=True)
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Prediction failed: {str(e)}"
+                )
+            
+            for key, score in zip(scorable_keys, scores):
+                anomaly_score = _normalize_score(float(score))
+                results[key] = WorkloadPrediction(
+                    key=key,
+                    anomaly_score=anomaly_score,
+                    is_anomaly=anomaly_score >= threshold
+                )
+        
         model_info = detector.get_info()
         
         logger.info(
-            f"Prediction complete: score={anomaly_score:.3f}, "
-            f"is_anomaly={is_anomaly}, threshold={threshold}"
+            f"Batch prediction complete: scored={len(scorable_keys)}, "
+            f"skipped={len(keys) - len(scorable_keys)}, threshold={threshold}"
         )
         
-        return PredictionResponse(
-            anomaly_score=anomaly_score,
-            is_anomaly=is_anomaly,
+        return BatchPredictionResponse(
+            results=[results[key] for key in keys],
             threshold=threshold,
             timestamp=datetime.utcnow().isoformat(),
             model_version=model_info.get("model_version")
@@ -145,13 +407,87 @@ async def predict(request: PredictionRequest) -> PredictionResponse:
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in prediction: {e}", exc_info=True)
+        logger.error(f"Unexpected error in batch prediction: {e}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error"
         )
 
 
+@router.get("/scan")
+async def scan_namespace(
+    namespace: str = Query(..., description="Kubernetes namespace to scan"),
+    hours: float = Query(1.0, description="Look-back window in hours", gt=0, le=24),
+    top_k: int = Query(20, description="Number of workloads to return", ge=1, le=1000),
+    threshold: Optional[float] = Query(None, description="Custom anomaly threshold (0-1)", ge=0.0, le=1.0),
+) -> Dict[str, Any]:
+    """
+    Score every container series in a namespace straight from Prometheus.
+    
+    Fetches the default metric set, builds one feature row per pod/container
+    series and scores them all in a single batched prediction.
+    
+    Args:
+        namespace: Kubernetes namespace
+        hours: Look-back window
+        top_k: Number of most anomalous workloads to return
+        threshold: Optional anomaly threshold
+        
+    Returns:
+        Dict: Ranked list of the most anomalous workloads
+    """
+    try:
+        from anomaly_detector.namespace_scan import scan_namespace as run_scan
+        from api.core.config import settings
+        
+        logger.info(f"Namespace scan requested: namespace={namespace}, hours={hours}")
+        
+        container, detector = _get_components()
+        client = container.get_prometheus_client()
+        
+        end_time = datetime.utcnow()
+        start_time = end_time - timedelta(hours=hours)
+        
+        try:
+            scan = await run_scan(
+                client,
+                container.score_batch,
+                namespace=namespace,
+                start=start_time.isoformat(),
+                end=end_time.isoformat(),
+                top_k=top_k
+            )
+        except ExecutorSaturatedError:
+            raise _saturated()
+        
+        threshold = threshold or settings.anomaly_threshold_warning
+        for result in scan["results"]:
+            result["anomaly_score"] = _normalize_score(result["anomaly_score"])
+            result["is_anomaly"] = result["anomaly_score"] >= threshold
+        
+        return {
+            "status": "success",
+            "namespace": namespace,
+            "series_scored": scan["series_scored"],
+            "results": scan["results"],
+            "threshold": threshold,
+            "model_version": detector.get_info().get("model_version"),
+            "time_range": {
+                "start": start_time.isoformat(),
+                "end": end_time.isoformat()
+            }
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Namespace scan failed: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Namespace scan failed: {str(e)}"
+        )
+
+
 @router.get("/model/info")
 async def model_info() -> Dict[str, Any]:
     """
@@ -0,0 +1,103 @@
+"""Streaming scoring sessions over WebSocket."""
+import json
+import logging
+from typing import Optional
+
+import pandas as pd
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect, status
+
+from anomaly_detector.streaming import SeriesSession
+from api.core.executor import ExecutorSaturatedError
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/predictions")
+
+
+@router.websocket("/stream")
+async def stream(
+    websocket: WebSocket,
+    series: str = Query(..., description="Series identifier for this session"),
+    window: Optional[int] = Query(None, description="Samples kept per metric", ge=1),
+    threshold: Optional[float] = Query(None, description="Custom anomaly threshold (0-1)", ge=0.0, le=1.0),
+) -> None:
+    """
+    Score a series continuously from incrementally pushed samples.
+
+    The client opens one session per series and sends only new samples:
+    `{"timestamps": [...], "values": {"cpu_usage": [...], ...}}`. The server
+    keeps incremental per-metric feature state (and, for the LSTM ensemble,
+    the series' recent forecast targets) and replies with one score per pushed
+    timestamp: `{"series": ..., "scores": [{"timestamp", "anomaly_score",
+    "is_anomaly"}, ...]}`. Invalid messages get an `{"error": ...}` reply
+    and the session stays open.
+    """
+    from api.core.config import settings
+    from api.core.container import get_container
+    from api.routes.predictions import _normalize_score
+
+    try:
+        container = get_container()
+        detector = container.get_detector()
+    except RuntimeError as e:
+        logger.error(f"Container not ready: {e}")
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
+
+    window_size = min(window or settings.streaming_window_size, settings.streaming_max_window_size)
+    threshold = threshold or settings.anomaly_threshold_warning
+    session = SeriesSession(series, window_size=window_size)
+
+    await websocket.accept()
+    logger.info(f"Streaming session opened: series={series}, window={window_size}")
+
+    try:
+        while True:
+            text = await websocket.receive_text()
+
+            try:
+                message = json.loads(text)
+                timestamps = message["timestamps"]
+                rows = session.push(timestamps, message["values"])
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                await websocket.send_json({"error": f"Invalid message: {e}"})
+                continue
+
+            if not rows:
+                await websocket.send_json({"series": series, "scores": []})
+                continue
+
+            try:
+                if detector.plan is not None:
+                    features = detector.plan.from_records(rows)
+                else:
+                    features = pd.DataFrame.from_records(rows).fillna(0.0)
+                scores, session.history = await container.predict_sequence(features, session.history)
+            except ExecutorSaturatedError:
+                await websocket.send_json({
+                    "error": "Inference capacity exhausted. Please retry.",
+                    "retry_after": settings.inference_retry_after
+                })
+                continue
+            except Exception as e:
+                logger.error(f"Streaming prediction failed: {e}", exc_info=True)
+                await websocket.send_json({"error": f"Prediction failed: {str(e)}"})
+                continue
+
+            results = []
+            for timestamp, score in zip(timestamps, scores):
+                anomaly_score = _normalize_score(float(score))
+                results.append({
+                    "timestamp": timestamp,
+                    "anomaly_score": anomaly_score,
+                    "is_anomaly": anomaly_score >= threshold
+                })
+
+            await websocket.send_json({
+                "series": series,
+                "scores": results,
+                "model_version": detector.model_version
+            })
+
+    except WebSocketDisconnect:
+        logger.info(f"Streaming session closed: series={series}, samples={session.samples_seen}")
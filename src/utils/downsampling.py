@@ -0,0 +1,136 @@
+"""Step selection and LTTB downsampling for range-query responses."""
+import logging
+import math
+from typing import Any, Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Steps chosen by auto-selection, in seconds. Picking from a fixed ladder
+# keeps steps stable as a dashboard range slides, so range-cache chunks
+# stay reusable.
+NICE_STEPS = (
+    1, 2, 5, 10, 15, 30,
+    60, 120, 300, 600, 900, 1800,
+    3600, 7200, 10800, 21600, 43200, 86400,
+)
+
+
+def select_step(start: float, end: float, step: float, max_points: int) -> float:
+    """
+    Pick the finest step that keeps a series within `max_points` samples.
+
+    Args:
+        start: Range start (Unix seconds)
+        end: Range end (Unix seconds)
+        step: Requested step in seconds (lower bound for the result)
+        max_points: Maximum samples per series
+
+    Returns:
+        float: Step in seconds, never finer than `step`
+
+    Raises:
+        ValueError: If max_points is below 2
+    """
+    if max_points < 2:
+        raise ValueError("max_points must be >= 2")
+
+    needed = max(step, (end - start) / (max_points - 1))
+    if needed <= step:
+        return step
+    for nice in NICE_STEPS:
+        if nice >= needed:
+            return float(nice)
+    return float(math.ceil(needed / NICE_STEPS[-1]) * NICE_STEPS[-1])
+
+
+def format_duration(seconds: float) -> str:
+    """Format seconds as a Prometheus duration string ("15s", "5m", "1h")."""
+    if seconds >= 3600 and seconds % 3600 == 0:
+        return f"{int(seconds // 3600)}h"
+    if seconds >= 60 and seconds % 60 == 0:
+        return f"{int(seconds // 60)}m"
+    if float(seconds).is_integer():
+        return f"{int(seconds)}s"
+    return f"{seconds}s"
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, from each of `n_out - 2` equal
+    buckets in between, the point forming the largest triangle with the
+    previously selected point and the mean of the next bucket. Bucket
+    bounds and means are computed in one vectorized pass; only the
+    per-bucket argmax follows the chain of selected points. NaN values
+    never win a bucket unless the whole bucket is NaN.
+
+    Args:
+        x: Sample positions (e.g. timestamps), increasing
+        y: Sample values
+        n_out: Number of points to keep
+
+    Returns:
+        np.ndarray: Indices of the kept points, increasing
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1][:max(n_out, 0)], dtype=np.int64)
+
+    # Bucket i covers points [starts[i], stops[i]) of the interior 1..n-2
+    edges = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(np.int64)
+    starts, stops = edges[:-1], edges[1:]
+
+    # Mean of each bucket; the last point stands in for the final next bucket
+    y_filled = np.where(np.isnan(y), 0.0, y)
+    counts = stops - starts
+    x_mean = np.add.reduceat(x[:n - 1], starts) / counts
+    y_mean = np.add.reduceat(y_filled[:n - 1], starts) / counts
+    next_x = np.append(x_mean[1:], x[-1])
+    next_y = np.append(y_mean[1:], y_filled[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i, (lo, hi) in enumerate(zip(starts, stops)):
+        ax, ay = x[a], y_filled[a]
+        area = np.abs(
+            (x[lo:hi] - ax) * (next_y[i] - ay) - (next_x[i] - ax) * (y[lo:hi] - ay)
+        )
+        a = lo + int(np.argmax(np.where(np.isnan(area), -1.0, area)))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample_matrix(result: List[Dict[str, Any]], max_points: int) -> List[Dict[str, Any]]:
+    """
+    Apply LTTB to every series of a Prometheus matrix result.
+
+    Series already within `max_points` are returned unchanged.
+
+    Args:
+        result: Matrix series (`{"metric", "values": [[ts, "value"], ...]}`)
+        max_points: Maximum samples kept per series
+
+    Returns:
+        List: Matrix series with at most `max_points` values each
+    """
+    downsampled = []
+    for series in result:
+        values = series.get("values", [])
+        if len(values) <= max_points:
+            downsampled.append(series)
+            continue
+        pairs = np.asarray(values, dtype=object)
+        keep = lttb(pairs[:, 0].astype(np.float64), pairs[:, 1].astype(np.float64), max_points)
+        downsampled.append({
+            "metric": series.get("metric", {}),
+            "values": [values[i] for i in keep],
+        })
+    return downsampled
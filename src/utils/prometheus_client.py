@@ -1,27 +1,220 @@
 """Prometheus client for querying metrics."""
+import asyncio
 import logging
-from typing import Dict, List, Any, Optional
+import time
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 
 import httpx
+from prometheus_client import Counter, Gauge
+
+from utils.range_cache import (
+    RangeQueryCache,
+    merge_series,
+    parse_duration,
+    parse_timestamp,
+    split_by_chunk,
+)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+try:
+    from ml_pipeline.data.matrix_decoder import MatrixDecoder, MatrixResult
+    MATRIX_DECODER_AVAILABLE = True
+except ImportError:
+    MATRIX_DECODER_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Prometheus metrics for the shared connection pool
+pool_in_flight = Gauge(
+    "anomaly_detector_prometheus_requests_in_flight",
+    "Requests to Prometheus currently in flight",
+)
+pool_connections = Gauge(
+    "anomaly_detector_prometheus_pool_connections",
+    "Open connections in the Prometheus client pool",
+)
+pool_max_connections = Gauge(
+    "anomaly_detector_prometheus_pool_max_connections",
+    "Configured maximum connections in the Prometheus client pool",
+)
+coalesced_requests = Counter(
+    "anomaly_detector_prometheus_coalesced_requests_total",
+    "Queries served by joining an identical in-flight Prometheus request",
+    ["endpoint"],
+)
+
+# Default metric set for anomaly detection: metric name -> PromQL template
+DEFAULT_METRIC_QUERIES: Dict[str, str] = {
+    "cpu_usage": 'rate(container_cpu_usage_seconds_total{{namespace="{namespace}"}}[5m])',
+    "memory_usage": 'container_memory_usage_bytes{{namespace="{namespace}"}}',
+    "network_rx": 'rate(container_network_receive_bytes_total{{namespace="{namespace}"}}[5m])',
+    "network_tx": 'rate(container_network_transmit_bytes_total{{namespace="{namespace}"}}[5m])',
+    "disk_read": 'rate(container_fs_reads_bytes_total{{namespace="{namespace}"}}[5m])',
+    "disk_write": 'rate(container_fs_writes_bytes_total{{namespace="{namespace}"}}[5m])',
+}
+
 
 class PrometheusClient:
-    """Client for querying Prometheus metrics."""
+    """
+    Client for querying Prometheus metrics.
+    
+    Holds one long-lived `httpx.AsyncClient` so every query reuses pooled
+    keep-alive connections. Call `aclose()` on shutdown. With a
+    `RangeQueryCache`, range queries are step-aligned and only chunks not
+    already cached (plus the open tail) are fetched. Concurrent identical
+    requests are coalesced into one upstream call whose parsed result is
+    shared, so callers must treat returned data as read-only.
+    """
     
-    def __init__(self, base_url: str, timeout: int = 30):
+    def __init__(
+        self,
+        base_url: str,
+        timeout: int = 30,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        max_concurrency: int = 6,
+        range_cache: Optional[RangeQueryCache] = None,
+        coalesce: bool = True,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
         """
         Initialize Prometheus client.
         
         Args:
             base_url: Prometheus server URL
             timeout: Request timeout in seconds
+            max_connections: Maximum concurrent connections in the pool
+            max_keepalive_connections: Idle connections kept open
+            keepalive_expiry: Seconds an idle connection is kept
+            http2: Negotiate HTTP/2 (requires the 'h2' package)
+            max_concurrency: Queries run at once by multi-query helpers
+            range_cache: Optional chunk cache for range queries
+            coalesce: Share one upstream request among identical in-flight queries
+            transport: Optional custom transport (used in tests)
         """
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
-        logger.info(f"PrometheusClient initialized: {self.base_url}")
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("HTTP/2 requested but 'h2' is not installed, using HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self.max_concurrency = max_concurrency
+        self.range_cache = range_cache
+        self.coalesce = coalesce
+        self._transport = transport
+        self._pending: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], "asyncio.Future[Dict[str, Any]]"] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._in_flight = 0
+        pool_max_connections.set(max_connections)
+        logger.info(f"PrometheusClient initialized: {self.base_url} (http2={http2})")
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+                transport=self._transport,
+            )
+        return self._client
+    
+    async def aclose(self) -> None:
+        """Close the shared HTTP client and its pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        pool_connections.set(0)
+        logger.info("PrometheusClient closed")
+    
+    def pool_stats(self) -> Dict[str, int]:
+        """
+        Report connection pool utilization.
+        
+        Returns:
+            Dict: in-flight requests, open connections and the pool limit
+        """
+        connections = 0
+        try:
+            pool = self._client._transport._pool if self._client is not None else None
+            connections = len(pool.connections) if pool is not None else 0
+        except AttributeError:
+            pass
+        pool_connections.set(connections)
+        return {
+            "in_flight": self._in_flight,
+            "connections": connections,
+            "max_connections": self.limits.max_connections,
+        }
+    
+    async def _get(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Issue a GET against the Prometheus HTTP API, coalescing duplicates.
+        
+        A request identical to one already in flight (same path and
+        parameters) awaits that request instead of issuing its own. The
+        upstream call is shielded, so a cancelled caller does not cancel it
+        for the others.
+        """
+        if not self.coalesce:
+            return await self._fetch(path, params)
+        
+        key = (path, tuple(sorted((k, str(v)) for k, v in params.items())))
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(path, params))
+            self._pending[key] = task
+            
+            def _done(finished: "asyncio.Future[Dict[str, Any]]") -> None:
+                if self._pending.get(key) is finished:
+                    del self._pending[key]
+                if not finished.cancelled():
+                    finished.exception()  # mark retrieved if every caller left
+            
+            task.add_done_callback(_done)
+        else:
+            coalesced_requests.labels(endpoint=path).inc()
+            logger.debug(f"Coalesced Prometheus request: {path} {params.get('query')}")
+        
+        return await asyncio.shield(task)
+    
+    async def _fetch(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Issue a GET against the Prometheus HTTP API and unwrap `data`.
+        
+        Raises:
+            httpx.HTTPError: On transport or HTTP status errors
+            Exception: If Prometheus reports a failed query
+        """
+        self._in_flight += 1
+        pool_in_flight.set(self._in_flight)
+        try:
+            response = await self._get_client().get(path, params=params)
+            response.raise_for_status()
+            
+            data = response.json()
+            if data.get("status") != "success":
+                raise Exception(f"Query failed: {data.get('error')}")
+            
+            return data.get("data", {})
+        finally:
+            self._in_flight -= 1
+            pool_in_flight.set(self._in_flight)
+            self.pool_stats()
     
     async def query(self, query: str, time: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -39,18 +232,7 @@ class PrometheusClient:
             if time:
                 params["time"] = time
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/api/v1/query",
-                    params=params
-                )
-                response.raise_for_status()
-                
-                data = response.json()
-                if data.get("status") != "success":
-                    raise Exception(f"Query failed: {data.get('error')}")
-                
-                return data.get("data", {})
+            return await self._get("/api/v1/query", params)
                 
         except httpx.HTTPError as e:
             logger.error(f"HTTP error querying Prometheus: {e}")
@@ -79,6 +261,14 @@ class PrometheusClient:
             Dict: Query result
         """
         try:
+            if self.range_cache is not None:
+                try:
+                    bounds = parse_timestamp(start), parse_timestamp(end), parse_duration(step)
+                except ValueError:
+                    logger.debug(f"Range query not cacheable: start={start}, end={end}, step={step}")
+                else:
+                    return await self._cached_query_range(query, *bounds)
+            
             params = {
                 "query": query,
                 "start": start,
@@ -86,18 +276,7 @@ class PrometheusClient:
                 "step": step
             }
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/api/v1/query_range",
-                    params=params
-                )
-                response.raise_for_status()
-                
-                data = response.json()
-                if data.get("status") != "success":
-                    raise Exception(f"Query failed: {data.get('error')}")
-                
-                return data.get("data", {})
+            return await self._get("/api/v1/query_range", params)
                 
         except httpx.HTTPError as e:
             logger.error(f"HTTP error querying Prometheus range: {e}")
@@ -106,6 +285,125 @@ class PrometheusClient:
             logger.error(f"Error querying Prometheus range: {e}", exc_info=True)
             raise
     
+    async def query_range_arrays(
+        self,
+        query: str,
+        start: str,
+        end: str,
+        step: str = "15s"
+    ) -> "MatrixResult":
+        """
+        Execute range query and decode the streamed body into numpy arrays.
+        
+        The response is parsed chunk by chunk as it arrives, so large
+        matrices never materialize as nested JSON lists. The range cache
+        is bypassed.
+        
+        Args:
+            query: PromQL query
+            start: Start timestamp
+            end: End timestamp
+            step: Query resolution
+            
+        Returns:
+            MatrixResult: Contiguous timestamps/values with per-series offsets
+            
+        Raises:
+            RuntimeError: If the ml_pipeline matrix decoder is not available
+        """
+        if not MATRIX_DECODER_AVAILABLE:
+            raise RuntimeError("ml_pipeline matrix decoder not available")
+        
+        params = {
+            "query": query,
+            "start": start,
+            "end": end,
+            "step": step
+        }
+        
+        self._in_flight += 1
+        pool_in_flight.set(self._in_flight)
+        try:
+            decoder = MatrixDecoder()
+            async with self._get_client().stream("GET", "/api/v1/query_range", params=params) as response:
+                if response.is_error:
+                    await response.aread()
+                    response.raise_for_status()
+                async for chunk in response.aiter_bytes():
+                    decoder.feed(chunk)
+            return decoder.close()
+        
+        except httpx.HTTPError as e:
+            logger.error(f"HTTP error querying Prometheus range: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Error querying Prometheus range: {e}", exc_info=True)
+            raise
+        finally:
+            self._in_flight -= 1
+            pool_in_flight.set(self._in_flight)
+            self.pool_stats()
+    
+    async def _cached_query_range(
+        self,
+        query: str,
+        start: float,
+        end: float,
+        step: float
+    ) -> Dict[str, Any]:
+        """
+        Serve a range query from cached chunks, fetching only what is missing.
+        
+        Consecutive missing chunks are fetched in one request and split
+        afterwards; the open tail is always fetched and never cached.
+        """
+        cache = self.range_cache
+        aligned_start, aligned_end, chunks, tail = cache.plan(start, end, step, time.time())
+        
+        parts: List[Optional[List[Dict[str, Any]]]] = [
+            cache.get((query, step, chunk_start)) for chunk_start, _ in chunks
+        ]
+        
+        runs: List[List[int]] = []
+        for i, part in enumerate(parts):
+            if part is None:
+                if runs and runs[-1][-1] == i - 1:
+                    runs[-1].append(i)
+                else:
+                    runs.append([i])
+        
+        ranges = [(chunks[run[0]][0], chunks[run[-1]][1]) for run in runs]
+        if tail is not None:
+            ranges.append(tail)
+        
+        results = await asyncio.gather(*(
+            self._get("/api/v1/query_range", {
+                "query": query,
+                "start": range_start,
+                "end": range_end,
+                "step": step
+            })
+            for range_start, range_end in ranges
+        ))
+        
+        for run, data in zip(runs, results):
+            per_chunk = split_by_chunk(data.get("result", []), [chunks[i] for i in run])
+            for i, series in zip(run, per_chunk):
+                parts[i] = series
+                cache.put((query, step, chunks[i][0]), series)
+        if tail is not None:
+            parts.append(results[-1].get("result", []))
+        
+        logger.debug(
+            f"Range query served with {len(chunks) - sum(map(len, runs))}/{len(chunks)} "
+            f"cached chunks and {len(ranges)} upstream requests"
+        )
+        
+        return {
+            "resultType": "matrix",
+            "result": merge_series(parts, aligned_start, aligned_end)
+        }
+    
     async def get_default_metrics(
         self,
         start: str,
@@ -115,6 +413,9 @@ class PrometheusClient:
         """
         Get default Kubernetes metrics for anomaly detection.
         
+        Queries run concurrently; metrics whose query failed are omitted.
+        Use `collect_default_metrics` to also get the per-metric errors.
+        
         Args:
             start: Start timestamp
             end: End timestamp
@@ -122,35 +423,59 @@ class PrometheusClient:
             
         Returns:
             Dict: Metrics data
-        """
-        try:
-            metrics = {}
             
-            # CPU usage
-            cpu_query = f'rate(container_cpu_usage_seconds_total{{namespace="{namespace}"}}[5m])'
-            metrics["cpu_usage"] = await self.query_range(cpu_query, start, end)
-            
-            # Memory usage
-            memory_query = f'container_memory_usage_bytes{{namespace="{namespace}"}}'
-            metrics["memory_usage"] = await self.query_range(memory_query, start, end)
-            
-            # Network I/O
-            network_rx_query = f'rate(container_network_receive_bytes_total{{namespace="{namespace}"}}[5m])'
-            metrics["network_rx"] = await self.query_range(network_rx_query, start, end)
-            
-            network_tx_query = f'rate(container_network_transmit_bytes_total{{namespace="{namespace}"}}[5m])'
-            metrics["network_tx"] = await self.query_range(network_tx_query, start, end)
-            
-            # Disk I/O
-            disk_read_query = f'rate(container_fs_reads_bytes_total{{namespace="{namespace}"}}[5m])'
-            metrics["disk_read"] = await self.query_range(disk_read_query, start, end)
-            
-            disk_write_query = f'rate(container_fs_writes_bytes_total{{namespace="{namespace}"}}[5m])'
-            metrics["disk_write"] = await self.query_range(disk_write_query, start, end)
-            
-            logger.info(f"Fetched {len(metrics)} default metrics")
-            return metrics
+        Raises:
+            Exception: If every query failed
+        """
+        metrics, errors = await self.collect_default_metrics(start, end, namespace)
+        if errors and not metrics:
+            raise Exception(f"All default metric queries failed: {errors}")
+        return metrics
+    
+    async def collect_default_metrics(
+        self,
+        start: str,
+        end: str,
+        namespace: str = "default",
+        step: str = "15s",
+    ) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """
+        Run the default metric queries concurrently.
+        
+        At most `max_concurrency` queries are in flight at once. A failing
+        query does not cancel the others.
+        
+        Args:
+            start: Start timestamp
+            end: End timestamp
+            namespace: Kubernetes namespace
+            step: Query resolution
             
-        except Exception as e:
-            logger.error(f"Error fetching default metrics: {e}", exc_info=True)
-            raise
+        Returns:
+            Tuple: (metric name -> data for successful queries,
+                    metric name -> error message for failed queries)
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def run(query: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.query_range(query, start, end, step)
+        
+        names = list(DEFAULT_METRIC_QUERIES)
+        results = await asyncio.gather(
+            *(run(DEFAULT_METRIC_QUERIES[name].format(namespace=namespace)) for name in names),
+            return_exceptions=True
+        )
+        
+        metrics: Dict[str, Any] = {}
+        errors: Dict[str, str] = {}
+        for name, result in zip(names, results):
+            if isinstance(result, BaseException):
+                errors[name] = str(result) or type(result).__name__
+            else:
+                metrics[name] = result
+        
+        if errors:
+            logger.warning(f"Default metric queries failed: {errors}")
+        logger.info(f"Fetched {len(metrics)}/{len(names)} default metrics")
+        return metrics, errors
@@ -0,0 +1,219 @@
+"""Step-aligned chunk cache for Prometheus range queries."""
+import logging
+import math
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics for the range-query cache
+range_cache_chunks = Counter(
+    "anomaly_detector_prometheus_range_cache_chunks_total",
+    "Range-query chunks served from cache or fetched",
+    ["result"],
+)
+range_cache_samples = Gauge(
+    "anomaly_detector_prometheus_range_cache_samples",
+    "Samples held in the range-query cache",
+)
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h|d|w|y)")
+_DURATION_UNITS = {
+    "ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800, "y": 31536000,
+}
+
+Series = Dict[str, Any]
+
+
+def parse_timestamp(value: Any) -> float:
+    """
+    Parse a Prometheus API timestamp (Unix seconds or RFC3339) to Unix seconds.
+
+    Naive datetimes are interpreted as UTC.
+
+    Raises:
+        ValueError: If the value cannot be parsed
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def parse_duration(value: Any) -> float:
+    """
+    Parse a Prometheus duration ("15s", "1h30m") or float seconds.
+
+    Raises:
+        ValueError: If the value cannot be parsed or is not positive
+    """
+    text = str(value).strip()
+    try:
+        seconds = float(text)
+    except ValueError:
+        parts = _DURATION_RE.findall(text)
+        if not parts or "".join(n + u for n, u in parts) != text:
+            raise ValueError(f"Invalid duration: {value}")
+        seconds = sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+    if seconds <= 0:
+        raise ValueError(f"Duration must be positive: {value}")
+    return seconds
+
+
+class RangeQueryCache:
+    """
+    Query-frontend style cache of immutable range-query chunks.
+
+    Range queries are aligned to their step and split into fixed chunks
+    whose boundaries are multiples of the chunk length. Chunks that ended
+    more than `max_freshness` seconds ago are treated as immutable and
+    cached; only the open tail is fetched again on repeat queries. The
+    cache is bounded by the total number of samples held.
+    """
+
+    def __init__(
+        self,
+        max_samples: int = 1_000_000,
+        chunk_seconds: float = 600.0,
+        max_freshness: float = 300.0,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_samples: Maximum samples held across all chunks
+            chunk_seconds: Target chunk length (rounded up to a step multiple)
+            max_freshness: Age after which data is considered final
+        """
+        self.max_samples = max_samples
+        self.chunk_seconds = chunk_seconds
+        self.max_freshness = max_freshness
+        self._chunks: "OrderedDict[Hashable, Tuple[List[Series], int]]" = OrderedDict()
+        self._samples = 0
+        self._lock = threading.Lock()
+        logger.info(
+            f"RangeQueryCache initialized: max_samples={max_samples}, "
+            f"chunk_seconds={chunk_seconds}, max_freshness={max_freshness}"
+        )
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def plan(
+        self,
+        start: float,
+        end: float,
+        step: float,
+        now: float,
+    ) -> Tuple[float, float, List[Tuple[float, float]], Optional[Tuple[float, float]]]:
+        """
+        Split a range query into cacheable chunks and an open tail.
+
+        Args:
+            start: Query start (Unix seconds)
+            end: Query end (Unix seconds)
+            step: Query step in seconds
+            now: Current time (Unix seconds)
+
+        Returns:
+            Tuple: (aligned start, aligned end, [(chunk start, chunk end)],
+                    (tail start, tail end) or None)
+        """
+        aligned_start = math.floor(start / step) * step
+        aligned_end = math.floor(end / step) * step
+        chunk = max(1, math.ceil(self.chunk_seconds / step)) * step
+        immutable_before = now - self.max_freshness
+
+        chunks: List[Tuple[float, float]] = []
+        tail: Optional[Tuple[float, float]] = None
+        chunk_start = math.floor(aligned_start / chunk) * chunk
+        while chunk_start <= aligned_end:
+            chunk_end = chunk_start + chunk - step
+            if chunk_end <= immutable_before:
+                chunks.append((chunk_start, chunk_end))
+            else:
+                tail = (max(chunk_start, aligned_start), aligned_end)
+                break
+            chunk_start += chunk
+        return aligned_start, aligned_end, chunks, tail
+
+    def get(self, key: Hashable) -> Optional[List[Series]]:
+        """Return a cached chunk, or None."""
+        with self._lock:
+            entry = self._chunks.get(key)
+            if entry is None:
+                range_cache_chunks.labels(result="miss").inc()
+                return None
+            self._chunks.move_to_end(key)
+        range_cache_chunks.labels(result="hit").inc()
+        return entry[0]
+
+    def put(self, key: Hashable, series: List[Series]) -> None:
+        """Store a chunk, evicting least recently used chunks past the bound."""
+        samples = sum(len(s.get("values", [])) for s in series)
+        if samples > self.max_samples:
+            return
+        with self._lock:
+            previous = self._chunks.pop(key, None)
+            if previous is not None:
+                self._samples -= previous[1]
+            self._chunks[key] = (series, samples)
+            self._samples += samples
+            while self._samples > self.max_samples:
+                _, (_, evicted) = self._chunks.popitem(last=False)
+                self._samples -= evicted
+            range_cache_samples.set(self._samples)
+
+    def clear(self) -> None:
+        """Drop every cached chunk."""
+        with self._lock:
+            self._chunks.clear()
+            self._samples = 0
+            range_cache_samples.set(0)
+
+
+def split_by_chunk(
+    series: List[Series],
+    chunks: List[Tuple[float, float]],
+) -> List[List[Series]]:
+    """Split matrix series covering several chunks into one list per chunk."""
+    per_chunk: List[List[Series]] = [[] for _ in chunks]
+    for s in series:
+        buckets: List[List[Any]] = [[] for _ in chunks]
+        idx = 0
+        for point in s.get("values", []):
+            ts = float(point[0])
+            while idx < len(chunks) - 1 and ts > chunks[idx][1]:
+                idx += 1
+            if chunks[idx][0] <= ts <= chunks[idx][1]:
+                buckets[idx].append(point)
+        for i, values in enumerate(buckets):
+            if values:
+                per_chunk[i].append({"metric": s.get("metric", {}), "values": values})
+    return per_chunk
+
+
+def merge_series(parts: List[List[Series]], start: float, end: float) -> List[Series]:
+    """Concatenate per-chunk matrix series by label set, trimmed to [start, end]."""
+    merged: "OrderedDict[Tuple[Tuple[str, str], ...], Series]" = OrderedDict()
+    for part in parts:
+        for s in part:
+            labels = s.get("metric", {})
+            key = tuple(sorted(labels.items()))
+            target = merged.setdefault(key, {"metric": labels, "values": []})
+            target["values"].extend(
+                point for point in s.get("values", []) if start <= float(point[0]) <= end
+            )
+    return [s for s in merged.values() if s["values"]]
@@ -9,6 +9,7 @@ from fastapi.testclient import TestClient
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "ml-pipeline" / "src"))
 
 from api.main import app
 
@@ -53,4 +53,83 @@ def test_detector_get_info(mock_model):
     assert "model_loaded" in info
     assert "model_version" in info
     assert info["model_loaded"] is True
-    assert info["model_version"] == "test-v1.0"
\ No newline at end of file
+    assert info["model_version"] == "test-v1.0"
+
+
+class _CountingModel:
+    """Model stub recording how many rows it scored."""
+
+    row_independent = True
+
+    def __init__(self):
+        self.rows = 0
+
+    def predict(self, X):
+        self.rows += len(X)
+        return X.to_numpy().sum(axis=1)
+
+
+def test_detector_cache_skips_repeated_rows(mock_model, sample_features):
+    """Test cached rows are not re-scored by the model."""
+    from anomaly_detector.detector import AnomalyDetector
+    from anomaly_detector.prediction_cache import PredictionCache
+
+    detector = AnomalyDetector(model_dir=mock_model, cache=PredictionCache(max_size=10))
+    detector.model = _CountingModel()
+
+    first = detector.predict(sample_features)
+    batch = pd.concat([sample_features, sample_features * 2], ignore_index=True)
+    second = detector.predict(batch)
+
+    assert detector.model.rows == 2
+    assert second[0] == pytest.approx(first[0])
+    assert second[1] == pytest.approx(first[0] * 2)
+
+
+def test_detector_cache_bypassed_for_sequence_models(mock_model, sample_features):
+    """Test models whose rows depend on each other are never cached per row."""
+    from anomaly_detector.detector import AnomalyDetector
+    from anomaly_detector.prediction_cache import PredictionCache
+
+    cache = PredictionCache(max_size=10)
+    detector = AnomalyDetector(model_dir=mock_model, cache=cache)
+    detector.model = _CountingModel()
+    detector.model.row_independent = False
+
+    detector.predict(sample_features)
+    detector.predict(pd.concat([sample_features, sample_features * 2], ignore_index=True))
+
+    assert detector.model.rows == 3
+    assert len(cache) == 0
+
+
+def test_detector_reload_clears_cache(mock_model, sample_features):
+    """Test a model reload invalidates cached scores."""
+    from anomaly_detector.detector import AnomalyDetector
+    from anomaly_detector.prediction_cache import PredictionCache
+
+    cache = PredictionCache()
+    detector = AnomalyDetector(model_dir=mock_model, cache=cache)
+    detector.predict(sample_features)
+    assert len(cache) == 1
+
+    assert detector.reload()
+    assert len(cache) == 0
+
+
+def test_prediction_cache_lru_and_ttl(monkeypatch):
+    """Test LRU eviction and TTL expiry."""
+    from anomaly_detector import prediction_cache
+    from anomaly_detector.prediction_cache import PredictionCache
+
+    now = [100.0]
+    monkeypatch.setattr(prediction_cache.time, "monotonic", lambda: now[0])
+
+    cache = PredictionCache(max_size=2, ttl_seconds=10)
+    cache.put_many(["a", "b"], [1.0, 2.0])
+    assert cache.get_many(["a"]) == [1.0]
+    cache.put_many(["c"], [3.0])  # evicts "b", the least recently used
+    assert cache.get_many(["a", "b", "c"]) == [1.0, None, 3.0]
+
+    now[0] += 11
+    assert cache.get_many(["a", "c"]) == [None, None]
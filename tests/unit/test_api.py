@@ -1,4 +1,5 @@
 """Unit tests for API endpoints."""
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
 
@@ -42,4 +43,204 @@ def test_metrics_endpoint_exists(client: TestClient):
     """Test that metrics endpoint exists."""
     resp = client.get("/metrics")
     # Should return Prometheus metrics format
-    assert resp.status_code == 200
\ No newline at end of file
+    assert resp.status_code == 200
+
+
+class _StubModel:
+    """Model stub scoring each row by its first feature."""
+
+    def predict(self, X):
+        return np.asarray(X, dtype=float)[:, 0] / 100.0
+
+
+@pytest.fixture
+def stub_detector(client: TestClient):
+    """Swap the container's model for a deterministic stub."""
+    from api.core.container import get_container
+
+    detector = get_container().get_detector()
+    original = detector.model
+    detector.model = _StubModel()
+    yield detector
+    detector.model = original
+
+
+def test_predict_single(client: TestClient, stub_detector, sample_metrics):
+    """Test single-item prediction goes through the dispatcher."""
+    resp = client.post("/api/v1/predictions/predict", json={"metrics": sample_metrics})
+    assert resp.status_code == 200
+    assert resp.json()["anomaly_score"] == pytest.approx(0.4745)
+
+
+def test_predict_batch(client: TestClient, stub_detector, sample_metrics):
+    """Test batch prediction returns one result per workload key."""
+    low = {"cpu_usage": [{"timestamp": 1640000000, "value": 10.0}]}
+    resp = client.post(
+        "/api/v1/predictions/predict_batch",
+        json={
+            "workloads": [
+                {"key": "default/a", "metrics": sample_metrics},
+                {"key": "default/b", "metrics": low},
+                {"key": "default/c", "metrics": {"cpu_usage": []}},
+            ],
+            "threshold": 0.3,
+        },
+    )
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert [r["key"] for r in results] == ["default/a", "default/b", "default/c"]
+    assert results[0]["is_anomaly"] is True
+    assert results[1]["anomaly_score"] == pytest.approx(0.1)
+    assert results[1]["is_anomaly"] is False
+    assert results[2]["error"] == "No metrics provided"
+
+
+def test_predict_batch_duplicate_keys(client: TestClient, sample_metrics):
+    """Test batch prediction rejects duplicate workload keys."""
+    workload = {"key": "default/a", "metrics": sample_metrics}
+    resp = client.post(
+        "/api/v1/predictions/predict_batch",
+        json={"workloads": [workload, workload]},
+    )
+    assert resp.status_code == 422
+
+
+def test_predict_saturated_returns_retry_after(client: TestClient, stub_detector, sample_metrics, monkeypatch):
+    """Test a saturated inference pool yields a fast 503 with Retry-After."""
+    from api.core.container import get_container
+    from api.core.executor import ExecutorSaturatedError
+
+    async def saturated(*args):
+        raise ExecutorSaturatedError("Inference pool saturated")
+
+    monkeypatch.setattr(get_container().executor, "run", saturated)
+    resp = client.post("/api/v1/predictions/predict", json={"metrics": sample_metrics})
+    assert resp.status_code == 503
+    assert "Retry-After" in resp.headers
+
+
+def test_predict_columnar_json(client: TestClient, stub_detector, sample_metrics):
+    """Test columnar JSON payloads score like the per-sample format."""
+    series = {
+        name: {
+            "timestamps": [s["timestamp"] for s in samples],
+            "values": [s["value"] for s in samples],
+        }
+        for name, samples in sample_metrics.items()
+    }
+    resp = client.post("/api/v1/predictions/predict_columnar", json={"series": series})
+    assert resp.status_code == 200
+    assert resp.json()["anomaly_score"] == pytest.approx(0.4745)
+
+
+def test_predict_columnar_msgpack(client: TestClient, stub_detector):
+    """Test msgpack payloads with raw float64 buffers."""
+    msgpack = pytest.importorskip("msgpack")
+    values = np.linspace(40.0, 50.0, 10)
+    body = msgpack.packb({
+        "series": {
+            "cpu_usage": {
+                "timestamps": np.arange(10, dtype="<f8").tobytes(),
+                "values": values.astype("<f8").tobytes(),
+            }
+        },
+        "threshold": 0.9,
+    })
+    resp = client.post(
+        "/api/v1/predictions/predict_columnar",
+        content=body,
+        headers={"Content-Type": "application/msgpack"},
+    )
+    assert resp.status_code == 200
+    assert resp.json()["anomaly_score"] == pytest.approx(0.45)
+    assert resp.json()["threshold"] == 0.9
+
+
+def test_predict_columnar_mismatched_lengths(client: TestClient):
+    """Test columnar payloads reject misaligned arrays."""
+    resp = client.post(
+        "/api/v1/predictions/predict_columnar",
+        json={"series": {"cpu_usage": {"timestamps": [1, 2], "values": [1.0]}}},
+    )
+    assert resp.status_code == 422
+
+
+@pytest.mark.parametrize("threshold", [[0.5], {"value": 0.5}, "high"])
+def test_predict_columnar_invalid_threshold(client: TestClient, threshold):
+    """Test non-numeric thresholds are rejected as validation errors."""
+    resp = client.post(
+        "/api/v1/predictions/predict_columnar",
+        json={"series": {"cpu_usage": {"timestamps": [1], "values": [1.0]}}, "threshold": threshold},
+    )
+    assert resp.status_code == 422
+
+
+def test_stream_scores_each_pushed_sample(client: TestClient, stub_detector):
+    """Test a streaming session returns one score per new sample."""
+    url = "/api/v1/predictions/stream?series=default/pod-a&window=4&threshold=0.5"
+    with client.websocket_connect(url) as ws:
+        ws.send_json({"timestamps": [1, 2], "values": {"cpu_usage": [40.0, 60.0]}})
+        first = ws.receive_json()
+        ws.send_json({"timestamps": [3], "values": {"cpu_usage": [80.0]}})
+        second = ws.receive_json()
+
+        ws.send_text("not json")
+        error = ws.receive_json()
+
+    assert first["series"] == "default/pod-a"
+    assert [s["anomaly_score"] for s in first["scores"]] == pytest.approx([0.4, 0.5])
+    assert second["scores"][0]["anomaly_score"] == pytest.approx(0.6)
+    assert second["scores"][0]["is_anomaly"] is True
+    assert "error" in error
+
+
+def test_scan_namespace(client: TestClient, stub_detector, monkeypatch):
+    """Test the namespace scan ranks series from Prometheus data."""
+    from utils.prometheus_client import PrometheusClient
+
+    async def fake_default_metrics(self, start, end, namespace="default"):
+        return {
+            "cpu_usage": {
+                "resultType": "matrix",
+                "result": [
+                    {"metric": {"namespace": namespace, "pod": pod, "container": "app"},
+                     "values": [[1640000000, str(value)]]}
+                    for pod, value in [("a", 20.0), ("b", 90.0)]
+                ],
+            }
+        }
+
+    monkeypatch.setattr(PrometheusClient, "get_default_metrics", fake_default_metrics)
+    resp = client.get("/api/v1/predictions/scan", params={"namespace": "prod", "top_k": 1})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["series_scored"] == 2
+    assert data["results"][0]["labels"]["pod"] == "b"
+    assert data["results"][0]["is_anomaly"] is True
+
+
+def test_query_range_max_points(client: TestClient, monkeypatch):
+    """Test max_points coarsens the step, and LTTB bounds the points returned."""
+    from utils.prometheus_client import PrometheusClient
+
+    steps = []
+
+    async def fake_query_range(self, query, start, end, step="15s"):
+        steps.append(step)
+        values = [[i * 15, str(i % 5)] for i in range(5000)]
+        return {"resultType": "matrix", "result": [{"metric": {}, "values": values}]}
+
+    monkeypatch.setattr(PrometheusClient, "query_range", fake_query_range)
+    params = {"query": "up", "start": "0", "end": str(7 * 86400), "max_points": 500}
+
+    resp = client.get("/api/v1/metrics/query_range", params=params)
+    assert resp.status_code == 200
+    assert resp.json()["step"] == "30m"
+
+    resp = client.get("/api/v1/metrics/query_range", params={**params, "downsample": "lttb"})
+    assert resp.status_code == 200
+    assert len(resp.json()["data"]["result"][0]["values"]) == 500
+    assert steps == ["30m", "2m"]
+
+    resp = client.get("/api/v1/metrics/query_range", params={**params, "start": "yesterday"})
+    assert resp.status_code == 422
@@ -0,0 +1,103 @@
+"""Unit tests for the micro-batching dispatcher."""
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def _recording_predict(calls):
+    async def predict(features: pd.DataFrame) -> np.ndarray:
+        calls.append(len(features))
+        return features["x"].to_numpy() * 2
+    return predict
+
+
+def test_concurrent_requests_share_one_call():
+    """Test concurrent submissions are stacked into one predict call."""
+    from api.core.batching import MicroBatcher
+
+    calls = []
+
+    async def scenario():
+        batcher = MicroBatcher(_recording_predict(calls), window_ms=20, max_batch_size=64)
+        await batcher.start()
+        frames = [pd.DataFrame({"x": [float(i)]}) for i in range(10)]
+        results = await asyncio.gather(*(batcher.submit(f) for f in frames))
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(scenario())
+    assert calls == [10]
+    assert [float(r[0]) for r in results] == [i * 2.0 for i in range(10)]
+
+
+def test_max_batch_size_splits_dispatches():
+    """Test batches never exceed the configured maximum size."""
+    from api.core.batching import MicroBatcher
+
+    calls = []
+
+    async def scenario():
+        batcher = MicroBatcher(_recording_predict(calls), window_ms=20, max_batch_size=4)
+        await batcher.start()
+        frames = [pd.DataFrame({"x": [float(i)]}) for i in range(10)]
+        await asyncio.gather(*(batcher.submit(f) for f in frames))
+        await batcher.stop()
+
+    asyncio.run(scenario())
+    assert sum(calls) == 10
+    assert max(calls) <= 4
+
+
+def test_errors_propagate_to_every_waiter():
+    """Test a failing model call fails all requests in the batch."""
+    from api.core.batching import MicroBatcher
+
+    async def failing(features):
+        raise ValueError("boom")
+
+    async def scenario():
+        batcher = MicroBatcher(failing, window_ms=5)
+        await batcher.start()
+        frames = [pd.DataFrame({"x": [1.0]}) for _ in range(3)]
+        results = await asyncio.gather(
+            *(batcher.submit(f) for f in frames), return_exceptions=True
+        )
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_submit_requires_start():
+    """Test submitting before start raises."""
+    from api.core.batching import MicroBatcher
+
+    batcher = MicroBatcher(_recording_predict([]))
+    with pytest.raises(RuntimeError):
+        asyncio.run(batcher.submit(pd.DataFrame({"x": [1.0]})))
+
+
+def test_array_features_are_concatenated():
+    """Test schema-encoded arrays are stacked and split back per request."""
+    from api.core.batching import MicroBatcher
+
+    calls = []
+
+    async def predict(features):
+        calls.append(type(features))
+        return features.sum(axis=1)
+
+    async def scenario():
+        batcher = MicroBatcher(predict, window_ms=20, max_batch_size=64)
+        await batcher.start()
+        arrays = [np.full((1, 3), float(i), dtype=np.float32) for i in range(5)]
+        results = await asyncio.gather(*(batcher.submit(a) for a in arrays))
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(scenario())
+    assert calls == [np.ndarray]
+    assert [float(r[0]) for r in results] == [i * 3.0 for i in range(5)]
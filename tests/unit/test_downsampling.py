@@ -0,0 +1,57 @@
+"""Unit tests for step selection and LTTB downsampling."""
+import numpy as np
+import pytest
+
+
+def test_select_step_bounds_points():
+    """Test the auto step keeps a week within max_points and stays on the ladder."""
+    from utils.downsampling import NICE_STEPS, select_step
+
+    week = 7 * 86400
+    step = select_step(0, week, 15, 1000)
+    assert week / step + 1 <= 1000
+    assert step in NICE_STEPS
+    assert select_step(0, 3600, 15, 1000) == 15
+    with pytest.raises(ValueError):
+        select_step(0, 1, 1, 1)
+
+
+def test_format_duration():
+    """Test durations format in the largest whole unit."""
+    from utils.downsampling import format_duration
+
+    assert format_duration(900) == "15m"
+    assert format_duration(7200) == "2h"
+    assert format_duration(15) == "15s"
+    assert format_duration(90) == "90s"
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    """Test LTTB returns n_out increasing indices that include an isolated spike."""
+    from utils.downsampling import lttb
+
+    x = np.arange(5000, dtype=np.float64)
+    y = np.sin(x / 300)
+    y[2345] = 50.0
+    y[17] = np.nan
+    keep = lttb(x, y, 200)
+
+    assert len(keep) == 200
+    assert keep[0] == 0 and keep[-1] == 4999
+    assert np.all(np.diff(keep) > 0)
+    assert 2345 in keep
+    assert 17 not in keep
+    np.testing.assert_array_equal(lttb(x[:10], y[:10], 50), np.arange(10))
+
+
+def test_downsample_matrix():
+    """Test only series above the bound are reduced."""
+    from utils.downsampling import downsample_matrix
+
+    long = {"metric": {"pod": "a"}, "values": [[i, str(i % 7)] for i in range(1000)]}
+    short = {"metric": {"pod": "b"}, "values": [[0, "1"], [1, "2"]]}
+    result = downsample_matrix([long, short], 100)
+
+    assert len(result[0]["values"]) == 100
+    assert result[0]["metric"] == {"pod": "a"}
+    assert result[1] is short
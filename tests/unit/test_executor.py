@@ -0,0 +1,50 @@
+"""Unit tests for the inference executor."""
+import asyncio
+import threading
+
+import pytest
+
+
+def test_executor_runs_off_event_loop():
+    """Test tasks run in a worker thread, not on the event loop thread."""
+    from api.core.executor import InferenceExecutor
+
+    executor = InferenceExecutor(kind="thread", max_workers=1, queue_depth=0)
+    try:
+        loop_thread = threading.get_ident()
+        worker_thread = asyncio.run(executor.run(threading.get_ident))
+        assert worker_thread != loop_thread
+        assert executor.in_flight == 0
+    finally:
+        executor.shutdown()
+
+
+def test_executor_rejects_when_saturated():
+    """Test the executor fails fast once workers and queue are full."""
+    from api.core.executor import ExecutorSaturatedError, InferenceExecutor
+
+    executor = InferenceExecutor(kind="thread", max_workers=1, queue_depth=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.run(release.wait)
+        release.set()
+        await asyncio.gather(*running)
+
+    try:
+        asyncio.run(scenario())
+        assert executor.in_flight == 0
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_executor_invalid_kind():
+    """Test unknown executor kinds are rejected."""
+    from api.core.executor import InferenceExecutor
+
+    with pytest.raises(ValueError):
+        InferenceExecutor(kind="gpu")
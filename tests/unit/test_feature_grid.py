@@ -0,0 +1,54 @@
+"""Unit tests for grid-aligned FeatureEngineer transforms."""
+import numpy as np
+import pandas as pd
+
+
+def _raw():
+    ts = np.arange(0, 3600, 60)
+    return {
+        # two pods reporting the same timestamps
+        "cpu": pd.DataFrame({
+            "timestamp": np.r_[ts, ts],
+            "value": np.r_[np.arange(60.0), np.arange(60.0) + 2],
+            "pod": ["a"] * 60 + ["b"] * 60,
+        }),
+        # sparser metric, off-grid timestamps
+        "memory": pd.DataFrame({"timestamp": ts[::2] + 5, "value": np.arange(30.0) * 1e9}),
+    }
+
+
+def test_grid_one_row_per_step():
+    """Test duplicate timestamps are binned instead of multiplying rows."""
+    from ml_pipeline.data.feature_engineering import FeatureEngineer
+
+    feat = FeatureEngineer(step="1m").transform(_raw(), mode="grid")
+
+    assert len(feat) == 60
+    assert feat["timestamp"].tolist() == list(range(0, 3600, 60))
+    np.testing.assert_allclose(feat["cpu_raw"], np.arange(60.0) + 1)
+    # empty bins are forward-filled
+    assert feat["memory_raw"].iloc[1] == feat["memory_raw"].iloc[0]
+    assert not feat.isna().any().any()
+
+
+def test_grid_matches_pandas_rolling_and_shift():
+    """Test rolling stats and lags match the pandas equivalents."""
+    from ml_pipeline.data.feature_engineering import FeatureEngineer
+
+    feat = FeatureEngineer(step="1m", window="5m").transform(_raw(), mode="grid")
+
+    for metric in ("cpu", "memory"):
+        series = feat[f"{metric}_raw"]
+        rolled = series.rolling(5, min_periods=1)
+        np.testing.assert_allclose(feat[f"{metric}_raw_mean"], rolled.mean())
+        np.testing.assert_allclose(feat[f"{metric}_raw_std"], rolled.std().bfill(), rtol=1e-6)
+        np.testing.assert_allclose(feat[f"{metric}_raw_min"], rolled.min())
+        np.testing.assert_allclose(feat[f"{metric}_raw_max"], rolled.max())
+        np.testing.assert_allclose(feat[f"{metric}_lag_2m"], series.shift(2).bfill())
+
+
+def test_grid_empty_input():
+    """Test empty inputs give an empty frame."""
+    from ml_pipeline.data.feature_engineering import FeatureEngineer
+
+    assert FeatureEngineer().transform({"cpu": pd.DataFrame()}, mode="grid").empty
@@ -0,0 +1,167 @@
+"""Unit tests for the feature schema and compiled feature plan."""
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def _raws(n=12, seed=0):
+    rng = np.random.default_rng(seed)
+    raws = []
+    for i in range(n):
+        raw = {"cpu": {"values": list(rng.random(rng.integers(1, 30)))}, "unused": [1.0, 2.0]}
+        if i % 2:
+            raw["memory"] = list(rng.random(rng.integers(1, 30)) * 1e9)
+        raws.append(raw)
+    return raws
+
+
+def test_plan_encode_matches_processor_in_schema_order():
+    """Test encoded matrices equal the processor features, reordered and defaulted."""
+    from anomaly_detector.feature_schema import FeatureSchema
+    from anomaly_detector.metrics_processor import MetricsProcessor
+
+    columns = ["memory_p95", "cpu_mean", "cpu_rate", "memory_mean", "disk_mean", "cpu_p99"]
+    plan = FeatureSchema(columns, defaults={"disk_mean": -1.0}).compile()
+    raws = _raws()
+    matrix = plan.encode(raws)
+
+    assert matrix.dtype == np.float32 and matrix.flags.c_contiguous
+    assert matrix.shape == (len(raws), len(columns))
+    expected = MetricsProcessor().to_features_batch(raws).reindex(columns=columns, fill_value=-1.0)
+    np.testing.assert_allclose(matrix, expected.to_numpy(), rtol=1e-6)
+    with pytest.raises(ValueError, match="index 0"):
+        plan.encode([{"unused": [1.0]}])
+
+
+def test_plan_align_and_records_fix_column_order():
+    """Test frames and feature dicts land in schema order with defaults."""
+    from anomaly_detector.feature_schema import FeatureSchema
+
+    plan = FeatureSchema(["cpu_max", "cpu_mean", "cpu_p99"], default=0.5).compile()
+    frame = pd.DataFrame({"cpu_mean": [1.0, 2.0], "extra": [9.0, 9.0], "cpu_max": [3.0, np.nan]})
+
+    expected = np.array([[3.0, 1.0, 0.5], [0.5, 2.0, 0.5]], dtype=np.float32)
+    np.testing.assert_array_equal(plan.align(frame), expected)
+    np.testing.assert_array_equal(plan.from_records(frame.to_dict("records")), expected)
+
+
+def test_plan_rejects_unusable_schemas_and_inputs():
+    """Test schemas and inputs matching nothing fail instead of scoring defaults."""
+    from anomaly_detector.feature_schema import FeatureSchema
+
+    # grid-mode training columns: no {metric}_{summary feature} among them
+    with pytest.raises(ValueError, match="cpu_lag_1m"):
+        FeatureSchema(["timestamp", "cpu_raw", "cpu_raw_mean", "cpu_lag_1m", "cpu_fft_1"]).compile()
+
+    plan = FeatureSchema(["cpu_mean", "cpu_max"]).compile()
+    with pytest.raises(ValueError, match="No feature columns"):
+        plan.align(pd.DataFrame({"memory_mean": [1.0]}))
+    with pytest.raises(ValueError, match="index 1"):
+        plan.from_records([{"cpu_mean": 1.0}, {"memory_mean": 1.0}])
+
+
+def test_schema_roundtrip_and_validation(tmp_path):
+    """Test schemas survive save/load and reject malformed input."""
+    from anomaly_detector.feature_schema import FeatureSchema
+
+    schema = FeatureSchema(["x", "y"], default=1.0, defaults={"y": 2.0})
+    schema.save(tmp_path / "feature_schema.json")
+    loaded = FeatureSchema.load(tmp_path / "feature_schema.json")
+    assert loaded.to_dict() == schema.to_dict()
+
+    with pytest.raises(ValueError):
+        FeatureSchema(["x", "x"])
+    with pytest.raises(ValueError):
+        FeatureSchema(["x"], defaults={"y": 0.0})
+    with pytest.raises(ValueError):
+        FeatureSchema.from_dict({"version": 99, "columns": ["x"]})
+
+
+def test_detector_uses_schema_from_artifact(mock_model, sample_features):
+    """Test a saved schema makes predictions independent of column order."""
+    from anomaly_detector.detector import AnomalyDetector
+    from anomaly_detector.feature_schema import SCHEMA_FILENAME, FeatureSchema
+
+    FeatureSchema.from_frame(sample_features).save(mock_model / SCHEMA_FILENAME)
+    detector = AnomalyDetector(model_dir=mock_model)
+    assert detector.plan is not None and detector.get_info()["feature_columns"] == 6
+
+    ordered = detector.predict(sample_features)
+    shuffled = detector.predict(sample_features[sample_features.columns[::-1]])
+    encoded = detector.predict(detector.plan.align(sample_features))
+    np.testing.assert_allclose(shuffled, ordered)
+    np.testing.assert_allclose(encoded, ordered)
+    with pytest.raises(ValueError):
+        detector.predict(np.zeros((1, 3), dtype=np.float32))
+
+
+def test_training_schema_encodes_api_requests(tmp_path):
+    """Test a schema written by the training job matches what the API encodes."""
+    pytest.importorskip("tensorflow")  # train.py imports the LSTM
+    import joblib
+
+    from anomaly_detector.detector import AnomalyDetector
+    from ml_pipeline.models.anomaly_detector import IsolationForestDetector
+    from ml_pipeline.training import train
+
+    rng = np.random.default_rng(0)
+    ts = np.arange(0, 4 * 3600, 60)
+    values = {"cpu_usage": rng.gamma(2.0, 0.1, len(ts)), "memory_usage": rng.normal(5e8, 1e7, len(ts))}
+    X = train.build_features({m: pd.DataFrame({"timestamp": ts, "value": v}) for m, v in values.items()})
+    train.save_feature_schema(X, tmp_path / train.SCHEMA_FILENAME)
+    features = X.drop(columns=list(train.KEY_COLUMNS))
+    joblib.dump(IsolationForestDetector(n_estimators=20).fit(features), tmp_path / "ensemble.joblib")
+
+    detector = AnomalyDetector(model_dir=tmp_path)
+    assert "timestamp" not in detector.plan.columns
+    # a request carrying the last window of samples encodes to the last training row
+    encoded = detector.encode([{m: list(v[-train.SUMMARY_ROWS:]) for m, v in values.items()}])
+    np.testing.assert_allclose(encoded[0], features.iloc[-1], rtol=1e-5, atol=1e-6)
+    # a metric the request lacks takes its training median
+    partial = detector.encode([{"cpu_usage": list(values["cpu_usage"][-train.SUMMARY_ROWS:])}])
+    memory = [detector.plan.index[c] for c in detector.plan.columns if c.startswith("memory_usage_")]
+    np.testing.assert_allclose(partial[0, memory], features.iloc[:, memory].median(), rtol=1e-5)
+    assert detector.predict(encoded).shape == (1,)
+
+
+def test_summary_rows_are_per_workload():
+    """Test training summarises each pod's own series, as the API does per request."""
+    from anomaly_detector.metrics_processor import MetricsProcessor
+    from ml_pipeline.data.feature_engineering import FeatureEngineer
+
+    rng = np.random.default_rng(1)
+    ts = np.arange(0, 3 * 3600, 60)
+    levels = {"pod-a": 0.1, "pod-b": 5.0}
+    cpu = {pod: rng.normal(level, level / 10, len(ts)) for pod, level in levels.items()}
+    eth = {iface: rng.normal(1e3, 50, len(ts)) for iface in ("eth0", "eth1")}
+    raw = {
+        "cpu_usage": pd.concat([
+            pd.DataFrame({"timestamp": ts, "value": v, "namespace": "default", "pod": pod, "container": "app"})
+            for pod, v in cpu.items()
+        ]),
+        # pod-b only; one series per interface, summed into one workload series
+        "network_rx": pd.concat([
+            pd.DataFrame({"timestamp": ts, "value": v, "namespace": "default", "pod": "pod-b", "container": "app",
+                          "interface": iface})
+            for iface, v in eth.items()
+        ]),
+    }
+    X = FeatureEngineer(summary_rows=60).transform(raw, mode="summary")
+
+    assert list(X.columns[:4]) == ["namespace", "pod", "container", "timestamp"]
+    assert len(X) == 2 * (len(ts) - 59)
+    processor = MetricsProcessor()
+    for pod, values in cpu.items():
+        rows = X[X["pod"] == pod]
+        assert rows["timestamp"].is_monotonic_increasing
+        expected = processor._builtin_row({"cpu_usage": {"values": values[-60:]}})
+        for name, value in expected.items():
+            assert rows[name].iloc[-1] == pytest.approx(value), (pod, name)
+
+    # no row mixes the two levels
+    assert X.loc[X["pod"] == "pod-a", "cpu_usage_max"].max() < X.loc[X["pod"] == "pod-b", "cpu_usage_min"].min()
+
+    network = processor._builtin_row({"network_rx": {"values": (eth["eth0"] + eth["eth1"])[-60:]}})
+    pod_b = X[X["pod"] == "pod-b"].iloc[-1]
+    assert pod_b["network_rx_mean"] == pytest.approx(network["network_rx_mean"])
+    assert X.loc[X["pod"] == "pod-a", "network_rx_mean"].isna().all()
@@ -0,0 +1,124 @@
+"""Unit tests for the Parquet feature store."""
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+T0 = 1_704_067_200  # 2024-01-01T00:00:00Z
+
+
+def _engineer(**kwargs):
+    """Row-local grid features: trailing-window spectra instead of whole-series FFT."""
+    from ml_pipeline.data.feature_engineering import FeatureEngineer
+
+    return FeatureEngineer(step="1m", spectral_window="10m", **kwargs)
+
+
+def _engineer_compute(calls, gap=None):
+    """compute() building grid features for [lo, hi) with 10 minutes of warm-up."""
+
+    def compute(lo, hi):
+        calls.append((lo, hi))
+        ts = np.arange(lo - 600, hi, 60)
+        if gap is not None:
+            ts = ts[(ts < gap[0]) | (ts >= gap[1])]
+        if len(ts) == 0:
+            return pd.DataFrame()
+        raw = {"cpu": pd.DataFrame({"timestamp": ts, "value": np.sin(ts / 600.0)})}
+        return _engineer().transform(raw, mode="grid")
+
+    return compute
+
+
+def test_materialize_computes_only_missing_hours(tmp_path):
+    """Test stored hours are reused and only new hours are computed."""
+    from ml_pipeline.data.feature_store import ParquetFeatureStore
+
+    store = ParquetFeatureStore(tmp_path)
+    calls = []
+    compute = _engineer_compute(calls)
+
+    first = store.materialize("cpu", T0, T0 + 3 * 3600, compute, complete_before=T0 + 10 * 3600)
+    assert calls == [(T0, T0 + 3 * 3600)]
+    assert len(first) == 180 and first["timestamp"].is_monotonic_increasing
+    assert store.hours("cpu") == [T0, T0 + 3600, T0 + 7200]
+    assert (tmp_path / "metric=cpu" / "hour=2024-01-01T01" / "part.parquet").exists()
+
+    second = store.materialize("cpu", T0 + 3600, T0 + 5 * 3600, compute, complete_before=T0 + 10 * 3600)
+    assert calls[1:] == [(T0 + 3 * 3600, T0 + 5 * 3600)]
+    pd.testing.assert_frame_equal(second.iloc[:120], first.iloc[60:].reset_index(drop=True))
+
+    store.materialize("cpu", T0, T0 + 5 * 3600, compute)
+    assert len(calls) == 2
+
+
+def test_incomplete_and_empty_hours(tmp_path):
+    """Test the still-open hour is not persisted and empty hours are remembered."""
+    from ml_pipeline.data.feature_store import ParquetFeatureStore
+
+    store = ParquetFeatureStore(tmp_path)
+    calls = []
+    compute = _engineer_compute(calls, gap=(T0 - 600, T0 + 3600))
+
+    feat = store.materialize("cpu", T0, T0 + 3 * 3600, compute, complete_before=T0 + 2.5 * 3600)
+    assert store.hours("cpu") == [T0, T0 + 3600]
+    assert len(feat) == 120  # hour 0 empty, hour 2 returned but not stored
+    assert store.read("cpu", T0, T0 + 3600).empty
+
+    store.materialize("cpu", T0, T0 + 3 * 3600, compute, complete_before=T0 + 10 * 3600)
+    assert calls[1:] == [(T0 + 7200, T0 + 3 * 3600)]
+
+
+def test_read_projects_columns(tmp_path):
+    """Test reads decode only the requested columns within the range."""
+    from ml_pipeline.data.feature_store import ParquetFeatureStore
+
+    store = ParquetFeatureStore(tmp_path)
+    store.materialize("cpu", T0, T0 + 2 * 3600, _engineer_compute([]), complete_before=T0 + 10 * 3600)
+
+    df = store.read("cpu", T0 + 1800, T0 + 5400, columns=["cpu_raw_mean"])
+    assert list(df.columns) == ["timestamp", "cpu_raw_mean"]
+    assert df["timestamp"].min() == T0 + 1800 and df["timestamp"].max() == T0 + 5340
+    assert store.metrics() == ["cpu"]
+
+
+def test_stored_hours_match_fresh_computation(tmp_path):
+    """Test hours computed in separate runs equal one computation over the whole range."""
+    from ml_pipeline.data.feature_store import ParquetFeatureStore
+
+    store = ParquetFeatureStore(tmp_path)
+    compute = _engineer_compute([])
+    store.materialize("cpu", T0 + 3600, T0 + 7200, compute, complete_before=T0 + 10 * 3600)
+    stored = store.materialize("cpu", T0, T0 + 3 * 3600, compute, complete_before=T0 + 10 * 3600)
+
+    fresh = compute(T0, T0 + 3 * 3600)
+    fresh = fresh[fresh["timestamp"] >= T0].reset_index(drop=True)
+    pd.testing.assert_frame_equal(stored, fresh, check_dtype=False)
+
+
+def test_partitions_keyed_by_engineer_config(tmp_path):
+    """Test changing any FeatureEngineer setting stops reusing stored partitions."""
+    from ml_pipeline.data.feature_engineering import FeatureEngineer
+    from ml_pipeline.data.feature_store import ParquetFeatureStore
+
+    store = ParquetFeatureStore.for_features(tmp_path, _engineer(), mode="grid")
+    store.materialize("cpu", T0, T0 + 3600, _engineer_compute([]), complete_before=T0 + 10 * 3600)
+    assert store.root == tmp_path / f"config={_engineer().fingerprint('grid')}"
+
+    assert ParquetFeatureStore.for_features(tmp_path, _engineer(), mode="grid").hours("cpu") == [T0]
+    assert ParquetFeatureStore.for_features(tmp_path, _engineer(lags=[1, 2]), mode="grid").hours("cpu") == []
+    assert ParquetFeatureStore.for_features(tmp_path, _engineer(), mode="summary").hours("cpu") == []
+    # the raw data source is part of the key
+    query_range = {"fetch": "query_range", "queries": {"cpu": "rate(cpu[5m])"}}
+    sourced = ParquetFeatureStore.for_features(tmp_path, _engineer(), mode="grid", source=query_range)
+    sourced.materialize("cpu", T0, T0 + 3600, _engineer_compute([]), complete_before=T0 + 10 * 3600)
+    assert ParquetFeatureStore.for_features(tmp_path, _engineer(), mode="grid", source=query_range).hours("cpu") == [T0]
+    for source in ({"fetch": "remote_read", "queries": {"cpu": "rate(cpu[5m])"}},
+                   {"fetch": "query_range", "queries": {"cpu": "rate(cpu[1m])"}}):
+        assert ParquetFeatureStore.for_features(tmp_path, _engineer(), mode="grid", source=source).hours("cpu") == []
+    with pytest.raises(ValueError, match="spectral_window"):
+        ParquetFeatureStore.for_features(tmp_path, FeatureEngineer(), mode="grid")
+    # hopped windows are anchored at the first computed row, not at absolute time
+    with pytest.raises(ValueError, match="spectral_hop"):
+        ParquetFeatureStore.for_features(tmp_path, _engineer(spectral_hop=4), mode="grid")
@@ -0,0 +1,65 @@
+"""Unit tests for the compiled IsolationForest scorer."""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import IsolationForest
+
+
+def _data(n=500, d=6, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, d))
+    X[:10] += 6  # a few clear outliers
+    return X
+
+
+@pytest.mark.parametrize("params", [
+    {"n_estimators": 300, "contamination": 0.01},
+    {"n_estimators": 50, "max_samples": 64, "max_features": 0.5},
+    {"n_estimators": 20, "max_samples": 1.0, "contamination": "auto"},
+])
+def test_compiled_scores_match_sklearn(params):
+    """Test flat-array scores equal sklearn's score_samples and decision_function."""
+    from ml_pipeline.models.forest_compiler import compile_forest
+
+    X = _data()
+    model = IsolationForest(random_state=0, **params).fit(X)
+    compiled = compile_forest(model)
+    X_test = np.vstack((_data(200, seed=1), _data(50, seed=2) * 3))
+
+    np.testing.assert_allclose(compiled.score_samples(X_test), model.score_samples(X_test), rtol=1e-10)
+    np.testing.assert_allclose(
+        compiled.decision_function(X_test[:1]), model.decision_function(X_test[:1]), rtol=1e-10
+    )
+    with pytest.raises(ValueError):
+        compiled.score_samples(X_test[:, :3])
+
+
+def test_compiled_forest_roundtrip(tmp_path):
+    """Test the node arrays survive save/load."""
+    from ml_pipeline.models.forest_compiler import CompiledForest, compile_forest
+
+    model = IsolationForest(n_estimators=30, random_state=0).fit(_data())
+    compiled = compile_forest(model)
+    loaded = CompiledForest.load(compiled.save(tmp_path / "forest.npz"))
+
+    X = _data(100, seed=3)
+    np.testing.assert_array_equal(loaded.decision_function(X), compiled.decision_function(X))
+    assert loaded.n_trees == 30
+
+
+def test_detector_stores_compiled_forest(tmp_path):
+    """Test IsolationForestDetector scores with, and persists, the compiled forest."""
+    from ml_pipeline.models.anomaly_detector import IsolationForestDetector
+
+    X = pd.DataFrame(_data(), columns=[f"f{i}" for i in range(6)])
+    detector = IsolationForestDetector(n_estimators=40).fit(X)
+    expected = -detector.model.decision_function(detector.scaler.transform(X.to_numpy()))
+    np.testing.assert_allclose(detector.predict(X), expected, rtol=1e-10)
+    # schema-encoded float32 rows score without a DataFrame; frames are reordered by name
+    np.testing.assert_allclose(detector.predict(X.to_numpy(np.float32)), expected, rtol=1e-5)
+    np.testing.assert_allclose(detector.predict(X[X.columns[::-1]]), expected, rtol=1e-10)
+
+    detector.save(str(tmp_path / "iforest.joblib"))
+    loaded = IsolationForestDetector.load(str(tmp_path / "iforest.joblib"))
+    assert loaded.compiled is not None
+    np.testing.assert_allclose(loaded.predict(X), expected, rtol=1e-10)
@@ -0,0 +1,85 @@
+"""Unit tests for per-series grouped feature kernels."""
+import numpy as np
+import pandas as pd
+
+
+def _long_frame(seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for pod, n in [("a", 40), ("b", 7), ("c", 25), ("d", 40)]:
+        frames.append(pd.DataFrame({
+            "timestamp": np.arange(n) * 60,
+            "value": rng.normal(50, 10, n),
+            "pod": pod,
+            "namespace": "prod",
+        }))
+    # interleave rows the way concatenated query results can arrive
+    return pd.concat(frames, ignore_index=True).sample(frac=1.0, random_state=seed)
+
+
+def test_series_features_match_pandas_groupby():
+    """Test grouped kernels equal per-pod pandas rolling/shift results."""
+    from ml_pipeline.data.feature_engineering import FeatureEngineer
+
+    df = _long_frame()
+    feat = FeatureEngineer(step="1m", window="5m", lags=[1, 5]).transform_series(df)
+
+    assert len(feat) == len(df)
+    for pod, group in feat.groupby("pod"):
+        assert group["timestamp"].is_monotonic_increasing
+        rolled = group["value"].rolling(5, min_periods=1)
+        np.testing.assert_allclose(group["value_mean"], rolled.mean())
+        np.testing.assert_allclose(group["value_std"], rolled.std().bfill(), rtol=1e-9)
+        np.testing.assert_allclose(group["value_min"], rolled.min())
+        np.testing.assert_allclose(group["value_max"], rolled.max())
+        np.testing.assert_allclose(group["lag_5m"], group["value"].shift(5).bfill())
+        if len(group) >= 10:
+            expected = np.sort(np.abs(np.fft.rfft(group["value"].to_numpy())))[::-1][:3]
+            np.testing.assert_allclose(group[["fft_1", "fft_2", "fft_3"]].iloc[0], expected)
+        else:
+            assert (group[["fft_1", "fft_2", "fft_3"]] == 0).all().all()
+
+
+def test_lags_do_not_cross_series():
+    """Test a series' first rows only see its own values."""
+    from ml_pipeline.data.grouped_features import group_starts, lags
+
+    v = np.array([1.0, 2.0, 3.0, 10.0, 20.0])
+    gs = group_starts(np.array([0, 3]), len(v))
+    np.testing.assert_array_equal(lags(v, gs, [1])[:, 0], [1.0, 1.0, 2.0, 10.0, 10.0])
+
+
+def test_series_features_from_matrix_result():
+    """Test contiguous MatrixResult input skips the sort."""
+    from ml_pipeline.data.feature_engineering import FeatureEngineer
+    from ml_pipeline.data.matrix_decoder import MatrixResult
+
+    result = MatrixResult(
+        timestamps=np.array([0.0, 60.0, 120.0, 0.0, 60.0]),
+        values=np.array([1.0, 3.0, 5.0, 100.0, 200.0]),
+        offsets=np.array([0, 3, 5]),
+        labels=[{"pod": "a"}, {"pod": "b"}],
+    )
+    feat = FeatureEngineer(step="1m", window="2m").transform_series(result)
+    np.testing.assert_allclose(feat["value_mean"], [1.0, 2.0, 4.0, 100.0, 150.0])
+    assert feat["pod"].tolist() == ["a", "a", "a", "b", "b"]
+
+
+def test_rolling_stats_nan_stays_in_its_window():
+    """Test a NaN sample only affects its own series, like pandas rolling."""
+    from ml_pipeline.data.grouped_features import group_starts, rolling_stats
+
+    rng = np.random.default_rng(3)
+    v = rng.normal(50, 10, 150)
+    v[10] = np.nan
+    v[100] = np.nan  # first sample of the third series
+    starts = np.array([0, 50, 100])
+    stats = rolling_stats(v, group_starts(starts, len(v)), 5)
+
+    assert np.flatnonzero(np.isnan(stats).any(axis=1)).tolist() == [100]  # no valid sample yet
+    for lo in starts:
+        rolled = pd.Series(v[lo:lo + 50]).rolling(5, min_periods=1)
+        np.testing.assert_allclose(stats[lo:lo + 50, 0], rolled.mean())
+        np.testing.assert_allclose(stats[lo:lo + 50, 1], rolled.std().bfill(), rtol=1e-9)
+        np.testing.assert_allclose(stats[lo:lo + 50, 2], rolled.min())
+        np.testing.assert_allclose(stats[lo:lo + 50, 3], rolled.max())
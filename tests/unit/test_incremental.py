@@ -0,0 +1,60 @@
+"""Unit tests for incremental feature state."""
+import numpy as np
+import pytest
+
+
+def test_incremental_matches_builtin_row():
+    """Test every update equals the built-in transform over the same window."""
+    from anomaly_detector.incremental import IncrementalFeatureState
+    from anomaly_detector.metrics_processor import MetricsProcessor
+
+    processor = MetricsProcessor()
+    rng = np.random.default_rng(0)
+    cpu = rng.normal(1e6, 1e3, 500)
+    memory = np.round(rng.random(500) * 10)  # many ties
+    window = 17
+
+    state = IncrementalFeatureState(window=window)
+    for i in range(500):
+        row = state.update({"cpu": cpu[i], "memory": memory[i]})
+        lo = max(0, i - window + 1)
+        expected = processor._builtin_row({
+            "cpu": {"values": cpu[lo:i + 1]},
+            "memory": {"values": memory[lo:i + 1]},
+        })
+        assert list(row) == list(expected)
+        for name, value in expected.items():
+            assert row[name] == pytest.approx(value, rel=1e-9, abs=1e-9), name
+
+
+def test_windowed_stats_rejects_empty_window():
+    """Test invalid windows and empty reads raise."""
+    from anomaly_detector.incremental import WindowedStats
+
+    with pytest.raises(ValueError):
+        WindowedStats(0)
+    with pytest.raises(ValueError):
+        WindowedStats(5).features("cpu")
+
+
+def test_non_finite_samples_are_skipped():
+    """Test a scrape gap leaves the window as if the sample never arrived."""
+    from anomaly_detector.incremental import IncrementalFeatureState, WindowedStats
+    from anomaly_detector.metrics_processor import MetricsProcessor
+    from anomaly_detector.streaming import SeriesSession
+
+    values = [1.0, 2.0, np.nan, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0]
+    session = SeriesSession("default/pod-a", window_size=4)
+    rows = session.push(list(range(len(values))), {"x": values, "y": [1.0] * len(values)})
+
+    finite = [v for v in values if np.isfinite(v)]
+    expected = MetricsProcessor()._builtin_row({"x": {"values": finite[-4:]}})
+    for name, value in expected.items():
+        assert rows[-1][name] == pytest.approx(value), name
+    assert rows[2]["x_mean"] == pytest.approx(1.5)
+    assert all(np.isfinite(list(row.values())).all() for row in rows)
+
+    state = IncrementalFeatureState(window=4)
+    assert state.update({"x": np.inf}) == {}
+    with pytest.raises(ValueError):
+        WindowedStats(4).append(np.nan)
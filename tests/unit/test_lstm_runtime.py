@@ -0,0 +1,167 @@
+"""Unit tests for the numpy LSTM inference runtime."""
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def _weights(units=6, horizon=2, lookback=10, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "lookback": lookback,
+        "horizon": horizon,
+        "kernel": rng.normal(0, 0.5, (1, 4 * units)),
+        "recurrent_kernel": rng.normal(0, 0.5, (units, 4 * units)),
+        "bias": rng.normal(0, 0.1, 4 * units),
+        "dense_kernel": rng.normal(0, 0.5, (units, horizon)),
+        "dense_bias": rng.normal(0, 0.1, horizon),
+        "scale": np.array([0.01]),
+        "offset": np.array([-0.5]),
+    }
+
+
+def _reference_step_loop(weights, window):
+    """Unbatched float64 LSTM cell, written out gate by gate."""
+    sig = lambda x: 1.0 / (1.0 + np.exp(-x))
+    W, U, b = (np.asarray(weights[k], dtype=np.float64) for k in ("kernel", "recurrent_kernel", "bias"))
+    u = U.shape[0]
+    h, c = np.zeros(u), np.zeros(u)
+    for x in window:
+        z = x * W[0] + h @ U + b
+        i, f, g, o = sig(z[:u]), sig(z[u:2 * u]), np.tanh(z[2 * u:3 * u]), sig(z[3 * u:])
+        c = f * c + i * g
+        h = o * np.tanh(c)
+    return h @ weights["dense_kernel"] + weights["dense_bias"]
+
+
+def test_forward_matches_reference_cell():
+    """Test the batched forward pass equals a per-window reference cell."""
+    from ml_pipeline.models.lstm_runtime import NumpyLSTM
+
+    weights = _weights()
+    X = np.random.default_rng(1).random((37, 10))
+    out = NumpyLSTM(weights).forward(X, batch_size=8)
+
+    expected = np.array([_reference_step_loop(weights, window) for window in X])
+    np.testing.assert_allclose(out, expected, atol=1e-5)
+
+
+def test_predict_series_batches_and_roundtrips(tmp_path):
+    """Test multi-series batching, npz loading and pickling give identical results."""
+    from ml_pipeline.models.lstm_runtime import FORMAT_VERSION, NumpyLSTMPredictor
+
+    weights = _weights(horizon=1)
+    predictor = NumpyLSTMPredictor(weights)
+    rng = np.random.default_rng(2)
+    series = [rng.normal(50, 5, n) for n in (40, 5, 25)]
+
+    batched = predictor.predict_series(series, batch_size=7)
+    assert [len(p) for p in batched] == [31, 0, 16]
+    for values, preds in zip(series[::2], batched[::2]):
+        np.testing.assert_allclose(predictor.predict(pd.DataFrame({"value": values})), preds, rtol=1e-6)
+
+    np.savez(tmp_path / "lstm.npz", format_version=FORMAT_VERSION, **weights)
+    loaded = NumpyLSTMPredictor.load(tmp_path / "lstm.npz")
+    np.testing.assert_allclose(loaded.predict_series(series)[0], batched[0], rtol=1e-6)
+    np.testing.assert_allclose(pickle.loads(pickle.dumps(predictor)).predict_series(series)[2], batched[2], rtol=1e-6)
+
+
+def test_keras_parity(tmp_path):
+    """Test the numpy runtime reproduces Keras predictions for a trained model."""
+    pytest.importorskip("tensorflow")
+    from ml_pipeline.models.lstm_runtime import NumpyLSTMPredictor
+    from ml_pipeline.models.time_series_predictor import LSTMPredictor
+
+    t = np.arange(400)
+    df = pd.DataFrame({"value": 100 + 10 * np.sin(t / 7.0) + np.random.default_rng(3).normal(0, 1, 400)})
+    keras_predictor = LSTMPredictor(lookback=24, units=8).fit(df, epochs=1)
+
+    expected = keras_predictor.predict(df)
+    runtime = keras_predictor.to_runtime()
+    np.testing.assert_allclose(runtime.predict(df), expected, rtol=1e-4, atol=1e-4)
+    np.testing.assert_allclose(runtime.residual(df), keras_predictor.residual(df), rtol=1e-4, atol=1e-4)
+
+    path = keras_predictor.export(tmp_path / "lstm_weights.npz")
+    np.testing.assert_allclose(NumpyLSTMPredictor.load(path).predict(df), expected, rtol=1e-4, atol=1e-4)
+
+
+def _summary_rows(n=360, seed=4):
+    from ml_pipeline.data.feature_engineering import WORKLOAD_LABELS, FeatureEngineer
+
+    values = np.random.default_rng(seed).gamma(2.0, 0.1, n)
+    raw = {"cpu_usage": pd.DataFrame({"timestamp": np.arange(n) * 60, "value": values})}
+    X = FeatureEngineer(summary_rows=60).transform(raw, mode="summary")
+    return values, X.drop(columns=["timestamp", *WORKLOAD_LABELS])
+
+
+def test_ensemble_residuals_align_with_rows():
+    """Test ensemble scores cover every row, with no residual before the first window."""
+    from ml_pipeline.models.anomaly_detector import EnsembleModel, IsolationForestDetector
+    from ml_pipeline.models.lstm_runtime import NumpyLSTMPredictor
+
+    _, X = _summary_rows()
+    iso = IsolationForestDetector(n_estimators=20).fit(X)
+    ensemble = EnsembleModel(iso, NumpyLSTMPredictor(_weights(horizon=1)), target_col="cpu_usage_current")
+
+    scores = ensemble.predict(X)
+    assert scores.shape == (len(X),)
+    np.testing.assert_allclose(scores[:10], 0.6 * iso.predict(X.iloc[:10]))
+    # a second series starting mid-frame has no forecast for its first lookback rows
+    split = ensemble.predict(X, starts=np.array([0, 150]))
+    np.testing.assert_allclose(split[:150], scores[:150])
+    np.testing.assert_allclose(split[150:160], 0.6 * iso.predict(X.iloc[150:160]))
+    with pytest.raises(ValueError, match="cpu_usage_current"):
+        ensemble.predict(X.to_numpy())
+
+
+def test_serving_model_scores_plan_encoded_requests(tmp_path):
+    """Test the model the training job ships loads in the API and scores encoded rows."""
+    pytest.importorskip("tensorflow")  # train.py imports the LSTM
+    from anomaly_detector.detector import AnomalyDetector
+    from ml_pipeline.models.anomaly_detector import EnsembleModel, IsolationForestDetector
+    from ml_pipeline.models.lstm_runtime import NumpyLSTMPredictor
+    from ml_pipeline.training import train
+
+    values, X = _summary_rows()
+    iso = IsolationForestDetector(n_estimators=20).fit(X)
+    ensemble = EnsembleModel(iso, NumpyLSTMPredictor(_weights(horizon=1)), target_col="cpu_usage_current")
+    with pytest.raises(ValueError, match="cannot serve"):
+        train.save_serving_model(ensemble, X, tmp_path)
+    train.save_serving_model(iso, X, tmp_path)
+
+    detector = AnomalyDetector(model_dir=tmp_path)
+    encoded = detector.encode([{"cpu_usage": list(values[-60:])}, {"cpu_usage": list(values[:60])}])
+    scores = detector.predict(encoded)
+    np.testing.assert_allclose(scores, iso.predict(X.iloc[[-1, 0]]), rtol=1e-5)
+
+
+def test_api_serves_exported_lstm_with_the_forest(tmp_path):
+    """Test the API rebuilds the ensemble from the forest and the exported LSTM weights."""
+    pytest.importorskip("tensorflow")  # train.py imports the LSTM
+    from anomaly_detector.detector import AnomalyDetector
+    from ml_pipeline.models.anomaly_detector import EnsembleModel, IsolationForestDetector
+    from ml_pipeline.models.lstm_runtime import FORMAT_VERSION, NumpyLSTMPredictor
+    from ml_pipeline.training import train
+
+    values, X = _summary_rows()
+    iso = IsolationForestDetector(n_estimators=20).fit(X)
+    weights = _weights(horizon=1)
+    train.save_serving_model(iso, X, tmp_path)
+    np.savez(tmp_path / train.LSTM_WEIGHTS_FILENAME, format_version=FORMAT_VERSION,
+             target_col="cpu_usage_current", **weights)
+
+    detector = AnomalyDetector(model_dir=tmp_path)
+    assert isinstance(detector.model, EnsembleModel)
+    # stand-alone rows have no preceding rows to forecast from
+    encoded = detector.encode([{"cpu_usage": list(values[-60:])}])
+    np.testing.assert_allclose(detector.predict(encoded), 0.6 * iso.predict(X.iloc[[-1]]), rtol=1e-5)
+
+    # rows pushed in chunks score as the whole series does offline
+    expected = EnsembleModel(iso, NumpyLSTMPredictor(weights), target_col="cpu_usage_current").predict(X)
+    scores, history = [], None
+    for lo, hi in [(0, 4), (4, 37), (37, 38), (38, len(X))]:
+        chunk, history = detector.predict_sequence(X.iloc[lo:hi], history)
+        scores.append(chunk)
+    np.testing.assert_allclose(np.concatenate(scores), expected, rtol=1e-5)
+    assert len(history) == weights["lookback"]
@@ -0,0 +1,108 @@
+"""Unit tests for the streaming query_range matrix decoder."""
+import asyncio
+import json
+
+import httpx
+import numpy as np
+import pytest
+
+
+def _matrix_body():
+    return {
+        "status": "success",
+        "data": {
+            "resultType": "matrix",
+            "result": [
+                {
+                    "metric": {"pod": "api-0", "container": "api"},
+                    "values": [[1700000000 + 15 * i, str(i * 0.5)] for i in range(40)],
+                },
+                {
+                    "metric": {"pod": "api-1"},
+                    "values": [[1700000000, "NaN"], [1700000015, "+Inf"], [1700000030, "-Inf"]],
+                },
+            ],
+        },
+    }
+
+
+def _chunks(raw, size):
+    return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+
+@pytest.mark.parametrize("size", [1, 7, 64, 1 << 20])
+def test_decode_matches_json_for_any_chunking(size):
+    """Test chunk boundaries anywhere in the body decode identically."""
+    from ml_pipeline.data.matrix_decoder import decode_matrix
+
+    body = _matrix_body()
+    result = decode_matrix(_chunks(json.dumps(body, indent=1).encode(), size))
+
+    assert len(result) == 2
+    assert result.labels == [s["metric"] for s in body["data"]["result"]]
+    for i, series in enumerate(body["data"]["result"]):
+        expected = np.array(series["values"], dtype=np.float64)
+        timestamps, values = result.series(i)
+        np.testing.assert_array_equal(timestamps, expected[:, 0])
+        np.testing.assert_array_equal(values, expected[:, 1])
+
+
+def test_decode_special_values():
+    """Test NaN and infinities decode to float specials."""
+    from ml_pipeline.data.matrix_decoder import decode_matrix
+
+    result = decode_matrix([json.dumps(_matrix_body()).encode()])
+    _, values = result.series(1)
+    assert np.isnan(values[0])
+    assert values[1] == np.inf and values[2] == -np.inf
+
+
+def test_decode_empty_result_and_frame():
+    """Test an empty matrix yields empty arrays and frame."""
+    from ml_pipeline.data.matrix_decoder import decode_matrix
+
+    body = b'{"status":"success","data":{"resultType":"matrix","result":[]}}'
+    result = decode_matrix([body])
+    assert len(result) == 0
+    assert result.values.size == 0
+    assert list(result.to_frame().columns) == ["timestamp", "value"]
+
+
+def test_decode_error_response():
+    """Test a Prometheus error body raises with its message."""
+    from ml_pipeline.data.matrix_decoder import decode_matrix
+
+    body = b'{"status":"error","errorType":"bad_data","error":"parse error"}'
+    with pytest.raises(ValueError, match="parse error"):
+        decode_matrix(_chunks(body, 5))
+
+
+def test_to_frame_repeats_labels():
+    """Test the long frame carries labels per sample."""
+    from ml_pipeline.data.matrix_decoder import decode_matrix
+
+    frame = decode_matrix([json.dumps(_matrix_body()).encode()]).to_frame()
+    assert len(frame) == 43
+    assert (frame["pod"].iloc[:40] == "api-0").all()
+    assert frame["container"].isna().sum() == 3
+
+
+def test_client_query_range_arrays_streams_body():
+    """Test the API client decodes a streamed range response."""
+    from utils.prometheus_client import PrometheusClient
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        raw = json.dumps(_matrix_body()).encode()
+        return httpx.Response(200, stream=httpx.ByteStream(raw))
+
+    client = PrometheusClient("http://prom:9090", transport=httpx.MockTransport(handler))
+
+    async def scenario():
+        try:
+            return await client.query_range_arrays("up", "1", "2")
+        finally:
+            await client.aclose()
+
+    result = asyncio.run(scenario())
+    assert len(result) == 2
+    assert result.offsets.tolist() == [0, 40, 43]
@@ -0,0 +1,84 @@
+"""Unit tests for the metrics processor."""
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def test_to_features_batch_one_row_per_workload():
+    """Test batch transform builds one row per workload in input order."""
+    from anomaly_detector.metrics_processor import MetricsProcessor
+
+    processor = MetricsProcessor()
+    raws = [
+        {"cpu": {"values": [1.0, 2.0, 3.0]}, "mem": {"values": [10.0, 20.0]}},
+        {"cpu": {"values": [5.0]}},
+    ]
+    df = processor.to_features_batch(raws)
+
+    assert df.shape[0] == 2
+    assert df.loc[0, "cpu_mean"] == pytest.approx(2.0)
+    assert df.loc[0, "mem_rate"] == pytest.approx(10.0)
+    assert df.loc[1, "cpu_current"] == pytest.approx(5.0)
+    # mem missing for the second workload is zero-filled
+    assert df.loc[1, "mem_mean"] == 0.0
+
+
+def test_to_features_batch_matches_single():
+    """Test a batch row equals the single-workload transform."""
+    from anomaly_detector.metrics_processor import MetricsProcessor
+
+    processor = MetricsProcessor()
+    raw = {"cpu": {"values": list(np.random.rand(50))}}
+    single = processor._builtin_transform(raw)
+    batch = processor.to_features_batch([raw, raw])
+
+    pd.testing.assert_frame_equal(
+        batch.iloc[[0]].reset_index(drop=True), single, check_dtype=False
+    )
+
+
+def test_to_features_batch_empty():
+    """Test batch transform rejects empty input."""
+    from anomaly_detector.metrics_processor import MetricsProcessor
+
+    with pytest.raises(ValueError):
+        MetricsProcessor().to_features_batch([])
+
+
+def test_summary_features_match_per_series():
+    """Test the ragged batched kernel matches per-series reductions."""
+    from anomaly_detector.metrics_processor import MetricsProcessor, summary_features
+
+    rng = np.random.default_rng(0)
+    series = [rng.normal(50, 10, size=n) for n in (1, 2, 3, 17, 100, 1)]
+    series[3][5] = np.nan
+    offsets = np.cumsum([0] + [len(s) for s in series])
+    matrix = summary_features(np.concatenate(series), offsets)
+
+    processor = MetricsProcessor()
+    for i, values in enumerate(series):
+        row = processor._builtin_row({"m": list(values)})
+        np.testing.assert_allclose(matrix[i], list(row.values()), rtol=1e-12, atol=1e-12)
+
+
+def test_to_features_batch_ragged_matches_rows():
+    """Test the batched path equals stacking per-workload rows."""
+    from anomaly_detector.metrics_processor import MetricsProcessor
+
+    rng = np.random.default_rng(1)
+    raws = []
+    for i in range(20):
+        raw = {"cpu": {"values": list(rng.random(rng.integers(1, 40)))}}
+        if i % 3:
+            raw["mem"] = list(rng.random(rng.integers(1, 40)))
+        if i == 4:
+            raw["disk"] = {"values": []}
+        raws.append(raw)
+
+    processor = MetricsProcessor()
+    batch = processor.to_features_batch(raws)
+    expected = pd.DataFrame.from_records([processor._builtin_row(r) for r in raws]).fillna(0.0)
+
+    pd.testing.assert_frame_equal(batch, expected, check_exact=False, rtol=1e-12)
+    with pytest.raises(ValueError, match="index 1"):
+        processor.to_features_batch([raws[0], {"disk": {"values": []}}])
@@ -0,0 +1,71 @@
+"""Unit tests for the namespace scan."""
+import asyncio
+
+import numpy as np
+import pytest
+
+
+def _matrix(*series):
+    return {"resultType": "matrix", "result": list(series)}
+
+
+def _series(pod, container, values, **labels):
+    return {
+        "metric": {"namespace": "prod", "pod": pod, "container": container, **labels},
+        "values": [[1000 + 15 * i, str(v)] for i, v in enumerate(values)],
+    }
+
+
+def test_split_series_groups_by_pod_and_container():
+    """Test results are split per pod/container and aligned by metric."""
+    from anomaly_detector.namespace_scan import split_series
+
+    metrics = {
+        "cpu_usage": _matrix(_series("a", "app", [1, 2]), _series("b", "app", [3, 4])),
+        "memory_usage": _matrix(_series("a", "app", [10, 20])),
+    }
+    labels, raws = split_series(metrics)
+
+    assert labels == [
+        {"pod": "a", "container": "app", "namespace": "prod"},
+        {"pod": "b", "container": "app", "namespace": "prod"},
+    ]
+    np.testing.assert_array_equal(raws[0]["memory_usage"]["values"], [10.0, 20.0])
+    assert "memory_usage" not in raws[1]
+
+
+def test_split_series_sums_duplicate_identities():
+    """Test several series with one identity are summed per timestamp."""
+    from anomaly_detector.namespace_scan import split_series
+
+    metrics = {
+        "network_rx": _matrix(
+            _series("a", "POD", [1, 2], interface="eth0"),
+            _series("a", "POD", [5, 5], interface="eth1"),
+        )
+    }
+    _, raws = split_series(metrics)
+    np.testing.assert_array_equal(raws[0]["network_rx"]["values"], [6.0, 7.0])
+
+
+def test_scan_namespace_ranks_most_anomalous_first():
+    """Test the scan scores all series in one call and ranks them."""
+    from anomaly_detector.namespace_scan import scan_namespace
+
+    class FakeClient:
+        async def get_default_metrics(self, start, end, namespace):
+            return {"cpu_usage": _matrix(*(_series(p, "app", [v]) for p, v in
+                                           [("a", 1), ("b", 9), ("c", 5)]))}
+
+    calls = []
+
+    async def score_batch(raws):
+        calls.append(len(raws))
+        return np.array([raw["cpu_usage"]["values"][-1] for raw in raws])
+
+    scan = asyncio.run(scan_namespace(FakeClient(), score_batch, "prod", "s", "e", top_k=2))
+
+    assert calls == [3]
+    assert scan["series_scored"] == 3
+    assert [r["labels"]["pod"] for r in scan["results"]] == ["b", "c"]
+    assert scan["results"][0]["anomaly_score"] == pytest.approx(9.0)
@@ -0,0 +1,142 @@
+"""Unit tests for the Prometheus client."""
+import asyncio
+
+import httpx
+import pytest
+
+
+def _mock_transport(requests):
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(
+            200,
+            json={"status": "success", "data": {"resultType": "vector", "result": []}},
+        )
+    return httpx.MockTransport(handler)
+
+
+def test_client_reuses_one_http_client():
+    """Test repeated queries share one pooled HTTP client."""
+    from utils.prometheus_client import PrometheusClient
+
+    requests = []
+    client = PrometheusClient("http://prom:9090", transport=_mock_transport(requests))
+
+    async def scenario():
+        await client.query("up")
+        first = client._client
+        await client.query_range("up", "1", "2")
+        assert client._client is first
+        await client.aclose()
+
+    asyncio.run(scenario())
+    assert [r.url.path for r in requests] == ["/api/v1/query", "/api/v1/query_range"]
+    assert client._client is None
+
+
+def test_client_reports_pool_stats():
+    """Test pool utilization reflects the configured limits."""
+    from utils.prometheus_client import PrometheusClient
+
+    client = PrometheusClient("http://prom:9090", max_connections=7, transport=_mock_transport([]))
+    stats = client.pool_stats()
+    assert stats == {"in_flight": 0, "connections": 0, "max_connections": 7}
+
+
+def test_client_raises_on_failed_query():
+    """Test Prometheus error payloads surface as exceptions."""
+    from utils.prometheus_client import PrometheusClient
+
+    transport = httpx.MockTransport(
+        lambda request: httpx.Response(200, json={"status": "error", "error": "bad query"})
+    )
+    client = PrometheusClient("http://prom:9090", transport=transport)
+
+    with pytest.raises(Exception, match="bad query"):
+        asyncio.run(client.query("up{"))
+
+
+def test_default_metrics_run_concurrently_with_limit():
+    """Test default queries fan out concurrently up to the limit."""
+    from utils.prometheus_client import DEFAULT_METRIC_QUERIES, PrometheusClient
+
+    active, peak = [0], [0]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.01)
+        active[0] -= 1
+        return httpx.Response(200, json={"status": "success", "data": {"result": []}})
+
+    client = PrometheusClient(
+        "http://prom:9090", max_concurrency=3, transport=httpx.MockTransport(handler)
+    )
+    metrics, errors = asyncio.run(client.collect_default_metrics("1", "2", namespace="prod"))
+
+    assert set(metrics) == set(DEFAULT_METRIC_QUERIES)
+    assert errors == {}
+    assert peak[0] == 3
+
+
+def test_default_metrics_keep_partial_results():
+    """Test one failing query does not discard the others."""
+    from utils.prometheus_client import PrometheusClient
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if "memory" in request.url.params["query"]:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"status": "success", "data": {"result": []}})
+
+    client = PrometheusClient("http://prom:9090", transport=httpx.MockTransport(handler))
+    metrics, errors = asyncio.run(client.collect_default_metrics("1", "2"))
+
+    assert list(errors) == ["memory_usage"]
+    assert "memory_usage" not in metrics
+    assert len(metrics) == 5
+
+
+def test_identical_concurrent_queries_are_coalesced():
+    """Test identical in-flight queries share one upstream request."""
+    from utils.prometheus_client import PrometheusClient
+
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.params["query"])
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"status": "success", "data": {"result": [1]}})
+
+    client = PrometheusClient("http://prom:9090", transport=httpx.MockTransport(handler))
+
+    async def scenario():
+        results = await asyncio.gather(
+            *(client.query_range("up", "1", "2") for _ in range(5)),
+            client.query_range("down", "1", "2"),
+        )
+        await client.query_range("up", "1", "2")  # after completion: new request
+        return results
+
+    results = asyncio.run(scenario())
+    assert sorted(calls) == ["down", "up", "up"]
+    assert all(r == {"result": [1]} for r in results)
+    assert client._pending == {}
+
+
+def test_coalesced_failure_reaches_every_caller():
+    """Test a failed shared request raises for all joined callers."""
+    from utils.prometheus_client import PrometheusClient
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.01)
+        return httpx.Response(503)
+
+    client = PrometheusClient("http://prom:9090", transport=httpx.MockTransport(handler))
+
+    async def scenario():
+        return await asyncio.gather(
+            *(client.query("up") for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, httpx.HTTPStatusError) for r in results)
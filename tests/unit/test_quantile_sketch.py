@@ -0,0 +1,82 @@
+"""Unit tests for mergeable quantile sketches."""
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def _values(seed=0):
+    rng = np.random.default_rng(seed)
+    return np.concatenate([rng.lognormal(3, 2, 20000), -rng.lognormal(1, 1, 5000), np.zeros(50)])
+
+
+@pytest.mark.parametrize("q", [0.0, 0.01, 0.25, 0.5, 0.95, 0.99, 1.0])
+def test_sketch_relative_error(q):
+    """Test quantiles fall within the relative accuracy of the true sample."""
+    from ml_pipeline.data.quantile_sketch import DDSketch
+
+    values = _values()
+    estimate = DDSketch(0.01).add_many(values).quantile(q)
+    exact = np.quantile(values, q, method="lower")
+    assert estimate == pytest.approx(exact, rel=0.011, abs=1e-9)
+
+
+def test_sketch_merge_and_roundtrip():
+    """Test merged partial sketches equal a sketch of all values."""
+    from ml_pipeline.data.quantile_sketch import DDSketch
+
+    values = _values(1)
+    whole = DDSketch(0.02).add_many(values)
+    parts = [DDSketch(0.02).add_many(chunk) for chunk in np.array_split(values, 7)]
+    merged = DDSketch.merged(parts)
+
+    qs = [0.1, 0.5, 0.9, 0.99]
+    np.testing.assert_allclose(merged.quantiles(qs), whole.quantiles(qs))
+    assert merged.count == len(values)
+    restored = DDSketch.from_dict(merged.to_dict())
+    np.testing.assert_allclose(restored.quantiles(qs), whole.quantiles(qs))
+
+    with pytest.raises(ValueError):
+        merged.merge(DDSketch(0.05))
+    with pytest.raises(ValueError):
+        DDSketch().quantile(0.5)
+
+
+def test_sketch_bounded_bins():
+    """Test the bucket count stays bounded for very wide ranges."""
+    from ml_pipeline.data.quantile_sketch import DDSketch
+
+    sketch = DDSketch(0.01, max_bins=128).add_many(np.logspace(-8, 12, 10000))
+    assert len(sketch._positive.counts) <= 128
+    assert sketch.quantile(0.99) == pytest.approx(np.quantile(np.logspace(-8, 12, 10000), 0.99, method="lower"), rel=0.011)
+
+
+def test_metrics_processor_sketch_percentiles():
+    """Test MetricsProcessor percentiles from sketches stay within accuracy."""
+    from anomaly_detector.metrics_processor import MetricsProcessor
+
+    values = np.abs(_values(2))
+    exact = MetricsProcessor()._builtin_row({"cpu": {"values": values}})
+    approx = MetricsProcessor(sketch_accuracy=0.01)._builtin_row({"cpu": {"values": values}})
+    for name in ("cpu_median", "cpu_p95", "cpu_p99"):
+        assert approx[name] == pytest.approx(exact[name], rel=0.02)
+    assert approx["cpu_mean"] == exact["cpu_mean"]
+
+
+def test_feature_engineer_rollup_from_pod_sketches():
+    """Test namespace percentiles from merged per-pod sketches."""
+    from ml_pipeline.data.feature_engineering import FeatureEngineer
+
+    rng = np.random.default_rng(3)
+    frames = [
+        pd.DataFrame({"timestamp": np.arange(500), "value": rng.gamma(2, 10, 500), "namespace": ns, "pod": pod})
+        for ns, pod in [("a", "a-0"), ("a", "a-1"), ("b", "b-0")]
+    ]
+    df = pd.concat(frames, ignore_index=True)
+
+    sketches = FeatureEngineer().sketch_series(df)
+    assert len(sketches) == 3
+    rollup = FeatureEngineer.rollup_quantiles(sketches, by=["namespace"])
+
+    assert rollup.columns.tolist() == ["namespace", "p50", "p95", "p99"]
+    exact = np.quantile(df[df["namespace"] == "a"]["value"], 0.95, method="lower")
+    assert rollup.set_index("namespace").loc["a", "p95"] == pytest.approx(exact, rel=0.011)
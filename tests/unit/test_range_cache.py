@@ -0,0 +1,94 @@
+"""Unit tests for the step-aligned range-query cache."""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+
+def _synthetic_prometheus(requests):
+    """Transport answering range queries with value == timestamp."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        start, end, step = (float(params[k]) for k in ("start", "end", "step"))
+        requests.append((start, end))
+        values, ts = [], start
+        while ts <= end:
+            values.append([ts, str(ts)])
+            ts += step
+        return httpx.Response(200, json={
+            "status": "success",
+            "data": {"resultType": "matrix", "result": [{"metric": {"pod": "a"}, "values": values}]},
+        })
+    return httpx.MockTransport(handler)
+
+
+def test_parse_helpers():
+    """Test timestamp and duration parsing."""
+    from utils.range_cache import parse_duration, parse_timestamp
+
+    assert parse_duration("15s") == 15
+    assert parse_duration("1h30m") == 5400
+    assert parse_duration("0.5") == 0.5
+    assert parse_timestamp("1700000000") == 1700000000
+    assert parse_timestamp("2023-11-14T22:13:20Z") == 1700000000
+    with pytest.raises(ValueError):
+        parse_duration("15 parsecs")
+
+
+def test_plan_splits_immutable_chunks_and_tail():
+    """Test aligned chunk boundaries and the open tail."""
+    from utils.range_cache import RangeQueryCache
+
+    cache = RangeQueryCache(chunk_seconds=600, max_freshness=300)
+    start, end, chunks, tail = cache.plan(1007, 3000, 15, now=3000)
+
+    assert (start, end) == (1005, 3000)
+    assert chunks == [(600, 1185), (1200, 1785), (1800, 2385)]
+    assert tail == (2400, 3000)
+
+
+def test_repeat_query_fetches_only_tail():
+    """Test a sliding window reuses cached chunks and refetches the tail."""
+    from utils.prometheus_client import PrometheusClient
+    from utils.range_cache import RangeQueryCache
+
+    requests = []
+    client = PrometheusClient(
+        "http://prom:9090",
+        range_cache=RangeQueryCache(chunk_seconds=600, max_freshness=300),
+        transport=_synthetic_prometheus(requests),
+    )
+    now = time.time()
+
+    async def scenario():
+        first = await client.query_range("up", str(now - 3600), str(now), "15s")
+        requests.clear()
+        second = await client.query_range("up", str(now - 3570), str(now + 30), "15s")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert len(requests) == 1  # only the open tail
+    values = second["result"][0]["values"]
+    timestamps = [float(v[0]) for v in values]
+    assert timestamps == sorted(set(timestamps))
+    assert all(float(v[0]) == float(v[1]) for v in values)
+    assert timestamps[0] == pytest.approx((now - 3570) // 15 * 15)
+    assert len(first["result"][0]["values"]) == 241
+
+
+def test_cache_bounded_by_samples():
+    """Test least recently used chunks are evicted past the sample bound."""
+    from utils.range_cache import RangeQueryCache
+
+    cache = RangeQueryCache(max_samples=3)
+    series = lambda n: [{"metric": {}, "values": [[i, "1"] for i in range(n)]}]
+    cache.put("a", series(2))
+    cache.put("b", series(1))
+    cache.get("a")
+    cache.put("c", series(1))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert len(cache) == 2
@@ -0,0 +1,339 @@
+"""Unit tests for the Prometheus remote-read client."""
+import datetime as dt
+import struct
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+
+class _BitWriter:
+    def __init__(self):
+        self.value = 0
+        self.n = 0
+
+    def write(self, value, nbits):
+        self.value = (self.value << nbits) | (value & ((1 << nbits) - 1))
+        self.n += nbits
+
+    def write_uvarint(self, value):
+        from ml_pipeline.data.remote_read import _uvarint
+
+        for byte in _uvarint(value):
+            self.write(byte, 8)
+
+    def to_bytes(self):
+        pad = -self.n % 8
+        return (self.value << pad).to_bytes((self.n + pad) // 8, "big")
+
+
+def encode_xor_chunk(timestamps, values):
+    """Reference XOR appender mirroring Prometheus' tsdb/chunkenc/xor.go."""
+    w = _BitWriter()
+    leading, trailing = 0xFF, 0
+    prev_t = prev_v = delta = 0
+
+    def write_value(v):
+        nonlocal leading, trailing
+        x = v ^ prev_v
+        if x == 0:
+            w.write(0, 1)
+            return
+        w.write(1, 1)
+        lead = min(64 - x.bit_length(), 31)
+        trail = (x & -x).bit_length() - 1
+        if leading != 0xFF and lead >= leading and trail >= trailing:
+            w.write(0, 1)
+            w.write(x >> trailing, 64 - leading - trailing)
+        else:
+            leading, trailing = lead, trail
+            significant = 64 - lead - trail
+            w.write(1, 1)
+            w.write(lead, 5)
+            w.write(significant, 6)
+            w.write(x >> trail, significant)
+
+    for i, (t, value) in enumerate(zip(timestamps, values)):
+        t = int(t)
+        v = struct.unpack(">Q", struct.pack(">d", value))[0]
+        if i == 0:
+            w.write_uvarint((t << 1) if t >= 0 else (~t << 1) | 1)
+            w.write(v, 64)
+        elif i == 1:
+            delta = t - prev_t
+            w.write_uvarint(delta)
+            write_value(v)
+        else:
+            d = t - prev_t
+            dod = d - delta
+            if dod == 0:
+                w.write(0, 1)
+            else:
+                for prefix, plen, width in ((0b10, 2, 14), (0b110, 3, 17), (0b1110, 4, 20), (0b1111, 4, 64)):
+                    if width == 64 or -((1 << (width - 1)) - 1) <= dod <= 1 << (width - 1):
+                        w.write(prefix, plen)
+                        w.write(dod, width)
+                        break
+            delta = d
+            write_value(v)
+        prev_t, prev_v = t, v
+    return len(timestamps).to_bytes(2, "big") + w.to_bytes()
+
+
+def _series_message(labels, chunks):
+    from ml_pipeline.data.remote_read import _field_bytes, _field_varint
+
+    out = b""
+    for name, value in labels.items():
+        out += _field_bytes(1, _field_bytes(1, name.encode()) + _field_bytes(2, value.encode()))
+    for ts, vals in chunks:
+        chunk = (
+            _field_varint(1, int(ts[0])) + _field_varint(2, int(ts[-1]))
+            + _field_varint(3, 1) + _field_bytes(4, encode_xor_chunk(ts, vals))
+        )
+        out += _field_bytes(2, chunk)
+    return out
+
+
+def _samples_response(per_query):
+    from ml_pipeline.data.remote_read import _field_bytes, _field_varint
+
+    out = b""
+    for series_list in per_query:
+        result = b""
+        for labels, ts, vals in series_list:
+            ts_msg = b""
+            for name, value in labels.items():
+                ts_msg += _field_bytes(1, _field_bytes(1, name.encode()) + _field_bytes(2, value.encode()))
+            for t, v in zip(ts, vals):
+                ts_msg += _field_bytes(2, b"\x09" + struct.pack("<d", v) + _field_varint(2, int(t)))
+            result += _field_bytes(1, ts_msg)
+        out += _field_bytes(1, result)
+    return out
+
+
+class _StandIn:
+    """In-process remote-read endpoint serving a fixed set of series."""
+
+    def __init__(self):
+        self.series = []  # (labels, timestamps_ms, values)
+        self.mode = "streamed"
+        self.corrupt = False
+        self.requests = []
+        self.url = None
+
+    def select(self, matchers):
+        selected = []
+        for labels, ts, vals in self.series:
+            if all(labels.get(name, "") == value for kind, name, value in matchers if kind == 0):
+                selected.append((labels, ts, vals))
+        return selected
+
+    def respond(self, body):
+        from ml_pipeline.data import remote_read as rr
+
+        queries = []
+        for field, query in rr._fields(rr.snappy_decompress(body)):
+            if field != 1:
+                continue
+            start = end = 0
+            matchers = []
+            for f, v in rr._fields(query):
+                if f == 1:
+                    start = v
+                elif f == 2:
+                    end = v
+                elif f == 3:
+                    m = {k: (bytes(x).decode() if k > 1 else x) for k, x in rr._fields(v)}
+                    matchers.append((m.get(1, 0), m[2], m[3]))
+            queries.append((start, end, matchers))
+        self.requests.append(queries)
+
+        if self.mode == "samples":
+            payload = _samples_response([self.select(m) for _, _, m in queries])
+            return "application/x-protobuf", rr.snappy_compress(payload)
+
+        frames = b""
+        for index, (_, _, matchers) in enumerate(queries):
+            for labels, ts, vals in self.select(matchers):
+                chunks = [(ts[i:i + 120], vals[i:i + 120]) for i in range(0, len(ts), 120)]
+                # two chunks per frame so series span several frames
+                for i in range(0, len(chunks), 2):
+                    message = rr._field_bytes(1, _series_message(labels, chunks[i:i + 2]))
+                    message += rr._field_varint(2, index)
+                    checksum = rr.crc32c(message) ^ (1 if self.corrupt else 0)
+                    frames += rr._uvarint(len(message)) + checksum.to_bytes(4, "big") + message
+        return rr.STREAMED_CONTENT_TYPE, frames
+
+
+@pytest.fixture
+def remote_read_server():
+    """Local stand-in for Prometheus' /api/v1/read endpoint."""
+    stand_in = _StandIn()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            assert self.path == "/api/v1/read"
+            assert self.headers["Content-Encoding"] == "snappy"
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            content_type, payload = stand_in.respond(body)
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    stand_in.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield stand_in
+    server.shutdown()
+    server.server_close()
+
+
+def _sample_series(start_ms, n, seed):
+    rng = np.random.default_rng(seed)
+    jitter = rng.integers(-300, 300, size=n)
+    jitter[::50] = 40000  # occasional scrape gaps exercise wider delta-of-delta buckets
+    ts = start_ms + np.arange(n, dtype=np.int64) * 15000 + np.cumsum(jitter)
+    vals = np.round(rng.normal(100, 20, size=n), 2)
+    vals[::7] = vals[0]  # repeated values
+    vals[n // 2] = np.nan
+    return ts, vals
+
+
+def test_xor_chunk_roundtrip():
+    """Test XOR chunk decoding against the reference appender."""
+    from ml_pipeline.data.remote_read import decode_xor_chunk
+
+    ts, vals = _sample_series(1_700_000_000_000, 240, seed=1)
+    ts[20:] += 300_000  # 20-bit delta-of-delta
+    ts[5] += 10**9  # 64-bit delta-of-delta
+    decoded_ts, decoded_vals = decode_xor_chunk(encode_xor_chunk(ts, vals))
+
+    np.testing.assert_array_equal(decoded_ts, ts)
+    np.testing.assert_array_equal(decoded_vals, vals)
+    assert decode_xor_chunk(b"\x00\x00")[0].size == 0
+
+
+def test_frames_straddle_network_chunks():
+    """Test frames split at arbitrary byte boundaries are reassembled and verified."""
+    from ml_pipeline.data import remote_read as rr
+
+    messages = [b"first", b"x" * 300, b""]
+    body = b"".join(
+        rr._uvarint(len(m)) + rr.crc32c(m).to_bytes(4, "big") + m for m in messages
+    )
+    chunks = [body[i:i + 3] for i in range(0, len(body), 3)]
+    assert list(rr.iter_frames(chunks)) == messages
+
+    with pytest.raises(ValueError, match="Truncated"):
+        list(rr.iter_frames([body[:-1]]))
+
+
+def test_remote_read_streamed(remote_read_server):
+    """Test the collector decodes streamed chunks per selector, trimmed to the range."""
+    from ml_pipeline.data.data_collector import PrometheusCollector
+
+    start = dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc)
+    start_ms = int(start.timestamp() * 1000)
+    cpu_a = _sample_series(start_ms - 60_000, 1000, seed=2)
+    cpu_b = _sample_series(start_ms, 300, seed=3)
+    mem = _sample_series(start_ms, 50, seed=4)
+    remote_read_server.series = [
+        ({"__name__": "cpu", "pod": "a"}, *cpu_a),
+        ({"__name__": "cpu", "pod": "b"}, *cpu_b),
+        ({"__name__": "mem", "pod": "a"}, *mem),
+    ]
+
+    collector = PrometheusCollector(base_url=remote_read_server.url, chunk_size=97)
+    end = start + dt.timedelta(hours=3)
+    cpu, memory = collector.remote_read(['cpu{job=""}', "mem"], start, end)
+
+    assert remote_read_server.requests[0][0][2] == [(0, "__name__", "cpu"), (0, "job", "")]
+    assert [labels["pod"] for labels in cpu.labels] == ["a", "b"]
+    ts, vals = cpu.series(0)
+    keep = (cpu_a[0] >= start_ms) & (cpu_a[0] <= int(end.timestamp() * 1000))
+    np.testing.assert_array_equal(ts, cpu_a[0][keep] / 1000.0)
+    np.testing.assert_array_equal(vals, cpu_a[1][keep])
+    assert len(memory) == 1 and memory.series(0)[0].size == 50
+    assert set(cpu.to_frame()["pod"]) == {"a", "b"}
+
+
+def test_remote_read_checksum_mismatch(remote_read_server):
+    """Test corrupted frames are rejected."""
+    from ml_pipeline.data.data_collector import PrometheusCollector
+
+    start = dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc)
+    remote_read_server.series = [({"__name__": "cpu"}, *_sample_series(int(start.timestamp() * 1000), 10, 5))]
+    remote_read_server.corrupt = True
+
+    collector = PrometheusCollector(base_url=remote_read_server.url)
+    with pytest.raises(ValueError, match="checksum"):
+        collector.remote_read("cpu", start, start + dt.timedelta(hours=1))
+
+
+def test_remote_read_samples_fallback(remote_read_server):
+    """Test servers answering with SAMPLES responses are decoded too."""
+    from ml_pipeline.data.data_collector import PrometheusCollector
+
+    start = dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc)
+    ts, vals = _sample_series(int(start.timestamp() * 1000), 30, seed=6)
+    remote_read_server.series = [({"__name__": "cpu", "pod": "a"}, ts, vals)]
+    remote_read_server.mode = "samples"
+
+    collector = PrometheusCollector(base_url=remote_read_server.url)
+    (result,) = collector.remote_read("cpu", start, start + dt.timedelta(hours=1))
+
+    np.testing.assert_array_equal(result.series(0)[0], ts / 1000.0)
+    np.testing.assert_array_equal(result.series(0)[1], vals)
+
+
+def test_counter_rate_handles_resets_per_series():
+    """Test counters become per-second rates without crossing series or going negative."""
+    from ml_pipeline.data.data_collector import counter_rate
+    from ml_pipeline.data.matrix_decoder import MatrixResult
+
+    result = MatrixResult(
+        timestamps=np.array([0.0, 15.0, 30.0, 45.0, 0.0, 30.0]),
+        values=np.array([10.0, 40.0, 70.0, 15.0, 500.0, 560.0]),
+        offsets=np.array([0, 4, 4, 6]),
+        labels=[{"pod": "a"}, {"pod": "empty"}, {"pod": "b"}],
+    )
+    rates = counter_rate(result)
+
+    np.testing.assert_array_equal(rates.offsets, [0, 3, 3, 4])
+    np.testing.assert_allclose(rates.values, [2.0, 2.0, 1.0, 2.0])  # reset at 45s counts from zero
+    np.testing.assert_array_equal(rates.timestamps, [15.0, 30.0, 45.0, 30.0])
+
+
+def test_remote_read_metrics_for_training(remote_read_server):
+    """Test training metrics come back as frames in one request, counters as rates."""
+    from ml_pipeline.data.data_collector import PrometheusCollector
+
+    start = dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc)
+    start_ms = int(start.timestamp() * 1000)
+    ts = start_ms + np.arange(40, dtype=np.int64) * 15000
+    remote_read_server.series = [
+        ({"__name__": "container_cpu_usage_seconds_total", "pod": "a"}, ts, np.arange(40) * 1.5),
+        ({"__name__": "container_memory_usage_bytes", "pod": "a"}, ts, np.full(40, 2e8)),
+    ]
+
+    collector = PrometheusCollector(base_url=remote_read_server.url)
+    raw = collector.remote_read_metrics(
+        {
+            "cpu_usage": ("container_cpu_usage_seconds_total", True),
+            "memory_usage": ("container_memory_usage_bytes", False),
+        },
+        start,
+        start + dt.timedelta(hours=1),
+    )
+
+    assert len(remote_read_server.requests) == 1
+    assert len(raw["cpu_usage"]) == 39 and np.allclose(raw["cpu_usage"]["value"], 0.1)
+    assert len(raw["memory_usage"]) == 40 and set(raw["memory_usage"].columns) >= {"timestamp", "value", "pod"}
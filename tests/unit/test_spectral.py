@@ -0,0 +1,81 @@
+"""Unit tests for windowed and incremental spectral features."""
+import numpy as np
+import pandas as pd
+
+
+def _signal(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n)
+    # a burst of periodic load in the middle of the series
+    burst = np.where((t > 120) & (t < 200), 20 * np.sin(2 * np.pi * t / 8), 0.0)
+    return 50 + rng.normal(0, 1, n) + burst
+
+
+def test_window_features_match_direct_rfft():
+    """Test each row uses the rFFT of its latest trailing window."""
+    from ml_pipeline.data.spectral import window_features
+
+    v = _signal()
+    window, hop = 32, 5
+    feat = window_features(v, window, hop)
+
+    for i in (0, 31, 32, 36, 37, 150, 299):
+        end = window - 1 + max(i - (window - 1), 0) // hop * hop
+        frame = v[end - window + 1:end + 1]
+        mag = np.sort(np.abs(np.fft.rfft(frame)))[::-1][:3]
+        np.testing.assert_allclose(feat[i, :3], mag)
+        np.testing.assert_allclose(feat[i, 3], ((frame - frame.mean()) ** 2).sum())
+    # the burst is visible locally, not smeared over the whole series
+    assert feat[180, 3] > 20 * feat[60, 3]
+
+
+def test_window_features_respect_series_boundaries():
+    """Test windows never span two series and short series get zeros."""
+    from ml_pipeline.data.spectral import window_features
+
+    a, b, c = _signal(50, 1), _signal(10, 2), _signal(40, 3)
+    starts = np.array([0, 50, 60])
+    feat = window_features(np.concatenate((a, b, c)), 16, 1, starts)
+
+    np.testing.assert_allclose(feat[:50], window_features(a, 16))
+    assert not feat[50:60].any()
+    np.testing.assert_allclose(feat[60:], window_features(c, 16))
+
+
+def test_goertzel_and_sliding_dft_match_fft():
+    """Test single-bin and streaming bins equal the rFFT of the window."""
+    from ml_pipeline.data.spectral import SlidingDFT, goertzel, summarize
+
+    v = _signal(2500)
+    frames = np.lib.stride_tricks.sliding_window_view(v, 32)[::7]
+    np.testing.assert_allclose(goertzel(frames, 4), np.fft.rfft(frames, axis=1)[:, 4])
+
+    bins = np.arange(1, 17)
+    dft = SlidingDFT(32, bins)
+    for i, x in enumerate(v):
+        dft.update(x)
+        if i in (40, 2047, 2048, len(v) - 1):
+            expected = np.fft.rfft(v[i - 31:i + 1])
+            np.testing.assert_allclose(dft.values, expected[bins], atol=1e-8)
+    assert dft.full
+    mag = np.abs(np.fft.rfft(v[-32:]))
+    np.testing.assert_allclose(dft.power(), summarize(mag[None, :], 32)[0, 3])
+
+
+def test_feature_engineer_spectral_window():
+    """Test spectral_window swaps in time-local FFT columns."""
+    from ml_pipeline.data.feature_engineering import FeatureEngineer
+    from ml_pipeline.data.spectral import window_features
+
+    v = _signal(120)
+    raw = {"cpu": pd.DataFrame({"timestamp": np.arange(120) * 60, "value": v, "pod": "a"})}
+    engineer = FeatureEngineer(step="1m", spectral_window="16m", spectral_hop=4)
+
+    grid = engineer.transform(raw, mode="grid")
+    np.testing.assert_allclose(
+        grid[["cpu_fft_1", "cpu_fft_2", "cpu_fft_3", "cpu_fft_energy"]].to_numpy(),
+        window_features(v, 16, 4),
+    )
+    series = engineer.transform(raw, mode="series")
+    np.testing.assert_allclose(series["fft_energy"], grid["cpu_fft_energy"])
+    assert "fft_energy" not in FeatureEngineer().transform(raw, mode="series")
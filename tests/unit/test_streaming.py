@@ -0,0 +1,26 @@
+"""Unit tests for streaming session state."""
+import pytest
+
+
+def test_series_session_yields_features_per_sample():
+    """Test each pushed timestamp yields features for the window ending at it."""
+    from anomaly_detector.streaming import SeriesSession
+
+    session = SeriesSession("default/pod-a", window_size=3)
+    session.push([1, 2], {"cpu": [1.0, 2.0]})
+    rows = session.push([3, 4], {"cpu": [3.0, 4.0]})
+
+    assert len(rows) == 2
+    assert rows[0]["cpu_mean"] == pytest.approx(2.0)
+    assert rows[1]["cpu_mean"] == pytest.approx(3.0)
+    assert (rows[1]["cpu_min"], rows[1]["cpu_max"], rows[1]["cpu_rate"]) == (2.0, 4.0, 1.0)
+    assert session.samples_seen == 4
+
+
+def test_series_session_rejects_misaligned_values():
+    """Test value arrays must match the timestamps."""
+    from anomaly_detector.streaming import SeriesSession
+
+    session = SeriesSession("default/pod-a")
+    with pytest.raises(ValueError):
+        session.push([1, 2], {"cpu": [1.0]})
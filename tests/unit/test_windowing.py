@@ -0,0 +1,75 @@
+"""Unit tests for zero-copy sequence windowing."""
+import numpy as np
+import pytest
+
+
+def _loop_windows(values, lookback, horizon):
+    """Reference: the list-append windowing the strided views replace."""
+    X, y = [], []
+    for i in range(lookback, len(values) - horizon + 1):
+        X.append(values[i - lookback:i])
+        y.append(values[i:i + horizon])
+    return np.array(X), np.array(y)
+
+
+def test_sliding_windows_are_views_matching_loop():
+    """Test strided windows equal the loop result without copying the series."""
+    from ml_pipeline.models.windowing import sliding_windows
+
+    values = np.random.default_rng(0).random(500)
+    X, y = sliding_windows(values, lookback=60, horizon=3)
+    X_ref, y_ref = _loop_windows(values, 60, 3)
+
+    np.testing.assert_array_equal(X, X_ref)
+    np.testing.assert_array_equal(y, y_ref)
+    assert np.shares_memory(X, values) and np.shares_memory(y, values)
+    assert not X.flags.writeable
+
+    X, y = sliding_windows(values, lookback=60)
+    assert len(X) == 441 and y is None
+    assert sliding_windows(values[:10], lookback=60, horizon=1)[0].shape == (0, 60)
+
+
+def test_window_batches_cover_every_window_each_epoch():
+    """Test batches have Keras shapes and each epoch visits every window once."""
+    from ml_pipeline.models.windowing import WindowBatches
+
+    values = np.arange(1000, dtype=np.float64)
+    batches = WindowBatches(values, lookback=20, horizon=2, batch_size=64, shuffle=True, seed=1)
+    X_ref, y_ref = _loop_windows(values.astype(np.float32), 20, 2)
+
+    assert len(batches) == -(-len(X_ref) // 64)
+    stream = batches.generator(epochs=2)
+    for _ in range(2):
+        seen = []
+        for _ in range(len(batches)):
+            X, y = next(stream)
+            assert X.shape[1:] == (20, 1) and X.dtype == np.float32 and y.shape[1:] == (2,)
+            np.testing.assert_array_equal(y[:, 0], X[:, -1, 0] + 1)
+            seen.append(X[:, 0, 0])
+        np.testing.assert_array_equal(np.sort(np.concatenate(seen)), X_ref[:, 0])
+    with pytest.raises(StopIteration):
+        next(stream)
+
+
+def test_window_batches_without_targets_keep_order():
+    """Test prediction batches yield 1-tuples of inputs, in series order."""
+    from ml_pipeline.models.windowing import WindowBatches
+
+    values = np.random.default_rng(2).random(300)
+    batches = WindowBatches(values, lookback=30, horizon=0, batch_size=100)
+    X = np.concatenate([batch[0] for batch in batches])
+
+    np.testing.assert_allclose(X[:, :, 0], np.lib.stride_tricks.sliding_window_view(values, 30), rtol=1e-6)
+
+
+def test_window_batches_skip_windows_across_series():
+    """Test stacked series only yield windows and targets from within one series."""
+    from ml_pipeline.models.windowing import WindowBatches
+
+    values = np.concatenate([np.arange(50), 1000 + np.arange(30), 2000 + np.arange(5)]).astype(np.float64)
+    batches = WindowBatches(values, lookback=10, horizon=2, batch_size=16, starts=np.array([0, 50, 80]))
+
+    assert batches.n_windows == (50 - 11) + (30 - 11)
+    X, y = map(np.concatenate, zip(*batches))
+    np.testing.assert_array_equal(y[:, -1] - X[:, 0, 0], 11)  # contiguous, no jump between series